@@ -1,5 +1,7 @@
 import streamlit as st
 
+from llm_client import get_llm_metrics
+
 st.set_page_config(
     page_title="LangChain + Streamlit Agent",
     page_icon="🤖",
@@ -60,3 +62,10 @@ This application demonstrates the power of **LangChain** combined with **Streaml
 ---
 *Built with [Streamlit](https://streamlit.io) and [LangChain](https://python.langchain.com/)* 
 """)
+
+with st.expander("📡 LLM usage (this server process)"):
+    rows = get_llm_metrics().summary()
+    if rows:
+        st.dataframe(rows, use_container_width=True, hide_index=True)
+    else:
+        st.caption("No LLM calls yet.")
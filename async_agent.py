@@ -0,0 +1,43 @@
+import asyncio
+
+from langchain_community.callbacks.streamlit import StreamlitCallbackHandler
+
+
+class InlineStreamlitCallbackHandler(StreamlitCallbackHandler):
+    """
+    StreamlitCallbackHandler that runs inline on the event loop thread.
+    Without this, LangChain dispatches sync handlers to a thread pool on the
+    async path, where Streamlit has no script-run context and drops output.
+    """
+    run_inline = True
+
+
+def with_timeout(coroutine, timeout, name):
+    """
+    Wrap a tool coroutine with a per-call timeout. On timeout the call is
+    cancelled and the agent receives an error string instead of hanging.
+    """
+    async def _run(*args, **kwargs):
+        try:
+            return await asyncio.wait_for(coroutine(*args, **kwargs), timeout)
+        except asyncio.TimeoutError:
+            return f"Error: tool {name} timed out after {timeout}s"
+        except Exception as e:
+            return f"Error executing tool {name}: {e}"
+    return _run
+
+
+def invoke_concurrent(llm_scope, build_executor, inputs, callbacks=None):
+    """
+    Run an AgentExecutor on its async path. Tool calls issued in the same
+    agent step are awaited together (asyncio.gather), so a step costs the
+    slowest tool instead of the sum; observations keep the call order.
+
+    `llm_scope` is an llm_client.async_llm(...) context, entered on this
+    call's event loop and closed with it; `build_executor(llm)` returns the
+    AgentExecutor to run on that instance.
+    """
+    async def _run():
+        async with llm_scope as llm:
+            return await build_executor(llm).ainvoke(inputs, {"callbacks": callbacks or []})
+    return asyncio.run(_run())
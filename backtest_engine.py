@@ -1,12 +1,23 @@
 import backtrader as bt
 import pandas as pd
 
+from execution_model import configure_ashare
+
 class BacktestEngine:
-    def __init__(self, initial_cash=100000.0, commission=0.001):
+    def __init__(self, initial_cash=100000.0, commission=0.001, rules=None):
+        """
+        rules: optional execution_model.AShareRules. When given, fills follow
+        A-share rules (T+1, board lots, stamp duty, price limits, slippage)
+        and `commission` is ignored in favour of the rules' fee schedule.
+        """
         self.initial_cash = initial_cash
         self.commission = commission
+        self.rules = rules
 
     def _configure_cerebro(self, cerebro, pos_size):
+        if self.rules is not None:
+            configure_ashare(cerebro, self.rules, self.initial_cash, pos_size)
+            return
         cerebro.broker.setcash(self.initial_cash)
         cerebro.broker.setcommission(commission=self.commission)
         
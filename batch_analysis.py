@@ -0,0 +1,256 @@
+"""
+Batch sentiment + entity extraction over a CSV/JSONL corpus (e.g. the
+stock_news_em headlines). Items are packed several per prompt up to a token
+budget, batches run concurrently under a request-rate limit, and every
+parsed result is appended to a JSONL checkpoint so an interrupted job
+resumes where it stopped.
+"""
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+from langchain_core.output_parsers import JsonOutputParser
+from langchain_core.prompts import ChatPromptTemplate
+
+from rate_limit import TokenBucket
+
+CHECKPOINT_DIR = "data/batch"
+TEXT_COLUMNS = ("新闻标题", "标题", "title", "headline", "text", "content", "新闻内容")
+MAX_ITEM_CHARS = 2000
+# DeepSeek list prices (yuan per million tokens, cache miss)
+PRICE_INPUT_PER_M = 2.0
+PRICE_OUTPUT_PER_M = 8.0
+RESULT_FIELDS = ("sentiment", "score", "persons", "organizations", "locations")
+
+PROMPT = ChatPromptTemplate.from_template(
+    """You are a financial news analyst. For each item below:
+    - classify the sentiment toward the companies / market it mentions as positive, negative or neutral
+    - give a score from -1 (very negative) to 1 (very positive)
+    - extract persons, organizations and locations, keeping names in their original language
+
+    Return ONLY a JSON array with one object per item, in the same order:
+    [{{"id": "<item id>", "sentiment": "positive|negative|neutral", "score": 0.0, "persons": [], "organizations": [], "locations": []}}]
+
+    Items:
+    {items}
+    """
+)
+
+
+def estimate_tokens(text):
+    """Rough count: ~1 token per CJK character, ~4 characters per token otherwise."""
+    cjk = sum(1 for ch in text if '一' <= ch <= '鿿')
+    return cjk + (len(text) - cjk) // 4 + 1
+
+
+def read_table(data, filename):
+    """DataFrame from uploaded CSV or JSONL bytes."""
+    if filename.lower().endswith((".jsonl", ".ndjson")):
+        return pd.read_json(io.BytesIO(data), lines=True)
+    return pd.read_csv(io.BytesIO(data))
+
+
+def guess_text_column(df):
+    for col in TEXT_COLUMNS:
+        if col in df.columns:
+            return col
+    for col in df.columns:
+        if df[col].dtype == object:
+            return col
+    return df.columns[0]
+
+
+def job_id(data, text_column, model):
+    """Checkpoint key: same file + column + model resumes the same job."""
+    h = hashlib.sha256(data)
+    h.update(f"|{text_column}|{model}".encode("utf-8"))
+    return h.hexdigest()[:16]
+
+
+def _names(value):
+    if isinstance(value, str):
+        return [value] if value else []
+    return [str(v) for v in value or []]
+
+
+def _score(value):
+    try:
+        return max(-1.0, min(1.0, float(value)))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def pack_batches(items, max_tokens=2000, max_items=40):
+    """
+    Greedily pack (id, text) items into prompts of at most `max_tokens`
+    estimated input tokens and `max_items` items. An item over the budget
+    on its own still gets a batch of one.
+    """
+    batches, current, used = [], [], 0
+    for item_id, text in items:
+        cost = estimate_tokens(text) + 8  # "[id] " prefix + newline
+        if current and (used + cost > max_tokens or len(current) >= max_items):
+            batches.append(current)
+            current, used = [], 0
+        current.append((item_id, text))
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+
+def analyze_batch(llm, batch):
+    """
+    Score one packed batch of (id, text) items in a single request.
+    Returns (rows, input_tokens, output_tokens); items missing from the
+    model's answer are left out of rows.
+    """
+    ids = {item_id for item_id, _ in batch}
+    text = "\n".join(f"[{item_id}] {t}" for item_id, t in batch)
+    msg = (PROMPT | llm).invoke({"items": text})
+    usage = getattr(msg, "usage_metadata", None) or {}
+    parsed = JsonOutputParser().parse(msg.content)
+    rows = []
+    for obj in (parsed if isinstance(parsed, list) else []):
+        if not isinstance(obj, dict):
+            continue
+        item_id = str(obj.get("id", "")).strip("[]")
+        if item_id not in ids:
+            continue
+        ids.discard(item_id)
+        rows.append({
+            "id": item_id,
+            "sentiment": str(obj.get("sentiment", "")).lower(),
+            "score": _score(obj.get("score")),
+            "persons": _names(obj.get("persons")),
+            "organizations": _names(obj.get("organizations")),
+            "locations": _names(obj.get("locations")),
+        })
+    return rows, usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+
+
+class BatchStats:
+    """Counters for one run (resumed items are counted separately)."""
+    def __init__(self, total, resumed):
+        self.total = total
+        self.resumed = resumed
+        self.done = 0
+        self.requests = 0
+        self.failed = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.start = time.perf_counter()
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+    @property
+    def items_per_sec(self):
+        return self.done / self.elapsed if self.elapsed > 0 else 0.0
+
+    def cost(self, price_in=PRICE_INPUT_PER_M, price_out=PRICE_OUTPUT_PER_M):
+        return (self.input_tokens * price_in + self.output_tokens * price_out) / 1e6
+
+
+class BatchJob:
+    """
+    One corpus run. `items` is a list of (id, text); results already in the
+    checkpoint file are skipped, so calling run() again after an interruption
+    only sends the remaining items.
+    """
+    def __init__(self, items, llm, key, max_tokens=2000, max_items=40, concurrency=4,
+                 requests_per_min=60, folder=CHECKPOINT_DIR):
+        self.items = [(str(i), str(t)[:MAX_ITEM_CHARS]) for i, t in items]
+        self.llm = llm
+        self.max_tokens = max_tokens
+        self.max_items = max_items
+        self.concurrency = concurrency
+        self.requests_per_min = requests_per_min
+        self.path = os.path.join(folder, f"{key}.jsonl")
+        os.makedirs(folder, exist_ok=True)
+        self._write_lock = threading.Lock()
+
+    def completed(self):
+        """{id: result row} from the checkpoint."""
+        done = {}
+        if os.path.exists(self.path):
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        row = json.loads(line)
+                    except ValueError:
+                        continue  # torn last line from a killed run
+                    done[row["id"]] = row
+        return done
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def _checkpoint(self, rows):
+        with self._write_lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(r, ensure_ascii=False) + "\n" for r in rows))
+
+    def _run_batch(self, batch, bucket, cancel):
+        if cancel.is_set():
+            return None
+        bucket.acquire()
+        if cancel.is_set():
+            return None
+        rows, tokens_in, tokens_out = analyze_batch(self.llm, batch)
+        self._checkpoint(rows)
+        # Items the model dropped stay out of the checkpoint and are retried on resume
+        return rows, tokens_in, tokens_out
+
+    def run(self, cancel=None):
+        """
+        Process the remaining items; yields the BatchStats after every
+        finished request. Closing the generator (a Streamlit rerun) stops
+        queued batches; requests already in flight still land in the checkpoint.
+        """
+        cancel = cancel or threading.Event()
+        done = self.completed()
+        todo = [item for item in self.items if item[0] not in done]
+        stats = BatchStats(len(self.items), len(self.items) - len(todo))
+        batches = pack_batches(todo, self.max_tokens, self.max_items)
+        bucket = TokenBucket(self.requests_per_min / 60.0, capacity=self.concurrency)
+        pool = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="batch")
+        try:
+            futures = [pool.submit(self._run_batch, b, bucket, cancel) for b in batches]
+            for f in as_completed(futures):
+                try:
+                    result = f.result()
+                except Exception:
+                    stats.requests += 1
+                    stats.failed += 1
+                    yield stats
+                    continue
+                if result is None:
+                    continue
+                rows, tokens_in, tokens_out = result
+                stats.requests += 1
+                stats.done += len(rows)
+                stats.input_tokens += tokens_in
+                stats.output_tokens += tokens_out
+                yield stats
+        finally:
+            cancel.set()
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def results(self, df):
+        """`df` with the result columns joined on row position (the item id)."""
+        done = self.completed()
+        out = df.copy()
+        ids = [str(i) for i in range(len(df))]
+        for field in RESULT_FIELDS:
+            values = [done.get(i, {}).get(field) for i in ids]
+            if field in ("persons", "organizations", "locations"):
+                values = ["、".join(v) if v else "" for v in values]
+            out[field] = values
+        return out
@@ -0,0 +1,82 @@
+import re
+
+from langchain_classic.memory import ConversationSummaryBufferMemory
+from langchain_core.tools import StructuredTool
+
+
+def build_summary_memory(llm, max_token_limit=2000, memory_key="history", **kwargs):
+    """
+    Token-budgeted conversation memory: the most recent turns are kept
+    verbatim up to `max_token_limit`, older turns are folded into a running
+    summary (one incremental summarization per pruned batch), so the
+    per-turn prompt size stays bounded however long the session runs.
+    """
+    return ConversationSummaryBufferMemory(
+        llm=llm,
+        max_token_limit=max_token_limit,
+        memory_key=memory_key,
+        return_messages=True,
+        **kwargs
+    )
+
+
+class AttachmentStore:
+    """
+    Session-scoped store for large attachments. The text is stored once and
+    the conversation only carries a short reference + excerpt; the agent
+    pulls relevant chunks on demand via the `read_attachment` tool.
+    """
+    def __init__(self, chunk_size=2000, excerpt_chars=800):
+        self.chunk_size = chunk_size
+        self.excerpt_chars = excerpt_chars
+        self._items = {}
+
+    def add(self, name, text):
+        """Store an attachment and return its ref (re-attaching the same file reuses it)."""
+        for ref, item in self._items.items():
+            if item["name"] == name and item["text"] == text:
+                return ref
+        ref = f"att-{len(self._items) + 1}"
+        chunks = [text[i:i + self.chunk_size] for i in range(0, len(text), self.chunk_size)] or [""]
+        self._items[ref] = {"name": name, "text": text, "chunks": chunks}
+        return ref
+
+    def reference(self, ref):
+        """Compact text placed into the user turn instead of the full file."""
+        item = self._items[ref]
+        excerpt = item["text"][:self.excerpt_chars]
+        more = "" if len(item["text"]) <= self.excerpt_chars else " ..."
+        return (
+            f"[Attached File: {item['name']} | ref: {ref} | {len(item['text'])} chars, "
+            f"{len(item['chunks'])} chunks]\n"
+            f"Excerpt:\n{excerpt}{more}\n"
+            f"(Use the read_attachment tool with ref='{ref}' to read more.)"
+        )
+
+    def read(self, ref, query="", max_chunks=3):
+        """Return the chunks most relevant to `query` (or the first chunks if no query)."""
+        item = self._items.get(ref)
+        if item is None:
+            return f"Unknown attachment ref '{ref}'. Known refs: {', '.join(self._items) or 'none'}"
+        chunks = item["chunks"]
+        if query:
+            terms = set(re.findall(r"\w+", query.lower()))
+            scored = [
+                (sum(chunk.lower().count(t) for t in terms), i)
+                for i, chunk in enumerate(chunks)
+            ]
+            picked = sorted(i for _, i in sorted(scored, reverse=True)[:max_chunks])
+        else:
+            picked = list(range(min(max_chunks, len(chunks))))
+        return "\n\n".join(f"--- {item['name']} chunk {i + 1}/{len(chunks)} ---\n{chunks[i]}" for i in picked)
+
+    def clear(self):
+        self._items.clear()
+
+    def as_tool(self):
+        return StructuredTool.from_function(
+            func=self.read,
+            name="read_attachment",
+            description="Read an attached file by its ref (e.g. 'att-1'). "
+                        "Pass a query to get the most relevant chunks of the file."
+        )
@@ -2,6 +2,8 @@ import akshare as ak
 import pandas as pd
 import os
 import streamlit as st
+from market_data import get_market_store
+from spot_table import SpotSnapshot
 
 class DataLoader:
     def __init__(self, data_dir="data"):
@@ -13,12 +15,10 @@ class DataLoader:
     def get_stock_name(_self, symbol):
         """Fetch stock name for a given symbol."""
         try:
-            df = ak.stock_zh_a_spot_em()
-            # Find the row with matching symbol
-            match = df[df['代码'] == symbol]
-            if not match.empty:
-                return match['名称'].values[0]
-            return "未知"
+            snap = get_market_store().spot(wait=15)
+            if snap.empty:
+                snap = SpotSnapshot.from_spot_em(ak.stock_zh_a_spot_em())
+            return snap.value(symbol, '名称', "未知")
         except Exception:
             return "未知"
 
@@ -33,25 +33,9 @@ class DataLoader:
             return df
 
         try:
-            # Fetch from AKShare
-            df = ak.stock_zh_a_hist(
-                symbol=symbol, 
-                period="daily", 
-                start_date=start_date.replace("-", ""), 
-                end_date=end_date.replace("-", ""), 
-                adjust="qfq"
-            )
-            
+            df = self.fetch_daily(symbol, start_date, end_date)
             if df.empty:
-                return pd.DataFrame()
-
-            # Format for Backtrader
-            # Columns: 日期, 开盘, 收盘, 最高, 最低, 成交量, 成交额, 振幅, 涨跌幅, 涨跌额, 换手率
-            df = df[['日期', '开盘', '最高', '最低', '收盘', '成交量']]
-            df.columns = ['datetime', 'open', 'high', 'low', 'close', 'volume']
-            df['datetime'] = pd.to_datetime(df['datetime'])
-            df.set_index('datetime', inplace=True)
-            df.sort_index(inplace=True)
+                return df
 
             # Save to cache
             if use_cache:
@@ -63,24 +47,84 @@ class DataLoader:
             st.error(f"Error fetching data for {symbol}: {e}")
             return pd.DataFrame()
 
+    @staticmethod
+    def fetch_daily(symbol, start_date, end_date):
+        """
+        Download qfq daily bars from AKShare formatted for Backtrader.
+        Raises on upstream errors (safe to call from background threads).
+        """
+        df = ak.stock_zh_a_hist(
+            symbol=symbol, 
+            period="daily", 
+            start_date=start_date.replace("-", ""), 
+            end_date=end_date.replace("-", ""), 
+            adjust="qfq"
+        )
+        
+        if df.empty:
+            return pd.DataFrame()
+
+        # Format for Backtrader
+        # Columns: 日期, 开盘, 收盘, 最高, 最低, 成交量, 成交额, 振幅, 涨跌幅, 涨跌额, 换手率
+        df = df[['日期', '开盘', '最高', '最低', '收盘', '成交量']]
+        df.columns = ['datetime', 'open', 'high', 'low', 'close', 'volume']
+        df['datetime'] = pd.to_datetime(df['datetime'])
+        df.set_index('datetime', inplace=True)
+        df.sort_index(inplace=True)
+        return df
+
     def get_realtime_quotes(self, symbol):
         """Fetch real-time spot price and change for A-share."""
         try:
-            df = ak.stock_zh_a_spot_em()
-            match = df[df['代码'] == symbol]
-            if not match.empty:
+            snap = get_market_store().spot(wait=15)
+            if snap.empty:
+                snap = SpotSnapshot.from_spot_em(ak.stock_zh_a_spot_em())
+            row = snap.row(symbol)
+            if row is not None:
                 return {
-                    'price': float(match['最新价'].values[0]),
-                    'change_pct': float(match['涨跌幅'].values[0]),
-                    'high': float(match['最高'].values[0]),
-                    'low': float(match['最低'].values[0]),
-                    'volume': float(match['成交量'].values[0]),
-                    'name': match['名称'].values[0]
+                    'price': float(row['最新价']),
+                    'change_pct': float(row['涨跌幅']),
+                    'high': float(row['最高']),
+                    'low': float(row['最低']),
+                    'volume': float(row['成交量']),
+                    'name': row['名称']
                 }
             return None
         except Exception:
             return None
 
+    def get_quote(self, symbol):
+        """
+        Real-time quote for a single symbol. Served from the shared market
+        snapshot while it is fresh, otherwise from the per-symbol order-book
+        endpoint (a few KB). Same shape as get_realtime_quotes.
+        """
+        store = get_market_store()
+        row = store.quote(symbol)
+        age = store.spot_age()
+        if row is not None and age is not None and age < 2 * store.spot_interval:
+            return {
+                'price': float(row['最新价']),
+                'change_pct': float(row['涨跌幅']),
+                'high': float(row['最高']),
+                'low': float(row['最低']),
+                'volume': float(row['成交量']),
+                'name': row['名称']
+            }
+        try:
+            df = ak.stock_bid_ask_em(symbol=symbol)
+            q = dict(zip(df['item'], df['value']))
+            return {
+                'price': float(q['最新']),
+                'change_pct': float(q['涨幅']),
+                'high': float(q['最高']),
+                'low': float(q['最低']),
+                'volume': float(q['总手']),
+                'name': self.get_stock_name(symbol)
+            }
+        except Exception:
+            return self.get_realtime_quotes(symbol)
+
     def get_intraday_data(self, symbol, period="1"):
         """Fetch intraday minute-level data from AKShare."""
         try:
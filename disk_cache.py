@@ -0,0 +1,165 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from langchain_core.caches import BaseCache
+from langchain_core.load import dumps, loads
+
+
+def normalize_query(query):
+    """Case/whitespace-insensitive form of a search query."""
+    return " ".join(str(query).lower().split())
+
+
+class DiskCache:
+    """
+    Shared on-disk key/value cache (SQLite) with per-entry TTL and
+    size-bounded LRU eviction. Survives restarts and is shared by every
+    session of the server process.
+    """
+    def __init__(self, path="data/cache.sqlite", max_bytes=256 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            " key TEXT PRIMARY KEY, namespace TEXT, value TEXT, expires REAL, accessed REAL, size INTEGER)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_accessed ON cache(accessed)")
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(provider, query, params=None):
+        raw = json.dumps([provider, normalize_query(query), params or {}], sort_keys=True, default=str)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """Return the cached value or None if missing/expired."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, expires FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if row[1] is not None and row[1] < now:
+                self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE cache SET accessed = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+        return json.loads(row[0])
+
+    def set(self, key, value, ttl=None, namespace=""):
+        data = json.dumps(value, ensure_ascii=False, default=str)
+        now = time.time()
+        expires = now + ttl if ttl else None
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, namespace, value, expires, accessed, size) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, namespace, data, expires, now, len(data))
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        """Drop expired entries, then least-recently-used ones until under max_bytes."""
+        self._conn.execute("DELETE FROM cache WHERE expires IS NOT NULL AND expires < ?", (time.time(),))
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._conn.execute("SELECT key, size FROM cache ORDER BY accessed ASC").fetchall():
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def clear(self, namespace=None):
+        """Drop every entry, or only those of one namespace (provider)."""
+        with self._lock:
+            if namespace is None:
+                self._conn.execute("DELETE FROM cache")
+            else:
+                self._conn.execute("DELETE FROM cache WHERE namespace = ?", (namespace,))
+            self._conn.commit()
+
+    def cached_call(self, provider, query, params, fn, ttl):
+        """Return fn() through the cache under (provider, normalized query, params)."""
+        key = self.make_key(provider, query, params)
+        value = self.get(key)
+        if value is None:
+            value = fn()
+            self.set(key, value, ttl, namespace=provider)
+        return value
+
+
+class CachedSearch:
+    """
+    Drop-in wrapper for SerpAPIWrapper / GoogleSerperAPIWrapper that serves
+    repeated queries from the shared disk cache.
+    """
+    def __init__(self, search, provider, ttl=1800, params=None, cache=None):
+        self.search = search
+        self.provider = provider
+        self.ttl = ttl
+        self.params = params or {}
+        self.cache = cache or get_disk_cache()
+
+    def run(self, query):
+        return self.cache.cached_call(self.provider, query, {**self.params, "method": "run"},
+                                      lambda: self.search.run(query), self.ttl)
+
+    def results(self, query):
+        return self.cache.cached_call(self.provider, query, {**self.params, "method": "results"},
+                                      lambda: self.search.results(query), self.ttl)
+
+    async def arun(self, query):
+        key = self.cache.make_key(self.provider, query, {**self.params, "method": "run"})
+        value = self.cache.get(key)
+        if value is None:
+            value = await self.search.arun(query)
+            self.cache.set(key, value, self.ttl, namespace=self.provider)
+        return value
+
+
+class DiskLLMCache(BaseCache):
+    """
+    LangChain LLM cache backed by DiskCache. Only attach it to deterministic
+    (temperature 0) models: the key is the prompt + model settings.
+    """
+    def __init__(self, ttl=7 * 24 * 3600, cache=None):
+        self.ttl = ttl
+        self.cache = cache or get_disk_cache()
+
+    def _key(self, prompt, llm_string):
+        raw = json.dumps(["llm", prompt, llm_string])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def lookup(self, prompt, llm_string):
+        value = self.cache.get(self._key(prompt, llm_string))
+        if value is None:
+            return None
+        return [loads(g) for g in value]
+
+    def update(self, prompt, llm_string, return_val):
+        self.cache.set(self._key(prompt, llm_string), [dumps(g) for g in return_val], self.ttl, namespace="llm")
+
+    def clear(self, **kwargs):
+        self.cache.clear(namespace="llm")
+
+
+_disk_cache = None
+_disk_cache_lock = threading.Lock()
+
+
+def get_disk_cache():
+    """Return the process-wide DiskCache (created on first use)."""
+    global _disk_cache
+    with _disk_cache_lock:
+        if _disk_cache is None:
+            _disk_cache = DiskCache()
+        return _disk_cache
@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+
+# Roughly the pixel width of a wide Streamlit chart
+DEFAULT_MAX_POINTS = 2000
+
+
+def x_values(index):
+    """Numeric x for an index (datetime -> int64 ns)."""
+    if isinstance(index, pd.DatetimeIndex):
+        return index.asi8.astype(float)
+    try:
+        return pd.to_datetime(index).asi8.astype(float)
+    except (TypeError, ValueError):
+        return np.arange(len(index), dtype=float)
+
+
+def lttb_indices(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets: indices of `n_out` points that preserve
+    the visual shape (peaks/troughs) of the line. First/last points are kept.
+    """
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    idx = np.empty(n_out, dtype=int)
+    idx[0], idx[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean()
+        avg_y = np.nanmean(y[end:next_end]) if not np.isnan(y[end:next_end]).all() else np.nan
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        area = np.where(np.isnan(area), -1.0, area)
+        a = start + int(np.argmax(area))
+        idx[i + 1] = a
+    return idx
+
+
+def lttb_series(series, n_out=DEFAULT_MAX_POINTS):
+    """Downsample a pd.Series (e.g. an equity curve) with LTTB."""
+    if len(series) <= n_out:
+        return series
+    idx = lttb_indices(x_values(series.index), series.values, n_out)
+    return series.iloc[idx]
+
+
+def bucket_starts(n, n_buckets):
+    """Start positions of `n_buckets` near-equal contiguous buckets over n rows."""
+    return np.unique(np.linspace(0, n, n_buckets + 1).astype(int)[:-1])
+
+
+def ohlc_downsample(df, n_out=DEFAULT_MAX_POINTS):
+    """
+    Aggregate an OHLCV frame into at most `n_out` bars: first open, max high,
+    min low, last close, summed volume. Extremes survive, so wicks and
+    spikes stay visible. Returns (frame, bucket_starts).
+    """
+    n = len(df)
+    if n <= n_out:
+        return df, np.arange(n)
+    starts = bucket_starts(n, n_out)
+    ends = np.append(starts[1:], n) - 1
+    out = pd.DataFrame({
+        'open': df['open'].values[starts],
+        'high': np.maximum.reduceat(df['high'].values, starts),
+        'low': np.minimum.reduceat(df['low'].values, starts),
+        'close': df['close'].values[ends],
+    }, index=df.index[starts])
+    if 'volume' in df.columns:
+        out['volume'] = np.add.reduceat(df['volume'].values, starts)
+    return out, starts
+
+
+def bucket_last(values, starts):
+    """Value at the end of each bucket (for overlays aligned to ohlc_downsample)."""
+    values = np.asarray(values)
+    ends = np.append(starts[1:], len(values)) - 1
+    return values[ends]
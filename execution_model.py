@@ -0,0 +1,234 @@
+import math
+
+import backtrader as bt
+import numpy as np
+
+from indicators import njit
+
+
+class AShareRules:
+    """
+    A-share trading rules and costs: T+1, 100-share board lots, commission
+    with a minimum ticket, stamp duty on sells, transfer fee, price-limit
+    fill blocking and percentage slippage. The same object configures the
+    Backtrader broker (AShareBroker/AShareCommission/AShareSizer) and the
+    vectorized simulator (simulate_long_only).
+    """
+    def __init__(self, commission=0.00025, min_commission=5.0, stamp_duty=0.0005,
+                 transfer_fee=0.00001, lot_size=100, limit_pct=0.10, slippage=0.001,
+                 t_plus_one=True):
+        self.commission = commission
+        self.min_commission = min_commission
+        self.stamp_duty = stamp_duty
+        self.transfer_fee = transfer_fee
+        self.lot_size = lot_size
+        self.limit_pct = limit_pct
+        self.slippage = slippage
+        self.t_plus_one = t_plus_one
+
+    @classmethod
+    def for_symbol(cls, symbol, name=None, **kwargs):
+        """
+        Rules with the board's price limit (ChiNext/STAR 20%, BSE 30%, main
+        board 10%, main-board ST/*ST 5%). ST status comes from the current
+        `name`, so a stock that was ST earlier in the backtest window is
+        still modelled with its board's normal limit.
+        """
+        if symbol.startswith(("300", "301", "688", "689")):
+            kwargs.setdefault("limit_pct", 0.20)
+        elif symbol.startswith(("4", "8", "92")):
+            kwargs.setdefault("limit_pct", 0.30)
+        elif name and "ST" in name.upper():
+            kwargs.setdefault("limit_pct", 0.05)
+        return cls(**kwargs)
+
+    def fees(self, value, is_sell):
+        """Total cost of a fill of `value` yuan."""
+        value = abs(value)
+        if value == 0:
+            return 0.0
+        fee = max(value * self.commission, self.min_commission) + value * self.transfer_fee
+        if is_sell:
+            fee += value * self.stamp_duty
+        return fee
+
+    def round_lot(self, size):
+        return int(size // self.lot_size) * self.lot_size
+
+    def limit_prices(self, prev_close):
+        """(limit-up, limit-down) prices, rounded to the tick like the exchange."""
+        return (round(prev_close * (1 + self.limit_pct), 2),
+                round(prev_close * (1 - self.limit_pct), 2))
+
+    def blocks_fill(self, is_buy, price, prev_close):
+        """A buy at limit-up or a sell at limit-down does not get filled."""
+        if not prev_close or math.isnan(prev_close):
+            return False
+        up, down = self.limit_prices(prev_close)
+        return price >= up - 1e-6 if is_buy else price <= down + 1e-6
+
+
+class AShareCommission(bt.CommInfoBase):
+    """Backtrader commission scheme delegating to AShareRules.fees."""
+    params = (
+        ('stocklike', True),
+        ('commtype', bt.CommInfoBase.COMM_PERC),
+        ('percabs', True),
+        ('rules', None),
+    )
+
+    def _getcommission(self, size, price, pseudoexec):
+        return self.p.rules.fees(size * price, is_sell=size < 0)
+
+
+class AShareSizer(bt.Sizer):
+    """Percent-of-cash sizing rounded down to whole board lots, net of buy costs."""
+    params = (
+        ('percents', 95),
+        ('rules', None),
+    )
+
+    def _getsizing(self, comminfo, cash, data, isbuy):
+        position = self.broker.getposition(data)
+        if not isbuy:
+            return position.size
+        rules = self.p.rules
+        price = data.close[0] * (1 + rules.slippage)
+        budget = cash * self.p.percents / 100
+        size = rules.round_lot(budget / price)
+        while size > 0 and size * price + rules.fees(size * price, False) > budget:
+            size -= rules.lot_size
+        return size
+
+
+class AShareBroker(bt.brokers.BackBroker):
+    """
+    BackBroker that leaves orders pending (retried next bar) while the fill
+    would hit a price limit, and defers sells of shares bought the same day
+    (T+1).
+    """
+    params = (('rules', None),)
+
+    def __init__(self):
+        super().__init__()
+        self._last_buy = {}
+
+    def _try_exec(self, order):
+        rules = self.p.rules
+        data = order.data
+        today = data.datetime.date(0)
+        if not order.isbuy() and rules.t_plus_one and self._last_buy.get(data) == today:
+            return
+        prev_close = data.close[-1] if len(data) > 1 else float('nan')
+        if rules.blocks_fill(order.isbuy(), data.open[0], prev_close):
+            return
+        super()._try_exec(order)
+        if order.isbuy() and order.status == order.Completed:
+            self._last_buy[data] = today
+
+
+def configure_ashare(cerebro, rules, cash, pos_size):
+    """Install the A-share broker, costs, slippage and lot sizer on a Cerebro."""
+    broker = AShareBroker(rules=rules)
+    broker.setcash(cash)
+    broker.addcommissioninfo(AShareCommission(rules=rules))
+    broker.set_slippage_perc(rules.slippage, slip_open=True, slip_match=True)
+    cerebro.broker = broker
+    if pos_size > 0:
+        cerebro.addsizer(AShareSizer, percents=pos_size * 100, rules=rules)
+
+
+@njit(cache=True)
+def _simulate(open_, prev_close, entries, exits, cash, pos_size, commission, min_commission,
+              stamp_duty, transfer_fee, lot_size, limit_pct, slippage, close):
+    n = len(open_)
+    equity = np.empty(n)
+    shares = 0.0
+    want_buy = False
+    want_sell = False
+    for i in range(n):
+        has_prev = not np.isnan(prev_close[i])
+        up = round(prev_close[i] * (1 + limit_pct), 2) if has_prev else np.inf
+        down = round(prev_close[i] * (1 - limit_pct), 2) if has_prev else -np.inf
+        # Orders from the previous close fill at today's open (always T+1 for daily bars)
+        if want_buy and shares == 0 and open_[i] < up - 1e-6:
+            price = open_[i] * (1 + slippage)
+            size = np.floor(cash * pos_size / price / lot_size) * lot_size
+            value = 0.0
+            fee = 0.0
+            while size > 0:
+                value = size * price
+                fee = max(value * commission, min_commission) + value * transfer_fee
+                if value + fee <= cash * pos_size:
+                    break
+                size -= lot_size
+            if size > 0:
+                cash -= value + fee
+                shares = size
+            want_buy = False
+        elif want_sell and shares > 0 and open_[i] > down + 1e-6:
+            price = open_[i] * (1 - slippage)
+            value = shares * price
+            fee = max(value * commission, min_commission) + value * (transfer_fee + stamp_duty)
+            cash += value - fee
+            shares = 0.0
+            want_sell = False
+        equity[i] = cash + shares * close[i]
+        if exits[i]:
+            # An exit also cancels a buy that has not filled yet
+            want_buy = False
+            if shares > 0:
+                want_sell = True
+        elif entries[i] and shares == 0:
+            want_buy = True
+    return equity
+
+
+def simulate_long_only(df, entries, exits, rules, cash=100000.0, pos_size=0.95):
+    """
+    Vectorized-path counterpart of the Backtrader model: boolean entry/exit
+    signals at each bar's close fill at the next open under the same rules.
+    Returns the equity curve as a NumPy array aligned with df.
+    """
+    open_ = np.ascontiguousarray(df['open'].values, dtype=np.float64)
+    close = np.ascontiguousarray(df['close'].values, dtype=np.float64)
+    prev_close = np.concatenate([[np.nan], close[:-1]])
+    return _simulate(
+        open_, prev_close,
+        np.asarray(entries, dtype=np.bool_), np.asarray(exits, dtype=np.bool_),
+        float(cash), float(pos_size), rules.commission, rules.min_commission,
+        rules.stamp_duty, rules.transfer_fee, float(rules.lot_size), rules.limit_pct,
+        rules.slippage, close
+    )
+
+
+if __name__ == "__main__":
+    # Per-bar overhead of the A-share model vs. the flat-commission broker
+    import time
+    import pandas as pd
+    from backtest_engine import BacktestEngine
+    from strategies.ma_strategy import AdvancedMaStrategy
+
+    n = 20000
+    rng = np.random.default_rng(0)
+    close = 10 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    df = pd.DataFrame({
+        'open': close * (1 + rng.normal(0, 0.003, n)), 'high': close * 1.01,
+        'low': close * 0.99, 'close': close, 'volume': 1e6
+    }, index=pd.bdate_range("1990-01-01", periods=n))
+
+    for label, rules in [("flat commission", None), ("A-share model", AShareRules())]:
+        engine = BacktestEngine(rules=rules)
+        t0 = time.perf_counter()
+        res = engine.run(AdvancedMaStrategy, df)
+        dt = time.perf_counter() - t0
+        print(f"{label:<16} {dt / n * 1e6:7.2f} us/bar  final value {res['final_value']:,.0f}")
+
+    sma_fast, sma_slow = df['close'].rolling(5).mean(), df['close'].rolling(20).mean()
+    entries = ((sma_fast > sma_slow) & (sma_fast.shift() <= sma_slow.shift())).values
+    exits = ((sma_fast < sma_slow) & (sma_fast.shift() >= sma_slow.shift())).values
+    simulate_long_only(df, entries, exits, AShareRules())  # warm-up (JIT)
+    t0 = time.perf_counter()
+    equity = simulate_long_only(df, entries, exits, AShareRules())
+    dt = time.perf_counter() - t0
+    print(f"{'vectorized':<16} {dt / n * 1e6:7.2f} us/bar  final value {equity[-1]:,.0f}")
@@ -0,0 +1,85 @@
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+try:
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+    try:
+        from streamlit.runtime.scriptrunner_utils.script_run_context import SCRIPT_RUN_CONTEXT_ATTR_NAME
+    except ImportError:
+        from streamlit.runtime.scriptrunner.script_run_context import SCRIPT_RUN_CONTEXT_ATTR_NAME
+except ImportError:  # also used outside Streamlit (feature store CLI)
+    get_script_run_ctx = None
+
+# Shared by every session: a hung upstream call holds one worker, not a page
+MAX_FETCH_WORKERS = 16
+
+_executors = {}
+_executor_lock = threading.Lock()
+
+
+def get_executor(name="fetch", max_workers=MAX_FETCH_WORKERS):
+    """
+    Return the process-wide I/O thread pool `name` (created on first use).
+    A timed-out call keeps its worker until the upstream returns, so callers
+    with different failure modes use separate pools: hung calls of one only
+    exhaust its own workers.
+    """
+    with _executor_lock:
+        executor = _executors.get(name)
+        if executor is None:
+            executor = _executors[name] = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        return executor
+
+
+def get_fetch_executor():
+    """The default pool for short data fetches."""
+    return get_executor("fetch", MAX_FETCH_WORKERS)
+
+
+def _call_in_ctx(fn, ctx):
+    """Run fn() with the submitting script's context, so st.cache_data works in the worker."""
+    if ctx is None:
+        return fn()
+    thread = threading.current_thread()
+    setattr(thread, SCRIPT_RUN_CONTEXT_ATTR_NAME, ctx)
+    try:
+        return fn()
+    finally:
+        setattr(thread, SCRIPT_RUN_CONTEXT_ATTR_NAME, None)
+
+
+def fan_out(tasks, timeouts=None, default_timeout=15, executor=None):
+    """
+    Run `tasks` ({name: callable}) concurrently and yield
+    (name, status, value) in completion order. status is 'ok', 'timeout'
+    (value None, the call is abandoned) or 'error' (value is the exception).
+    Each source has its own deadline from `timeouts`, so the whole fan-out
+    takes about as long as the slowest source, capped by its timeout.
+    Tasks run on `executor` (default: the shared fetch pool) with the
+    caller's Streamlit script context attached.
+    """
+    timeouts = timeouts or {}
+    executor = executor or get_fetch_executor()
+    ctx = get_script_run_ctx(suppress_warning=True) if get_script_run_ctx else None
+    start = time.monotonic()
+    futures = {executor.submit(_call_in_ctx, fn, ctx): name for name, fn in tasks.items()}
+    deadlines = {f: start + timeouts.get(name, default_timeout) for f, name in futures.items()}
+    pending = set(futures)
+
+    while pending:
+        now = time.monotonic()
+        for f in [f for f in pending if deadlines[f] <= now and not f.done()]:
+            pending.discard(f)
+            f.cancel()
+            yield futures[f], 'timeout', None
+        if not pending:
+            break
+        done, _ = wait(pending, timeout=max(0, min(deadlines[f] for f in pending) - now), return_when=FIRST_COMPLETED)
+        for f in done:
+            pending.discard(f)
+            try:
+                status, value = 'ok', f.result()
+            except Exception as e:
+                status, value = 'error', e
+            yield futures[f], status, value
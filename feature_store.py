@@ -0,0 +1,163 @@
+import glob
+import os
+import sys
+import threading
+from datetime import datetime, time, timedelta
+
+import numpy as np
+import pandas as pd
+
+import indicators as ind
+from data_loader import DataLoader
+from fanout import fan_out
+
+FEATURE_DIR = "data/features"
+# History downloaded for a symbol's first build
+INITIAL_YEARS = 5
+SMA_PERIODS = (5, 10, 20, 60)
+EMA_PERIODS = (12, 26)
+OHLCV = ['open', 'high', 'low', 'close', 'volume']
+# Daily bars dated today are partial until the close
+MARKET_CLOSE = time(15, 0)
+
+
+def completed_bars(df, now=None):
+    """`df` without today's bar while the session is still running."""
+    now = now or datetime.now()
+    if df.empty or now.time() >= MARKET_CLOSE or df.index[-1].date() != now.date():
+        return df
+    return df.iloc[:-1]
+
+
+def compute_features(df):
+    """
+    Standard daily feature matrix from an OHLCV frame, computed with the
+    Backtrader-compatible kernels in `indicators`. Parameters follow the
+    strategies' defaults (RSI 14, MACD 12/26/9, Bollinger 20/2, KDJ 9/3/3,
+    Donchian 20/10 on prior bars, ATR 14).
+    """
+    close, high, low = df['close'].values, df['high'].values, df['low'].values
+    volume = df['volume'].values
+    f = {}
+
+    for p in SMA_PERIODS:
+        f[f'sma_{p}'] = ind.sma(close, p)
+    for p in EMA_PERIODS:
+        f[f'ema_{p}'] = ind.ema(close, p)
+    f['rsi_14'] = ind.rsi(close, 14)
+    f['macd'], f['macd_signal'], f['macd_hist'] = ind.macd(close)
+    f['boll_mid'], f['boll_up'], f['boll_low'] = ind.bollinger(close, 20, 2.0)
+    f['kdj_k'], f['kdj_d'], f['kdj_j'] = ind.kdj(high, low, close, 9, 3, 3)
+    f['donchian_high_20'] = ind.highest(ind.shift(high), 20)
+    f['donchian_low_10'] = ind.lowest(ind.shift(low), 10)
+    f['atr_14'] = ind.atr(high, low, close, 14)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        f['vol_ratio_5'] = volume / ind.sma(ind.shift(volume), 5)
+    return pd.DataFrame(f, index=df.index).astype(np.float32)
+
+
+class FeatureStore:
+    """
+    One Parquet file per symbol holding the raw daily OHLCV plus the
+    precomputed feature columns. update() only downloads bars after the last
+    stored date (refetching everything if the qfq adjustment shifted), and
+    readers load just the columns they need.
+    """
+    def __init__(self, folder=FEATURE_DIR):
+        self.folder = folder
+        os.makedirs(folder, exist_ok=True)
+
+    def path(self, symbol):
+        return os.path.join(self.folder, f"{symbol}.parquet")
+
+    def symbols(self):
+        """Tracked symbols (every symbol with a feature file)."""
+        return sorted(os.path.splitext(os.path.basename(p))[0] for p in glob.glob(os.path.join(self.folder, "*.parquet")))
+
+    def read(self, symbol, columns=None, start=None):
+        """Feature (and OHLCV) columns of a symbol, or None if not tracked."""
+        path = self.path(symbol)
+        if not os.path.exists(path):
+            return None
+        df = pd.read_parquet(path, columns=columns)
+        return df.loc[pd.Timestamp(start):] if start is not None else df
+
+    def write(self, symbol, ohlcv):
+        """Compute features for a full OHLCV history and store them."""
+        ohlcv = ohlcv[OHLCV].astype(float)
+        df = pd.concat([ohlcv, compute_features(ohlcv)], axis=1)
+        df.index.name = 'datetime'
+        tmp = self.path(symbol) + ".tmp"
+        df.to_parquet(tmp)
+        os.replace(tmp, self.path(symbol))
+        return df
+
+    def update(self, symbol, today=None):
+        """Bring one symbol up to date; returns the number of new bars."""
+        today = today or datetime.now()
+        end = today.strftime("%Y-%m-%d")
+        stored = self.read(symbol, columns=OHLCV)
+        if stored is None or stored.empty:
+            start = (today - timedelta(days=365 * INITIAL_YEARS)).strftime("%Y-%m-%d")
+            fresh = completed_bars(DataLoader.fetch_daily(symbol, start, end), today)
+            if fresh.empty:
+                return 0
+            self.write(symbol, fresh)
+            return len(fresh)
+
+        last = stored.index[-1]
+        # Re-fetch from the bar before the last one: that bar detects qfq
+        # rescaling, and the last bar is replaced since it may have been
+        # stored before it was final
+        anchor = stored.index[-2] if len(stored) > 1 else last
+        new = completed_bars(DataLoader.fetch_daily(symbol, anchor.strftime("%Y-%m-%d"), end), today)
+        if new.empty:
+            return 0
+        # qfq prices are rescaled after ex-dividend days: if the overlapping
+        # bar moved, the stored history is stale and gets rebuilt
+        if anchor in new.index and not np.isclose(new.loc[anchor, 'close'], stored.loc[anchor, 'close'], rtol=1e-4):
+            start = stored.index[0].strftime("%Y-%m-%d")
+            full = completed_bars(DataLoader.fetch_daily(symbol, start, end), today)
+            self.write(symbol, full)
+            return int((full.index > last).sum())
+        tail = new[new.index >= last][OHLCV].astype(float)
+        if tail.empty:
+            return 0
+        if len(tail) == 1 and tail.index[0] == last and np.allclose(tail.iloc[0].values, stored.loc[last, OHLCV].values.astype(float)):
+            return 0
+        self.write(symbol, pd.concat([stored[stored.index < last], tail]))
+        return int((tail.index > last).sum())
+
+    def update_all(self, symbols=None, timeout=120):
+        """
+        End-of-day batch: update every tracked symbol (plus `symbols`)
+        concurrently. Returns {symbol: new bars | 'timeout' | error string}.
+        """
+        targets = sorted(set(self.symbols()) | set(symbols or []))
+        tasks = {s: (lambda s=s: self.update(s)) for s in targets}
+        report = {}
+        for symbol, status, value in fan_out(tasks, default_timeout=timeout):
+            report[symbol] = value if status == 'ok' else (status if status == 'timeout' else str(value))
+        return report
+
+
+_feature_store = None
+_feature_store_lock = threading.Lock()
+
+
+def get_feature_store():
+    """Return the process-wide FeatureStore."""
+    global _feature_store
+    with _feature_store_lock:
+        if _feature_store is None:
+            _feature_store = FeatureStore()
+        return _feature_store
+
+
+if __name__ == "__main__":
+    # End-of-day job (e.g. cron after 15:30 CST):
+    #   python feature_store.py [extra symbols to start tracking...]
+    report = FeatureStore().update_all(sys.argv[1:])
+    for symbol, result in report.items():
+        print(f"{symbol}: {result}")
+    print(f"Updated {len(report)} symbols.")
@@ -0,0 +1,128 @@
+import hashlib
+import json
+import os
+
+from langchain_community.vectorstores import FAISS
+
+
+class KnowledgeBase:
+    """
+    Persistent FAISS knowledge base with a per-document manifest.
+
+    The manifest maps each source file to its content hash and the vector IDs
+    of its chunks, so a changed file only swaps the chunks that differ and an
+    unchanged file is skipped before it is ever embedded.
+    """
+    MANIFEST_FILE = "manifest.json"
+    # Manifest entry for vectors of an index built before the manifest existed
+    LEGACY_SOURCE = "(legacy index)"
+
+    def __init__(self, folder, embeddings):
+        self.folder = folder
+        self.embeddings = embeddings
+        self.manifest_path = os.path.join(folder, self.MANIFEST_FILE)
+        self.manifest = self._load_manifest()
+        self._db = None
+        if not os.path.exists(self.manifest_path) and self.db is not None:
+            self._adopt_legacy()
+
+    def _load_manifest(self):
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        return {}
+
+    def _save_manifest(self):
+        os.makedirs(self.folder, exist_ok=True)
+        with open(self.manifest_path, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, ensure_ascii=False, indent=2)
+
+    @property
+    def db(self):
+        """Lazily load the FAISS index from disk (None if not built yet)."""
+        if self._db is None and os.path.exists(os.path.join(self.folder, "index.faiss")):
+            self._db = FAISS.load_local(self.folder, self.embeddings, allow_dangerous_deserialization=True)
+        return self._db
+
+    def _adopt_legacy(self):
+        """
+        Record the vectors of a pre-manifest index under LEGACY_SOURCE.
+        Their upload names are unknown (chunks carry temp-file paths), so
+        they can't be matched to re-uploads, but they show up in sources()
+        and can be deleted like any other document.
+        """
+        ids = list(self.db.index_to_docstore_id.values())
+        if ids:
+            self.manifest[self.LEGACY_SOURCE] = {"hash": None, "ids": ids}
+        self._save_manifest()
+
+    def exists(self):
+        return self.db is not None and self.db.index.ntotal > 0
+
+    @staticmethod
+    def file_hash(data):
+        return hashlib.sha256(data).hexdigest()
+
+    @staticmethod
+    def _chunk_ids(source, chunks):
+        """Stable IDs derived from source + chunk content (+ occurrence for repeated chunks)."""
+        ids = []
+        seen = {}
+        for chunk in chunks:
+            digest = hashlib.sha256(f"{source}\x00{chunk.page_content}".encode("utf-8")).hexdigest()[:32]
+            n = seen.get(digest, 0)
+            seen[digest] = n + 1
+            ids.append(f"{digest}-{n}")
+        return ids
+
+    def is_current(self, source, content_hash):
+        entry = self.manifest.get(source)
+        return entry is not None and entry["hash"] == content_hash
+
+    def upsert(self, source, content_hash, chunks):
+        """
+        Insert or replace the chunks of one source document.
+        Returns a dict with the status ('skipped', 'added', 'updated') and chunk counts.
+        """
+        if self.is_current(source, content_hash):
+            return {"status": "skipped", "added": 0, "deleted": 0}
+
+        for chunk in chunks:
+            chunk.metadata["source"] = source
+
+        new_ids = self._chunk_ids(source, chunks)
+        old_ids = set(self.manifest.get(source, {}).get("ids", []))
+        new_id_set = set(new_ids)
+
+        stale_ids = [i for i in old_ids if i not in new_id_set]
+        fresh = [(i, c) for i, c in zip(new_ids, chunks) if i not in old_ids]
+
+        if stale_ids and self.db is not None:
+            self.db.delete(stale_ids)
+
+        if fresh:
+            fresh_ids = [i for i, _ in fresh]
+            fresh_docs = [c for _, c in fresh]
+            if self.db is None:
+                self._db = FAISS.from_documents(fresh_docs, self.embeddings, ids=fresh_ids)
+            else:
+                self.db.add_documents(fresh_docs, ids=fresh_ids)
+
+        status = "updated" if source in self.manifest else "added"
+        self.manifest[source] = {"hash": content_hash, "ids": new_ids}
+        return {"status": status, "added": len(fresh), "deleted": len(stale_ids)}
+
+    def delete(self, source):
+        """Remove every vector belonging to a source document."""
+        entry = self.manifest.pop(source, None)
+        if entry and entry["ids"] and self.db is not None:
+            self.db.delete(entry["ids"])
+        return entry is not None
+
+    def sources(self):
+        return {name: len(entry["ids"]) for name, entry in self.manifest.items()}
+
+    def save(self):
+        if self._db is not None:
+            self._db.save_local(self.folder)
+        self._save_manifest()
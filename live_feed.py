@@ -0,0 +1,54 @@
+import pandas as pd
+
+from downsample import DEFAULT_MAX_POINTS
+from visualizer import append_chart_bars, plot_interactive_chart
+
+
+class IntradayFeed:
+    """
+    Live intraday feed for one symbol. stock_zh_a_hist_min_em has no
+    server-side start filter, so every poll() downloads the full series;
+    what the feed saves is the chart work: bars up to the last held
+    timestamp are kept, and the Plotly figure is patched with the changed
+    tail (the still-forming last bar plus any new ones) instead of being
+    rebuilt.
+    """
+    def __init__(self, loader, symbol, period="1", max_points=DEFAULT_MAX_POINTS):
+        self.loader = loader
+        self.symbol = symbol
+        self.period = period
+        self.max_points = max_points
+        self.frame = pd.DataFrame()
+        self._fig = None
+        self._pending = None  # rows of the frame's tail not yet in the figure
+
+    def poll(self):
+        """Refresh the frame; returns the number of rows added or replaced."""
+        fresh = self.loader.get_intraday_data(self.symbol, self.period)
+        if fresh.empty:
+            return 0
+        if self.frame.empty or fresh.index[0] != self.frame.index[0]:
+            # First poll, or the window rolled to a new session: rebuild
+            self.frame = fresh
+            self._fig = None
+            return len(fresh)
+
+        last = self.frame.index[-1]
+        new = fresh[fresh.index >= last]
+        if new.empty:
+            return 0
+        self.frame = pd.concat([self.frame[self.frame.index < last], new])
+        self._pending = len(new) + (self._pending or 0)
+        return len(new)
+
+    def figure(self, title):
+        """Current chart; rebuilt only on first use or once it needs downsampling."""
+        if self.frame.empty:
+            return None
+        if self._fig is None or len(self.frame) > self.max_points:
+            self._fig = plot_interactive_chart(self.frame, symbol=title, max_points=self.max_points)
+        elif self._pending:
+            append_chart_bars(self._fig, self.frame, min(self._pending, len(self.frame)))
+        self._pending = None
+        self._fig.update_layout(title=f'{title} - 交互式可视化图表')
+        return self._fig
@@ -0,0 +1,370 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+import httpx
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_openai import ChatOpenAI
+
+DEEPSEEK_BASE_URL = "https://api.deepseek.com/v1"
+DEFAULT_MODEL = "deepseek-chat"
+
+# Requests in flight across the whole process (sync and async); further
+# calls wait for a free slot (up to POOL_WAIT seconds) instead of piling
+# onto the API
+MAX_CONCURRENT_REQUESTS = 16
+POOL_WAIT = 300.0
+# Retries on connection errors, 408/409/429 and 5xx, with exponential
+# backoff + jitter (honours Retry-After), done by the OpenAI SDK
+MAX_RETRIES = 4
+
+_http_client = None
+_models = {}
+_lock = threading.Lock()
+# One budget for sync and async clients alike: a request holds a slot from
+# send until its response (or stream) is closed
+_slots = threading.BoundedSemaphore(MAX_CONCURRENT_REQUESTS)
+
+
+class _Slot:
+    """One held request slot; released once, however often close is called."""
+    def __init__(self):
+        self._held = True
+
+    def release(self):
+        if self._held:
+            self._held = False
+            _slots.release()
+
+
+class _SlotStream(httpx.SyncByteStream):
+    """Response body wrapper that frees the request's slot once closed."""
+    def __init__(self, stream):
+        self._stream = stream
+        self._slot = _Slot()
+
+    def __iter__(self):
+        return iter(self._stream)
+
+    def close(self):
+        try:
+            self._stream.close()
+        finally:
+            self._slot.release()
+
+
+class _AsyncSlotStream(httpx.AsyncByteStream):
+    def __init__(self, stream):
+        self._stream = stream
+        self._slot = _Slot()
+
+    def __aiter__(self):
+        return self._stream.__aiter__()
+
+    async def aclose(self):
+        try:
+            await self._stream.aclose()
+        finally:
+            self._slot.release()
+
+
+class _CappedTransport(httpx.HTTPTransport):
+    def handle_request(self, request):
+        if not _slots.acquire(timeout=POOL_WAIT):
+            raise httpx.PoolTimeout("LLM request limit reached", request=request)
+        try:
+            response = super().handle_request(request)
+        except BaseException:
+            _slots.release()
+            raise
+        response.stream = _SlotStream(response.stream)
+        return response
+
+
+class _AsyncCappedTransport(httpx.AsyncHTTPTransport):
+    async def handle_async_request(self, request):
+        # Poll instead of blocking the event loop (or a thread that would
+        # keep waiting after the task is cancelled)
+        deadline = time.monotonic() + POOL_WAIT
+        while not _slots.acquire(blocking=False):
+            if time.monotonic() > deadline:
+                raise httpx.PoolTimeout("LLM request limit reached", request=request)
+            await asyncio.sleep(0.05)
+        try:
+            response = await super().handle_async_request(request)
+        except BaseException:
+            _slots.release()
+            raise
+        response.stream = _AsyncSlotStream(response.stream)
+        return response
+
+
+def _limits():
+    return httpx.Limits(max_connections=MAX_CONCURRENT_REQUESTS,
+                        max_keepalive_connections=MAX_CONCURRENT_REQUESTS)
+
+
+def _timeout():
+    return httpx.Timeout(120.0, connect=10.0, pool=POOL_WAIT)
+
+
+def get_http_client():
+    """Process-wide keep-alive HTTP pool shared by every sync ChatOpenAI call."""
+    global _http_client
+    with _lock:
+        if _http_client is None:
+            _http_client = httpx.Client(timeout=_timeout(), transport=_CappedTransport(limits=_limits()))
+        return _http_client
+
+
+class LLMMetrics:
+    """Per-model call counters, token usage and latency for the whole process."""
+    def __init__(self, window=500):
+        self._lock = threading.Lock()
+        self._window = window
+        self._stats = {}
+
+    def record(self, model, latency, input_tokens=0, output_tokens=0, error=False):
+        with self._lock:
+            s = self._stats.get(model)
+            if s is None:
+                s = self._stats[model] = {
+                    "calls": 0, "errors": 0, "input_tokens": 0, "output_tokens": 0,
+                    "latencies": deque(maxlen=self._window)
+                }
+            s["calls"] += 1
+            s["errors"] += int(error)
+            s["input_tokens"] += input_tokens
+            s["output_tokens"] += output_tokens
+            s["latencies"].append(latency)
+
+    def summary(self):
+        """One row per model, ready for st.dataframe."""
+        rows = []
+        with self._lock:
+            for model, s in self._stats.items():
+                lat = sorted(s["latencies"])
+                rows.append({
+                    "模型": model,
+                    "调用次数": s["calls"],
+                    "失败": s["errors"],
+                    "输入 tokens": s["input_tokens"],
+                    "输出 tokens": s["output_tokens"],
+                    "延迟 P50 (s)": round(lat[len(lat) // 2], 2) if lat else None,
+                    "延迟 P95 (s)": round(lat[int(len(lat) * 0.95)], 2) if lat else None,
+                })
+        return rows
+
+
+_metrics = LLMMetrics()
+
+
+def get_llm_metrics():
+    return _metrics
+
+
+class _MetricsHandler(BaseCallbackHandler):
+    """Times every chat-model call of one instance and records its token usage."""
+    def __init__(self, model):
+        self.model = model
+        self._started = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._started[run_id] = time.perf_counter()
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        start = self._started.pop(run_id, None)
+        if start is None:
+            return
+        input_tokens = output_tokens = 0
+        for gen in (response.generations[0] if response.generations else []):
+            usage = getattr(getattr(gen, "message", None), "usage_metadata", None)
+            if usage:
+                input_tokens += usage.get("input_tokens", 0)
+                output_tokens += usage.get("output_tokens", 0)
+        if not (input_tokens or output_tokens):
+            usage = (response.llm_output or {}).get("token_usage") or {}
+            input_tokens = usage.get("prompt_tokens", 0)
+            output_tokens = usage.get("completion_tokens", 0)
+        _metrics.record(self.model, time.perf_counter() - start, input_tokens, output_tokens)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        start = self._started.pop(run_id, None)
+        if start is not None:
+            _metrics.record(self.model, time.perf_counter() - start, error=True)
+
+
+def _key_part(value):
+    if isinstance(value, (str, int, float, bool, type(None))):
+        return value
+    # Objects such as an LLM cache are rebuilt on every rerun; instances of
+    # the same type are interchangeable, so key on the type
+    return type(value).__qualname__
+
+
+def _build(api_key, model, base_url, http_client, kwargs, http_async_client=None):
+    kwargs.setdefault("max_retries", MAX_RETRIES)
+    kwargs.setdefault("stream_usage", True)
+    return ChatOpenAI(
+        model=model,
+        openai_api_key=api_key,
+        openai_api_base=base_url,
+        http_client=http_client,
+        http_async_client=http_async_client,
+        callbacks=[_MetricsHandler(model)],
+        **kwargs
+    )
+
+
+def get_llm(api_key, model=DEFAULT_MODEL, base_url=DEEPSEEK_BASE_URL, **kwargs):
+    """
+    Cached ChatOpenAI for this configuration. Instances are reused across
+    reruns and sessions, and their sync calls all go through the shared
+    connection pool, so a report button no longer pays client construction
+    + TLS setup. Every instance retries with backoff and reports to
+    get_llm_metrics(). For ainvoke/astream use async_llm instead.
+    """
+    key = (api_key, model, base_url, tuple(sorted((k, _key_part(v)) for k, v in kwargs.items())))
+    llm = _models.get(key)
+    if llm is None:
+        with _lock:
+            llm = _models.get(key)
+            if llm is None:
+                llm = _models[key] = _build(api_key, model, base_url, get_http_client(), kwargs)
+    return llm
+
+
+@asynccontextmanager
+async def async_llm(api_key, model=DEFAULT_MODEL, base_url=DEEPSEEK_BASE_URL, **kwargs):
+    """
+    ChatOpenAI for async calls on the running event loop. An async client is
+    bound to the loop it first runs on and pages call ainvoke inside a fresh
+    asyncio.run() per turn, so the instance gets its own keep-alive pool for
+    the turn, closed on exit. Its requests count against the same
+    process-wide limit as the shared sync pool.
+    """
+    client = httpx.AsyncClient(timeout=_timeout(), transport=_AsyncCappedTransport(limits=_limits()))
+    try:
+        yield _build(api_key, model, base_url, get_http_client(), kwargs, http_async_client=client)
+    finally:
+        await client.aclose()
+
+
+class StreamStats:
+    """Timing of one streamed generation (seconds)."""
+    def __init__(self):
+        self.ttft = None
+        self.elapsed = None
+        self.chunks = 0
+        self.cancelled = False
+
+    def caption(self):
+        if self.ttft is None:
+            return "未收到输出"
+        state = " · 已停止" if self.cancelled else ""
+        return f"首字延迟 {self.ttft:.2f}s · 总耗时 {self.elapsed:.1f}s{state}"
+
+
+def stream_text(runnable, inputs, stats=None):
+    """
+    Yield the text chunks of `runnable.stream(inputs)` as they arrive (feed
+    it to st.write_stream). Closing the generator (e.g. a Streamlit rerun
+    from a Stop button) stops the generation and closes the upstream HTTP
+    stream as well.
+    """
+    stats = stats if stats is not None else StreamStats()
+    start = time.perf_counter()
+    stream = iter(runnable.stream(inputs))
+    try:
+        for chunk in stream:
+            text = getattr(chunk, "content", chunk)
+            if not text:
+                continue
+            if stats.ttft is None:
+                stats.ttft = time.perf_counter() - start
+            stats.chunks += 1
+            yield text
+    except GeneratorExit:
+        stats.cancelled = True
+        raise
+    finally:
+        close = getattr(stream, "close", None)
+        if close is not None:
+            close()
+        stats.elapsed = time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    # Time-to-first-token: streaming vs. blocking invoke against a local
+    # OpenAI-compatible stub that emits one token every TOKEN_DELAY seconds
+    import json
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from langchain_core.prompts import ChatPromptTemplate
+
+    TOKENS, TOKEN_DELAY = 200, 0.01
+
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            base = {"id": "stub", "object": "chat.completion.chunk", "created": 0, "model": body["model"]}
+            if not body.get("stream"):
+                time.sleep(TOKENS * TOKEN_DELAY)
+                payload = json.dumps({
+                    **base, "object": "chat.completion",
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": "tok " * TOKENS},
+                                 "finish_reason": "stop"}],
+                    "usage": {"prompt_tokens": 1, "completion_tokens": TOKENS, "total_tokens": TOKENS + 1}
+                }).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+
+            def send(data):
+                line = f"data: {data}\n\n".encode()
+                self.wfile.write(f"{len(line):x}\r\n".encode() + line + b"\r\n")
+                self.wfile.flush()
+
+            for i in range(TOKENS):
+                time.sleep(TOKEN_DELAY)
+                delta = {"role": "assistant", "content": "tok "} if i == 0 else {"content": "tok "}
+                send(json.dumps({**base, "choices": [{"index": 0, "delta": delta, "finish_reason": None}]}))
+            send(json.dumps({**base, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]}))
+            send("[DONE]")
+            self.wfile.write(b"0\r\n\r\n")
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}/v1"
+    chain = ChatPromptTemplate.from_template("{q}") | get_llm("stub-key", base_url=base_url)
+
+    t0 = time.perf_counter()
+    chain.invoke({"q": "hi"})
+    print(f"invoke: first text after {time.perf_counter() - t0:.2f}s (whole report)")
+
+    for run in range(2):
+        stats = StreamStats()
+        for _ in stream_text(chain, {"q": "hi"}, stats):
+            pass
+        print(f"stream #{run + 1}: {stats.caption()} ({stats.chunks} chunks)")
+
+    stats = StreamStats()
+    gen = stream_text(chain, {"q": "hi"}, stats)
+    for i, _ in enumerate(gen):
+        if i == 10:
+            gen.close()  # what a Stop-button rerun does to st.write_stream
+    print(f"cancelled stream: {stats.caption()} ({stats.chunks} chunks)")
+    server.shutdown()
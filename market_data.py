@@ -0,0 +1,205 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import date, datetime, timedelta
+
+import akshare as ak
+import pandas as pd
+
+from spot_table import SpotSnapshot
+
+# Refresh schedule of the background thread (seconds)
+SPOT_INTERVAL = 60
+BARS_INTERVAL = 300
+# Stop refreshing when nobody has read the store / a symbol for this long
+IDLE_TIMEOUT = 600
+WATCH_TIMEOUT = 3600
+# A snapshot older than this means the refresher is failing or stalled
+STALE_AFTER = 3 * SPOT_INTERVAL
+# Daily history kept per watched symbol (covers every page's lookback slider)
+BARS_LOOKBACK_DAYS = 400
+# Concurrent downloads for one-off scans (ensure_bars)
+BARS_FETCH_WORKERS = 8
+
+
+class MarketDataStore:
+    """
+    Process-wide in-memory market data, refreshed on a schedule by two
+    background threads: one for the whole-market spot snapshot, one for the
+    daily bars of the symbols pages have asked to watch, so slow bar
+    downloads never delay the spot refresh. Readers never trigger
+    downloads; they get whatever the last refresh produced.
+    """
+    def __init__(self, spot_interval=SPOT_INTERVAL, bars_interval=BARS_INTERVAL):
+        self.spot_interval = spot_interval
+        self.bars_interval = bars_interval
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._bars_wake = threading.Event()
+        self._spot_ready = threading.Event()
+        self._spot = SpotSnapshot([], {})
+        self._spot_at = 0.0
+        self._last_read = time.time()
+        self._bars = {}     # symbol -> (df, fetched_at)
+        self._watched = {}  # symbol -> last requested
+        self._tried = {}    # "spot" / symbol -> last refresh attempt (failures back off too)
+        self._threads = {}
+        self._executor = None
+
+    def start(self):
+        with self._lock:
+            for name, target in (("market-spot-refresher", self._run), ("market-bars-refresher", self._run_bars)):
+                thread = self._threads.get(name)
+                if thread is None or not thread.is_alive():
+                    self._threads[name] = threading.Thread(target=target, name=name, daemon=True)
+                    self._threads[name].start()
+
+    # --- Readers (non-blocking) ---
+
+    def spot(self, wait=0):
+        """
+        Latest whole-market SpotSnapshot (typed stock_zh_a_spot_em fields),
+        shared by reference. Only the very first read of a fresh process may
+        wait up to `wait` seconds for it. Check `snapshot.fetched_at` or
+        spot_stale() before presenting it as live.
+        """
+        self._last_read = time.time()
+        if not self._spot_ready.is_set():
+            self._wake.set()
+            self._spot_ready.wait(wait)
+        with self._lock:
+            return self._spot
+
+    def spot_age(self):
+        """Seconds since the snapshot was refreshed (None if never)."""
+        with self._lock:
+            return time.time() - self._spot_at if self._spot_at else None
+
+    def spot_stale(self):
+        """True when the snapshot is missing or older than STALE_AFTER."""
+        age = self.spot_age()
+        return age is None or age > STALE_AFTER
+
+    def quote(self, symbol):
+        """Snapshot row of one symbol as a dict, or None."""
+        return self.spot().row(symbol)
+
+    def watch(self, symbols):
+        """Ask the refresher to keep daily bars of `symbols` up to date."""
+        now = time.time()
+        new = False
+        with self._lock:
+            for symbol in symbols:
+                new = new or symbol not in self._watched
+                self._watched[symbol] = now
+        if new:
+            self._bars_wake.set()
+
+    def bars(self, symbol, start_date=None):
+        """Cached daily bars of a watched symbol (sliced from start_date), or None."""
+        self._last_read = time.time()
+        with self._lock:
+            entry = self._bars.get(symbol)
+            if symbol in self._watched:
+                self._watched[symbol] = time.time()
+        if entry is None:
+            return None
+        df = entry[0]
+        return df.loc[pd.Timestamp(start_date):] if start_date is not None else df
+
+    def ensure_bars(self, symbols, timeout=60):
+        """
+        Daily bars of `symbols` for one-off scans (the screener). Bars already
+        fetched today are reused; the rest are downloaded once on a bounded
+        pool of their own. The symbols are not watched, so the refresher does
+        not keep re-downloading them. Returns {symbol: df} for those available
+        within `timeout` seconds.
+        """
+        today = date.today()
+        with self._lock:
+            missing = [s for s in symbols
+                       if s not in self._bars or date.fromtimestamp(self._bars[s][1]) != today]
+            if missing and self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=BARS_FETCH_WORKERS, thread_name_prefix="bars")
+        if missing:
+            futures = [self._executor.submit(self._refresh_bars, s) for s in missing]
+            wait(futures, timeout=timeout)
+            for f in futures:
+                f.cancel()  # still queued after the deadline: skip rather than pile up
+        with self._lock:
+            return {s: self._bars[s][0] for s in symbols if s in self._bars}
+
+    # --- Refresher threads ---
+
+    def _refresh_spot(self):
+        snapshot = SpotSnapshot.from_spot_em(ak.stock_zh_a_spot_em())
+        snapshot.fetched_at = time.time()
+        with self._lock:
+            self._spot = snapshot
+            self._spot_at = snapshot.fetched_at
+        self._spot_ready.set()
+
+    def _refresh_bars(self, symbol):
+        from data_loader import DataLoader
+        end = datetime.now()
+        start = end - timedelta(days=BARS_LOOKBACK_DAYS)
+        df = DataLoader.fetch_daily(symbol, start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d"))
+        with self._lock:
+            self._bars[symbol] = (df, time.time())
+
+    def _due_symbols(self, now):
+        today = date.today()
+        with self._lock:
+            for symbol, requested in list(self._watched.items()):
+                if now - requested > WATCH_TIMEOUT:
+                    del self._watched[symbol]
+                    self._tried.pop(symbol, None)
+            # Unwatched bars (expired watches, screener scans) live until the day ends
+            for symbol, (_, fetched_at) in list(self._bars.items()):
+                if symbol not in self._watched and date.fromtimestamp(fetched_at) != today:
+                    del self._bars[symbol]
+            due = [s for s in self._watched if now - self._tried.get(s, 0) >= self.bars_interval]
+            for symbol in due:
+                self._tried[symbol] = now
+            return due
+
+    def _run(self):
+        while True:
+            now = time.time()
+            active = now - self._last_read < IDLE_TIMEOUT
+            with self._lock:
+                due = active and now - self._tried.get("spot", 0) >= self.spot_interval
+                if due:
+                    self._tried["spot"] = now
+            if due:
+                try:
+                    self._refresh_spot()
+                except Exception as e:
+                    print(f"Market snapshot refresh failed: {e}")
+            self._wake.wait(timeout=5)
+            self._wake.clear()
+
+    def _run_bars(self):
+        while True:
+            now = time.time()
+            for symbol in self._due_symbols(now):
+                try:
+                    self._refresh_bars(symbol)
+                except Exception as e:
+                    print(f"Bars refresh failed for {symbol}: {e}")
+            self._bars_wake.wait(timeout=5)
+            self._bars_wake.clear()
+
+
+_market_store = None
+_market_store_lock = threading.Lock()
+
+
+def get_market_store():
+    """Return the process-wide MarketDataStore (refreshers started on first use)."""
+    global _market_store
+    with _market_store_lock:
+        if _market_store is None:
+            _market_store = MarketDataStore()
+            _market_store.start()
+        return _market_store
@@ -0,0 +1,141 @@
+import asyncio
+import hashlib
+import json
+import threading
+import time
+
+from langchain_core.tools import StructuredTool
+from async_agent import with_timeout
+from mcp_pool import config_hash, get_mcp_manager
+
+
+def _dump(obj):
+    """Plain-dict view of an MCP tool/resource (pydantic model or SimpleNamespace)."""
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump(mode="json")
+    return dict(vars(obj))
+
+
+def format_tool_result(result):
+    """Flatten a CallToolResult into text (images become data-URI markdown)."""
+    results = []
+    for c in result.content:
+        if c.type == "text":
+            results.append(c.text)
+        elif c.type == "image":
+            img_fmt = c.mimeType or "image/png"
+            results.append(f"![Generated Image](data:{img_fmt};base64,{c.data})")
+    return "\n".join(results)
+
+
+class CatalogEntry:
+    def __init__(self, server_name, server_config, resources, tools):
+        self.server_name = server_name
+        self.server_config = server_config
+        self.resources = resources
+        self.tools = tools
+        self.fetched_at = time.time()
+        self.digest = self.compute_digest(resources, tools)
+        self.langchain_tools = None
+
+    @staticmethod
+    def compute_digest(resources, tools):
+        raw = json.dumps(
+            {"resources": [_dump(r) for r in resources], "tools": [_dump(t) for t in tools]},
+            sort_keys=True, default=str
+        )
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class McpCatalogCache:
+    """
+    Process-wide cache of MCP tool/resource catalogs.
+
+    Entries are keyed by server name + config hash and expire after `ttl`
+    seconds. On refresh the catalog digest is compared with the cached one,
+    so LangChain tool wrappers are only rebuilt when the server's tools
+    actually changed.
+    """
+    def __init__(self, ttl=600, tool_timeout=60):
+        self.ttl = ttl
+        self.tool_timeout = tool_timeout
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, server_name, server_config, refresh=False):
+        key = (server_name, config_hash(server_config))
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None and not refresh and time.time() - entry.fetched_at < self.ttl:
+            return entry
+
+        resources, tools = get_mcp_manager().fetch_catalog(server_name, server_config)
+        fresh = CatalogEntry(server_name, server_config, resources, tools)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.digest == fresh.digest:
+                # Unchanged catalog: keep the already-built wrappers
+                entry.fetched_at = fresh.fetched_at
+                return entry
+            for stale_key in [k for k in self._entries if k[0] == server_name]:
+                del self._entries[stale_key]
+            self._entries[key] = fresh
+        return fresh
+
+    def invalidate(self, server_name=None):
+        """Drop cached catalogs for one server (or all servers)."""
+        with self._lock:
+            if server_name is None:
+                self._entries.clear()
+            else:
+                for key in [k for k in self._entries if k[0] == server_name]:
+                    del self._entries[key]
+
+    def langchain_tools(self, server_name, server_config):
+        """StructuredTool wrappers for a server's tools, built once per catalog version."""
+        entry = self.get(server_name, server_config)
+        with self._lock:
+            if entry.langchain_tools is None:
+                entry.langchain_tools = [
+                    self._build_tool(server_name, server_config, t, self.tool_timeout) for t in entry.tools
+                ]
+            return entry.langchain_tools
+
+    @staticmethod
+    def _build_tool(server_name, server_config, tool_obj, timeout):
+        t_name = tool_obj.name
+
+        def wrapper(**kwargs):
+            try:
+                res = get_mcp_manager().call_tool(server_name, server_config, t_name, kwargs, timeout=timeout)
+                return format_tool_result(res)
+            except Exception as e:
+                return f"Error executing tool {t_name}: {e}"
+
+        async def awrapper(**kwargs):
+            # Awaits the manager loop without blocking; cancelling this task
+            # (e.g. on timeout) cancels the in-flight MCP call as well.
+            manager = get_mcp_manager()
+            future = manager.submit(manager.call_tool_async(server_name, server_config, t_name, kwargs))
+            return format_tool_result(await asyncio.wrap_future(future))
+
+        return StructuredTool.from_function(
+            func=wrapper,
+            coroutine=with_timeout(awrapper, timeout, t_name),
+            name=t_name,
+            description=f"{tool_obj.description} (MCP Tool from {server_name})",
+            args_schema=tool_obj.inputSchema or {"type": "object", "properties": {}}
+        )
+
+
+_catalog_cache = None
+_catalog_lock = threading.Lock()
+
+
+def get_catalog_cache():
+    """Return the process-wide McpCatalogCache (created on first use)."""
+    global _catalog_cache
+    with _catalog_lock:
+        if _catalog_cache is None:
+            _catalog_cache = McpCatalogCache()
+        return _catalog_cache
@@ -2,35 +2,94 @@ import httpx
 import json
 from types import SimpleNamespace
 
+
 class StatelessMcpSession:
-    def __init__(self, url):
+    def __init__(self, url, timeout=30.0, max_connections=10):
         self.url = url
         self.message_id = 0
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self._client = None
+
+    @property
+    def client(self):
+        """One pooled keep-alive client for the lifetime of the session."""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                http2=True,  # h2 comes with httpx[http2] in requirements.txt
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections
+                ),
+                headers={"Content-Type": "application/json"}
+            )
+        return self._client
 
     async def __aenter__(self):
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        pass
+        await self.aclose()
 
-    async def _post(self, method, params=None):
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _payload(self, method, params=None):
         self.message_id += 1
-        payload = {
+        return {
             "jsonrpc": "2.0",
             "id": self.message_id,
             "method": method,
             "params": params or {}
         }
-        
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(self.url, json=payload, headers={"Content-Type": "application/json"})
+
+    @staticmethod
+    def _result(data):
+        if "error" in data:
+            raise Exception(f"RPC Error: {data['error']}")
+        return data.get("result")
+
+    async def _post(self, method, params=None):
+        payload = self._payload(method, params)
+        response = await self.client.post(self.url, json=payload)
+        response.raise_for_status()
+        return self._result(response.json())
+
+    async def _post_batch(self, calls):
+        """
+        Send several (method, params) calls as one JSON-RPC batch.
+        Returns a list of results (or Exception instances) in call order.
+        Falls back to sequential requests if the server rejects batches.
+        """
+        payloads = [self._payload(method, params) for method, params in calls]
+        try:
+            response = await self.client.post(self.url, json=payloads)
             response.raise_for_status()
             data = response.json()
-            
-            if "error" in data:
-                raise Exception(f"RPC Error: {data['error']}")
-            
-            return data.get("result")
+            if not isinstance(data, list):
+                raise ValueError("Batch not supported")
+        except (httpx.HTTPStatusError, ValueError):
+            data = []
+            for payload in payloads:
+                response = await self.client.post(self.url, json=payload)
+                response.raise_for_status()
+                data.append(response.json())
+
+        by_id = {d.get("id"): d for d in data}
+        results = []
+        for payload in payloads:
+            item = by_id.get(payload["id"])
+            if item is None:
+                results.append(Exception(f"RPC Error: no response for {payload['method']}"))
+                continue
+            try:
+                results.append(self._result(item))
+            except Exception as e:
+                results.append(e)
+        return results
 
     # Mimic ClientSession methods
     
@@ -41,24 +100,42 @@ class StatelessMcpSession:
             "clientInfo": {"name": "streamlit-agent-http", "version": "1.0"}
         })
 
-    async def list_resources(self):
-        """Returns object with .resources attribute."""
-        res = await self._post("resources/list")
+    async def ping(self):
+        return await self._post("ping")
+
+    @staticmethod
+    def _resources(res):
         # Convert list of dicts to list of objects
         resources_list = []
         for r in res.get("resources", []):
             resources_list.append(SimpleNamespace(**r))
-        
         return SimpleNamespace(resources=resources_list)
 
-    async def list_tools(self):
-        """Returns object with .tools attribute."""
-        res = await self._post("tools/list")
+    @staticmethod
+    def _tools(res):
         tools_list = []
         for t in res.get("tools", []):
             tools_list.append(SimpleNamespace(**t))
         return SimpleNamespace(tools=tools_list)
 
+    async def list_resources(self):
+        """Returns object with .resources attribute."""
+        return self._resources(await self._post("resources/list"))
+
+    async def list_tools(self):
+        """Returns object with .tools attribute."""
+        return self._tools(await self._post("tools/list"))
+
+    async def list_catalog(self):
+        """
+        Fetch resources and tools in a single batched round trip.
+        Returns (resources, tools) lists; a failed half comes back empty.
+        """
+        res_result, tools_result = await self._post_batch([("resources/list", None), ("tools/list", None)])
+        resources = [] if isinstance(res_result, Exception) else self._resources(res_result or {}).resources
+        tools = [] if isinstance(tools_result, Exception) else self._tools(tools_result or {}).tools
+        return resources, tools
+
     async def call_tool(self, name, arguments):
         """Returns object with .content attribute."""
         res = await self._post("tools/call", {"name": name, "arguments": arguments})
@@ -0,0 +1,303 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+from contextlib import asynccontextmanager
+
+import anyio
+import httpx
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+from mcp_http_client import StatelessMcpSession
+
+
+TRANSPORT_ERRORS = (
+    OSError,
+    httpx.TransportError,
+    anyio.ClosedResourceError,
+    anyio.BrokenResourceError,
+    anyio.EndOfStream,
+)
+
+
+def config_hash(server_config):
+    """Stable hash of a server config: editing the config yields a new pool."""
+    raw = json.dumps(server_config, sort_keys=True)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+@asynccontextmanager
+async def open_session(server_config):
+    """Open and initialize an MCP session (HTTP or Stdio) for a server config."""
+    if "url" in server_config:
+        async with StatelessMcpSession(server_config["url"]) as session:
+            await session.initialize()
+            yield session
+    elif "command" in server_config:
+        server_params = StdioServerParameters(
+            command=server_config["command"],
+            args=server_config["args"],
+            env={**os.environ, **server_config.get("env", {})}
+        )
+        async with stdio_client(server_params) as (read, write):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                yield session
+    else:
+        raise ValueError("Invalid config: Missing 'command' or 'url'")
+
+
+class _PooledSession:
+    """
+    One warm MCP session. The transport context is entered and exited by a
+    single owner task (anyio requires this), while calls come from any task
+    on the manager loop.
+    """
+    def __init__(self, server_config):
+        self.server_config = server_config
+        self.session = None
+        self._ready = None
+        self._stop = None
+        self._task = None
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        self._ready = loop.create_future()
+        self._stop = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+        await self._ready
+
+    async def _run(self):
+        try:
+            async with open_session(self.server_config) as session:
+                self.session = session
+                self._ready.set_result(True)
+                await self._stop.wait()
+        except BaseException as e:
+            if not self._ready.done():
+                self._ready.set_exception(e)
+        finally:
+            self.session = None
+
+    @property
+    def alive(self):
+        return self.session is not None and self._task is not None and not self._task.done()
+
+    async def ping(self):
+        if hasattr(self.session, "send_ping"):
+            await self.session.send_ping()
+        else:
+            await self.session.ping()
+
+    async def close(self):
+        if self._stop is not None:
+            self._stop.set()
+        if self._task is not None:
+            try:
+                await asyncio.wait_for(self._task, timeout=5)
+            except Exception:
+                self._task.cancel()
+
+
+class _SessionPool:
+    """Bounded pool of initialized sessions for one configured server."""
+    def __init__(self, server_config, size):
+        self.server_config = server_config
+        self.size = size
+        self._idle = []
+        self._all = set()
+        self._opening = 0
+        self._cond = asyncio.Condition()
+
+    async def acquire(self):
+        async with self._cond:
+            while True:
+                while self._idle:
+                    pooled = self._idle.pop()
+                    if pooled.alive:
+                        return pooled
+                    self._all.discard(pooled)
+                    asyncio.ensure_future(pooled.close())
+                if len(self._all) + self._opening < self.size:
+                    self._opening += 1
+                    break
+                await self._cond.wait()
+
+        pooled = _PooledSession(self.server_config)
+        try:
+            await pooled.start()
+        except BaseException:
+            async with self._cond:
+                self._opening -= 1
+                self._cond.notify()
+            raise
+        async with self._cond:
+            self._opening -= 1
+            self._all.add(pooled)
+        return pooled
+
+    async def release(self, pooled):
+        async with self._cond:
+            self._idle.append(pooled)
+            self._cond.notify()
+
+    async def discard(self, pooled):
+        async with self._cond:
+            self._all.discard(pooled)
+            self._cond.notify()
+        await pooled.close()
+
+    async def health_check(self):
+        """Ping every idle session; dead ones are closed and replaced lazily."""
+        async with self._cond:
+            idle, self._idle = self._idle, []
+        for pooled in idle:
+            try:
+                await asyncio.wait_for(pooled.ping(), timeout=10)
+            except Exception:
+                await self.discard(pooled)
+            else:
+                await self.release(pooled)
+
+    async def close(self):
+        for pooled in list(self._all):
+            await self.discard(pooled)
+
+
+class McpConnectionManager:
+    """
+    Process-wide MCP connection manager.
+
+    Owns a background event loop thread and a pool of warm sessions per
+    configured server, so tool calls reuse running servers instead of
+    spawning `npx`/`uvx` and re-initializing on every call.
+    """
+    def __init__(self, pool_size=2, health_interval=60):
+        self.pool_size = pool_size
+        self.health_interval = health_interval
+        self._pools = {}
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="mcp-pool", daemon=True)
+        self._thread.start()
+        self.submit(self._health_loop())
+
+    def submit(self, coro):
+        """Schedule a coroutine on the manager loop; returns a concurrent Future."""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def run(self, coro, timeout=None):
+        """Run a coroutine on the manager loop and block for its result."""
+        future = self.submit(coro)
+        try:
+            return future.result(timeout)
+        except TimeoutError:
+            future.cancel()
+            raise
+
+    def _pool(self, server_name, server_config):
+        key = (server_name, config_hash(server_config))
+        pool = self._pools.get(key)
+        if pool is None:
+            # Drop pools left behind by an older config of the same server
+            for stale_key in [k for k in self._pools if k[0] == server_name]:
+                asyncio.ensure_future(self._pools.pop(stale_key).close())
+            pool = _SessionPool(server_config, self.pool_size)
+            self._pools[key] = pool
+        return pool
+
+    async def _with_session(self, server_name, server_config, fn, retries=1):
+        """Run `fn(session)` on a pooled session, restarting it once on failure."""
+        pool = self._pool(server_name, server_config)
+        for attempt in range(retries + 1):
+            pooled = await pool.acquire()
+            try:
+                result = await fn(pooled.session)
+            except Exception as e:
+                # Application-level errors leave the session usable; only a
+                # dead transport triggers a restart + retry.
+                if pooled.alive and not isinstance(e, TRANSPORT_ERRORS):
+                    await pool.release(pooled)
+                    raise
+                await pool.discard(pooled)
+                if attempt >= retries:
+                    raise
+                continue
+            except BaseException:
+                # Cancelled mid-call (caller timeout): the session may still
+                # owe a response, so drop it instead of handing it to the next
+                # caller. Shielded so the discard completes despite the cancel.
+                await asyncio.shield(pool.discard(pooled))
+                raise
+            await pool.release(pooled)
+            return result
+
+    async def _health_loop(self):
+        while True:
+            await asyncio.sleep(self.health_interval)
+            for pool in list(self._pools.values()):
+                try:
+                    await pool.health_check()
+                except Exception as e:
+                    print(f"MCP health check error: {e}")
+
+    # --- Async API (runs on the manager loop) ---
+
+    async def call_tool_async(self, server_name, server_config, tool_name, tool_args):
+        return await self._with_session(
+            server_name, server_config,
+            lambda s: s.call_tool(tool_name, arguments=tool_args)
+        )
+
+    async def read_resource_async(self, server_name, server_config, resource_uri):
+        return await self._with_session(
+            server_name, server_config,
+            lambda s: s.read_resource(resource_uri)
+        )
+
+    async def fetch_catalog_async(self, server_name, server_config):
+        """Return (resources, tools) for a server."""
+        async def _fetch(session):
+            if hasattr(session, "list_catalog"):
+                return await session.list_catalog()
+            try:
+                resources = (await session.list_resources()).resources
+            except Exception:
+                resources = []
+            try:
+                tools = (await session.list_tools()).tools
+            except Exception:
+                tools = []
+            return resources, tools
+        return await self._with_session(server_name, server_config, _fetch)
+
+    # --- Blocking API (safe to call from Streamlit script threads) ---
+
+    def call_tool(self, server_name, server_config, tool_name, tool_args, timeout=120):
+        return self.run(self.call_tool_async(server_name, server_config, tool_name, tool_args), timeout)
+
+    def read_resource(self, server_name, server_config, resource_uri, timeout=60):
+        return self.run(self.read_resource_async(server_name, server_config, resource_uri), timeout)
+
+    def fetch_catalog(self, server_name, server_config, timeout=120):
+        return self.run(self.fetch_catalog_async(server_name, server_config), timeout)
+
+    def restart(self, server_name):
+        """Close every pooled session of a server; the next call starts fresh ones."""
+        async def _restart():
+            for key in [k for k in self._pools if k[0] == server_name]:
+                await self._pools.pop(key).close()
+        self.run(_restart())
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_mcp_manager():
+    """Return the process-wide McpConnectionManager (created on first use)."""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = McpConnectionManager()
+        return _manager
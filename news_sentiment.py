@@ -0,0 +1,139 @@
+"""
+News-sentiment stage for the Signal Monitor: headlines for the whole pool
+are fetched concurrently (AKShare stock_news_em, plus Serper when a key is
+set), deduplicated by content hash and scored in packed LLM batches. Each
+headline's score is cached on disk under its hash, so a rescan only sends
+headlines that have not been scored before.
+"""
+import hashlib
+import re
+
+import akshare as ak
+from langchain_community.utilities import GoogleSerperAPIWrapper
+
+from batch_analysis import analyze_batch, pack_batches
+from disk_cache import CachedSearch, get_disk_cache
+from fanout import fan_out, get_executor
+
+HEADLINES_PER_SYMBOL = 20
+SENTIMENT_TTL = 30 * 24 * 3600
+FETCH_TIMEOUT = 15
+SCORE_TIMEOUT = 120
+# Mean headline score beyond which a stock is labelled bullish / bearish
+LABEL_THRESHOLD = 0.2
+
+
+def headline_hash(title):
+    """Content hash ignoring case, whitespace and punctuation (same story, different source)."""
+    text = re.sub(r"[\W_]+", "", str(title).lower())
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+def fetch_ak_news(symbol):
+    df = ak.stock_news_em(symbol=symbol)
+    if df is None or df.empty:
+        return []
+    return [
+        {"title": row.get('新闻标题', ''), "time": row.get('发布时间', ''), "source": row.get('文章来源', '东方财富')}
+        for _, row in df.head(HEADLINES_PER_SYMBOL).iterrows()
+    ]
+
+
+def fetch_serper_news(symbol, name, api_key):
+    # Same query as Stock Analysis, so both pages share the cached search
+    search = CachedSearch(
+        GoogleSerperAPIWrapper(serper_api_key=api_key, type="news"),
+        provider="serper", params={"type": "news"}
+    )
+    news = search.results(f"{name} {symbol} 股票 财经 新闻").get('news', [])
+    return [
+        {"title": item.get('title', ''), "time": item.get('date', ''), "source": item.get('source', 'Serper')}
+        for item in news[:HEADLINES_PER_SYMBOL]
+    ]
+
+
+def sentiment_label(score, count, new=0):
+    if not count:
+        return "— 无新闻"
+    icon = "🟢" if score > LABEL_THRESHOLD else "🔴" if score < -LABEL_THRESHOLD else "⚪"
+    extra = f", 新{new}" if new else ""
+    return f"{icon} {score:+.2f} ({count}条{extra})"
+
+
+class NewsSentiment:
+    """Concurrent fetch + dedup + cached, batched scoring for a stock pool."""
+    def __init__(self, llm, serper_api_key=None, cache=None, max_tokens=2000, max_items=40):
+        self.llm = llm
+        self.serper_api_key = serper_api_key
+        self.cache = cache or get_disk_cache()
+        self.max_tokens = max_tokens
+        self.max_items = max_items
+
+    def fetch(self, symbols, names=None):
+        """{symbol: [headline]} with duplicates (by content hash) removed per symbol."""
+        names = names or {}
+        tasks = {}
+        for symbol in symbols:
+            tasks[(symbol, "ak")] = lambda s=symbol: fetch_ak_news(s)
+            if self.serper_api_key:
+                tasks[(symbol, "serper")] = lambda s=symbol: fetch_serper_news(s, names.get(s, ""), self.serper_api_key)
+
+        headlines = {symbol: {} for symbol in symbols}
+        executor = get_executor("news", 8)
+        for (symbol, _), status, value in fan_out(tasks, default_timeout=FETCH_TIMEOUT, executor=executor):
+            if status != 'ok':
+                continue
+            for item in value:
+                if not item["title"]:
+                    continue
+                item["hash"] = headline_hash(item["title"])
+                headlines[symbol].setdefault(item["hash"], item)
+        return {symbol: list(items.values()) for symbol, items in headlines.items()}
+
+    def _key(self, h):
+        return self.cache.make_key("news_sentiment", h)
+
+    def score(self, headlines):
+        """
+        {hash: score} for `headlines`, plus the set of hashes scored in this
+        call. Cached hashes are not sent; the rest go out in packed batches.
+        """
+        scores, todo = {}, {}
+        for item in headlines:
+            h = item["hash"]
+            if h in scores or h in todo:
+                continue
+            cached = self.cache.get(self._key(h))
+            if cached is not None:
+                scores[h] = cached["score"]
+            else:
+                todo[h] = item["title"]
+
+        batches = pack_batches(list(todo.items()), self.max_tokens, self.max_items)
+        tasks = {i: (lambda b=b: analyze_batch(self.llm, b)) for i, b in enumerate(batches)}
+        fresh = set()
+        for _, status, value in fan_out(tasks, default_timeout=SCORE_TIMEOUT, executor=get_executor("llm", 4)):
+            if status != 'ok':
+                continue  # unscored headlines are retried on the next scan
+            for row in value[0]:
+                scores[row["id"]] = row["score"]
+                fresh.add(row["id"])
+                self.cache.set(self._key(row["id"]), {"score": row["score"], "sentiment": row["sentiment"]},
+                               SENTIMENT_TTL, namespace="news_sentiment")
+        return scores, fresh
+
+    def scan(self, symbols, names=None):
+        """
+        {symbol: {"score", "count", "new", "label"}}: mean score over the
+        symbol's scored headlines; `new` counts headlines scored this scan.
+        """
+        per_symbol = self.fetch(symbols, names)
+        scores, fresh = self.score([item for items in per_symbol.values() for item in items])
+        out = {}
+        for symbol, items in per_symbol.items():
+            values = [scores[item["hash"]] for item in items if item["hash"] in scores]
+            mean = sum(values) / len(values) if values else 0.0
+            new = sum(1 for item in items if item["hash"] in fresh)
+            out[symbol] = {"score": mean, "count": len(values), "new": new,
+                           "label": sentiment_label(mean, len(values), new)}
+        return out
@@ -1,6 +1,5 @@
 import streamlit as st
-from langchain_openai import ChatOpenAI
-from langchain_classic.memory import ConversationBufferMemory
+from llm_client import get_llm
 from langchain_classic.chains import LLMChain
 from langchain_core.prompts import (
     ChatPromptTemplate,
@@ -8,10 +7,12 @@ from langchain_core.prompts import (
     MessagesPlaceholder,
     SystemMessagePromptTemplate,
 )
-from langchain_core.messages import HumanMessage, AIMessage
 from utils import configure_api_key
+from conversation_memory import build_summary_memory
 
 st.set_page_config(page_title="DeepSeek Chatbot", page_icon="🤖")
+
+HISTORY_TOKEN_BUDGET = 2000
 st.header("🤖 DeepSeek Chatbot")
 
 # 1. Configuration
@@ -39,17 +40,13 @@ with st.sidebar:
 if "messages" not in st.session_state:
     st.session_state.messages = []
 
-if "memory" not in st.session_state:
-    st.session_state.memory = ConversationBufferMemory(return_messages=True)
-
 # 3. LangChain Setup
 # DeepSeek is OpenAI compatible
-llm = ChatOpenAI(
-    model_name=model_name,
-    openai_api_key=deepseek_api_key,
-    openai_api_base="https://api.deepseek.com",
-    streaming=True
-)
+llm = get_llm(deepseek_api_key, model=model_name, streaming=True)
+
+# Token-budgeted memory: recent turns verbatim, older turns summarized
+if "memory" not in st.session_state:
+    st.session_state.memory = build_summary_memory(llm, max_token_limit=HISTORY_TOKEN_BUDGET)
 
 # Custom Prompt
 prompt = ChatPromptTemplate.from_messages(
@@ -86,17 +83,9 @@ if user_input := st.chat_input():
             mcp_context_str += f"-- Source: {item['source']} --\n{item['content']}\n"
         mcp_context_str += "\n[End Context]\n"
 
-    # Construct full prompt with history
-    history_langchain_format = []
-    for msg in st.session_state.messages:
-        if msg["role"] == "user":
-            # Inject context only into the latest message effectively
-            content = msg["content"]
-            if msg == st.session_state.messages[-1] and mcp_context_str:
-                content += mcp_context_str
-            history_langchain_format.append(HumanMessage(content=content))
-        elif msg["role"] == "assistant":
-            history_langchain_format.append(AIMessage(content=msg["content"]))
+    # History comes from the bounded memory (summary + recent turns);
+    # context is injected only into the current message
+    history = st.session_state.memory.load_memory_variables({})["history"]
     
     with st.chat_message("assistant"):
         chat_container = st.empty()
@@ -107,12 +96,13 @@ if user_input := st.chat_input():
             # Stream response
             response_text = ""
             for chunk in chain.stream({
-                "history": history_langchain_format[:-1], # Pass history excluding current
-                "input": history_langchain_format[-1].content # Current input with context
+                "history": history,
+                "input": user_input + mcp_context_str # Current input with context
             }):
                 response_text += chunk.content
                 chat_container.markdown(response_text)
             
             st.session_state.messages.append({"role": "assistant", "content": response_text})
+            st.session_state.memory.save_context({"input": user_input}, {"output": response_text})
         except Exception as e:
             st.error(f"Error: {e}")
@@ -2,13 +2,14 @@ import streamlit as st
 import tempfile
 import os
 
-from langchain_community.document_loaders import PyPDFLoader, TextLoader
+from langchain_community.document_loaders import TextLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_community.vectorstores import FAISS
 from langchain_community.embeddings import HuggingFaceEmbeddings
-from langchain_openai import ChatOpenAI
+from llm_client import get_llm
 from langchain_classic.chains import RetrievalQA
 from utils import configure_api_key
+from pdf_extract import pdf_documents
 
 st.set_page_config(page_title="Document Q&A", page_icon="📄")
 st.header("📄 Chat with your Documents")
@@ -20,11 +21,6 @@ deepseek_api_key = configure_api_key()
 uploaded_file = st.file_uploader("Upload a PDF or TXT file", type=["pdf", "txt"])
 
 if uploaded_file:
-    # Save uploaded file to a temporary file
-    with tempfile.NamedTemporaryFile(delete=False, suffix=f".{uploaded_file.name.split('.')[-1]}") as tmp_file:
-        tmp_file.write(uploaded_file.getvalue())
-        tmp_file_path = tmp_file.name
-
     st.success(f"File uploaded: {uploaded_file.name}")
 
     if st.button("Process Document"):
@@ -32,11 +28,15 @@ if uploaded_file:
             try:
                 # Loader Selection
                 if uploaded_file.name.endswith(".pdf"):
-                    loader = PyPDFLoader(tmp_file_path)
+                    documents = pdf_documents(uploaded_file.getvalue(), uploaded_file.name)
                 else:
-                    loader = TextLoader(tmp_file_path)
-                
-                documents = loader.load()
+                    # TextLoader reads from a path; PDFs are parsed from the bytes
+                    with tempfile.NamedTemporaryFile(delete=False, suffix=f".{uploaded_file.name.split('.')[-1]}") as tmp_file:
+                        tmp_file.write(uploaded_file.getvalue())
+                    try:
+                        documents = TextLoader(tmp_file.name).load()
+                    finally:
+                        os.remove(tmp_file.name)
 
                 # Split Text
                 text_splitter = RecursiveCharacterTextSplitter(
@@ -58,10 +58,6 @@ if uploaded_file:
                 st.success("Document processed and indexed!")
             except Exception as e:
                 st.error(f"Error processing file: {e}")
-            finally:
-                # Cleanup temp file
-                if os.path.exists(tmp_file_path):
-                    os.remove(tmp_file_path)
 
 # 3. Q&A Interface
 if "db" in st.session_state:
@@ -74,12 +70,7 @@ if "db" in st.session_state:
             retriever = st.session_state.db.as_retriever(search_kwargs={"k": 3})
             
             # Setup LLM (DeepSeek)
-            llm = ChatOpenAI(
-                model_name="deepseek-chat",
-                openai_api_key=deepseek_api_key,
-                openai_api_base="https://api.deepseek.com",
-                temperature=0.2
-            )
+            llm = get_llm(deepseek_api_key, temperature=0.2)
             
             # Setup Chain
             qa_chain = RetrievalQA.from_chain_type(
@@ -2,7 +2,7 @@ import streamlit as st
 
 
 from langchain_community.callbacks.streamlit import StreamlitCallbackHandler
-from langchain_openai import ChatOpenAI
+from llm_client import get_llm
 from langchain_classic.agents import ConversationalChatAgent, AgentExecutor
 from langchain_classic.memory import ConversationBufferMemory
 from langchain_core.prompts import PromptTemplate
@@ -10,6 +10,7 @@ from langchain_core.tools import Tool
 
 from langchain_community.utilities import SerpAPIWrapper
 from utils import configure_api_key, configure_serpapi_key
+from disk_cache import CachedSearch
 
 st.set_page_config(page_title="Web Search", page_icon="🌍")
 st.header("🌍 Autonomous Web Search Agent (SerpAPI)")
@@ -19,7 +20,8 @@ deepseek_api_key = configure_api_key()
 serpapi_api_key = configure_serpapi_key()
 
 # 2. Setup Tools
-search = SerpAPIWrapper(serpapi_api_key=serpapi_api_key)
+# Repeated queries are served from the shared on-disk search cache
+search = CachedSearch(SerpAPIWrapper(serpapi_api_key=serpapi_api_key), provider="serpapi")
 
 tools = [
     Tool(
@@ -42,12 +44,7 @@ if "memory" not in st.session_state:
     )
 
 # 4. Agent Setup
-llm = ChatOpenAI(
-    model_name="deepseek-chat",
-    openai_api_key=deepseek_api_key,
-    openai_api_base="https://api.deepseek.com",
-    streaming=True
-)
+llm = get_llm(deepseek_api_key, streaming=True)
 
 # Standard ReAct / Conversational Agent
 # We use existing ConversationChatAgent from LangChain or create_react_agent
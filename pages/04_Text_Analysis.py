@@ -1,8 +1,10 @@
 import streamlit as st
-from langchain_openai import ChatOpenAI
+from llm_client import get_llm
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from utils import configure_api_key
+from disk_cache import DiskLLMCache
+import batch_analysis
 
 st.set_page_config(page_title="Text Analysis", page_icon="🧠")
 st.header("🧠 Intelligent Text Analysis (DeepSeek)")
@@ -11,15 +13,14 @@ st.header("🧠 Intelligent Text Analysis (DeepSeek)")
 deepseek_api_key = configure_api_key()
 
 # 2. LLM Setup
-llm = ChatOpenAI(
-    model_name="deepseek-chat",
-    openai_api_key=deepseek_api_key,
-    openai_api_base="https://api.deepseek.com",
-    temperature=0  # Low temperature for analysis tasks
+llm = get_llm(
+    deepseek_api_key,
+    temperature=0,  # Low temperature for analysis tasks
+    cache=DiskLLMCache()  # Deterministic, so repeated inputs are served from disk
 )
 
 # 3. Tabs
-tab1, tab2, tab3 = st.tabs(["📝 Entity Extraction", "😊 Sentiment Analysis", "🌐 Translation & Polishing"])
+tab1, tab2, tab3, tab4 = st.tabs(["📝 Entity Extraction", "😊 Sentiment Analysis", "🌐 Translation & Polishing", "📦 Batch Mode"])
 
 # --- TAB 1: Entity Extraction ---
 with tab1:
@@ -106,3 +107,74 @@ with tab3:
                 st.markdown(result)
         else:
             st.warning("Please enter some text.")
+
+# --- TAB 4: Batch Mode ---
+with tab4:
+    st.subheader("Batch Sentiment + Entity Extraction")
+    st.caption("Upload a CSV or JSONL corpus (e.g. stock_news_em headlines). Several items are packed into each prompt; progress is checkpointed, so re-running the same file resumes where it stopped.")
+
+    uploaded = st.file_uploader("Corpus file", type=["csv", "jsonl"], key="batch_file")
+    if uploaded:
+        data = uploaded.getvalue()
+        try:
+            corpus = batch_analysis.read_table(data, uploaded.name)
+        except Exception as e:
+            st.error(f"Could not read file: {e}")
+            st.stop()
+
+        columns = list(corpus.columns)
+        text_column = st.selectbox("Text column", columns, index=columns.index(batch_analysis.guess_text_column(corpus)))
+
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            max_tokens = st.number_input("Token budget / prompt", 300, 8000, 2000, step=100)
+        with col2:
+            max_items = st.number_input("Max items / prompt", 1, 200, 40)
+        with col3:
+            concurrency = st.slider("Concurrent requests", 1, 16, 4)
+        with col4:
+            rpm = st.number_input("Requests / min", 1, 1200, 60)
+
+        # Uncached: packing differs between runs and the checkpoint already covers resume
+        batch_llm = get_llm(deepseek_api_key, temperature=0)
+        key = batch_analysis.job_id(data, text_column, batch_llm.model_name)
+        items = list(zip(range(len(corpus)), corpus[text_column].fillna("").astype(str)))
+        job = batch_analysis.BatchJob(items, batch_llm, key, max_tokens=max_tokens, max_items=max_items,
+                                      concurrency=concurrency, requests_per_min=rpm)
+
+        done_count = len(job.completed())
+        n_batches = len(batch_analysis.pack_batches(job.items, max_tokens, max_items))
+        st.info(f"{len(items)} items · ~{n_batches} prompts at full size · {done_count} already done (checkpoint)")
+
+        col_run, col_reset = st.columns([3, 1])
+        with col_run:
+            run_clicked = st.button("▶️ Run batch" if done_count == 0 else "⏯️ Resume batch",
+                                    use_container_width=True, disabled=done_count >= len(items))
+        with col_reset:
+            if st.button("🗑️ Reset checkpoint", use_container_width=True):
+                job.clear()
+                st.rerun()
+
+        if run_clicked:
+            progress = st.progress(done_count / max(len(items), 1))
+            m1, m2, m3, m4 = st.columns(4)
+            slot_done, slot_rate, slot_tokens, slot_cost = m1.empty(), m2.empty(), m3.empty(), m4.empty()
+            stats = None
+            for stats in job.run():
+                finished = stats.resumed + stats.done
+                progress.progress(min(finished / len(items), 1.0))
+                slot_done.metric("Items done", f"{finished}/{stats.total}")
+                slot_rate.metric("Throughput", f"{stats.items_per_sec:.1f} items/s")
+                slot_tokens.metric("Tokens in / out", f"{stats.input_tokens:,} / {stats.output_tokens:,}")
+                slot_cost.metric("Cost (¥)", f"{stats.cost():.4f}")
+            if stats is not None:
+                msg = f"{stats.requests} requests in {stats.elapsed:.1f}s"
+                if stats.failed:
+                    msg += f" · {stats.failed} failed (their items will be retried on resume)"
+                st.success(msg)
+
+        if job.completed():
+            table = job.results(corpus)
+            st.dataframe(table, use_container_width=True)
+            st.download_button("📥 Download results (.csv)", table.to_csv(index=False).encode("utf-8-sig"),
+                               file_name=f"batch_{key}.csv", mime="text/csv")
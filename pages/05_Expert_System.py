@@ -3,11 +3,11 @@ import os
 import tempfile
 from langchain_community.document_loaders import PyPDFLoader, TextLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_community.vectorstores import FAISS
 from langchain_community.embeddings import HuggingFaceEmbeddings
-from langchain_openai import ChatOpenAI
+from llm_client import get_llm
 from langchain_classic.chains import RetrievalQA
 from utils import configure_api_key
+from knowledge_base import KnowledgeBase
 
 st.set_page_config(page_title="Expert System", page_icon="🎓")
 st.header("🎓 Expert System (Persistent Knowledge Base)")
@@ -29,14 +29,24 @@ with tab1:
     
     uploaded_files = st.file_uploader("Upload Company Documents (PDF/TXT)", accept_multiple_files=True)
     
+    kb = KnowledgeBase(KB_FOLDER, embeddings)
+
     if st.button("Add to Knowledge Base"):
         if uploaded_files:
             with st.spinner("Indexing documents..."):
-                all_texts = []
+                text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
+                summary = {"added": 0, "updated": 0, "skipped": 0}
                 for uploaded_file in uploaded_files:
+                    data = uploaded_file.getvalue()
+                    content_hash = kb.file_hash(data)
+                    # Unchanged files are skipped before loading/embedding
+                    if kb.is_current(uploaded_file.name, content_hash):
+                        summary["skipped"] += 1
+                        continue
+
                     # Save temp
                     with tempfile.NamedTemporaryFile(delete=False, suffix=f".{uploaded_file.name.split('.')[-1]}") as tmp_file:
-                        tmp_file.write(uploaded_file.getvalue())
+                        tmp_file.write(data)
                         tmp_file_path = tmp_file.name
                     
                     try:
@@ -45,39 +55,43 @@ with tab1:
                         else:
                             loader = TextLoader(tmp_file_path)
                         docs = loader.load()
-                        all_texts.extend(docs)
                     finally:
                         os.remove(tmp_file_path)
                 
-                # Split
-                text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
-                splits = text_splitter.split_documents(all_texts)
-                
-                # Indexing
-                if os.path.exists(KB_FOLDER):
-                    # Load existing to append
-                    # Note: Loading with allow_dangerous_deserialization=True is needed for recent FAISS versions if trusting local files
-                    db = FAISS.load_local(KB_FOLDER, embeddings, allow_dangerous_deserialization=True)
-                    db.add_documents(splits)
-                else:
-                    db = FAISS.from_documents(splits, embeddings)
+                    # Split & upsert (only changed chunks are re-embedded)
+                    splits = text_splitter.split_documents(docs)
+                    res = kb.upsert(uploaded_file.name, content_hash, splits)
+                    summary[res["status"]] += 1
+                    st.write(f"`{uploaded_file.name}`: {res['status']} (+{res['added']} / -{res['deleted']} chunks)")
                 
                 # Save
-                db.save_local(KB_FOLDER)
-                st.success(f"Successfully added {len(splits)} chunks to Knowledge Base!")
+                kb.save()
+                st.success(f"Knowledge Base updated! Added: {summary['added']}, Updated: {summary['updated']}, Unchanged: {summary['skipped']}")
         else:
             st.warning("Please upload files first.")
 
+    st.markdown("#### Indexed Documents")
+    kb_sources = kb.sources()
+    if not kb_sources:
+        st.caption("No documents indexed yet.")
+    for source_name, n_chunks in kb_sources.items():
+        c_name, c_del = st.columns([4, 1])
+        c_name.write(f"📄 {source_name} ({n_chunks} chunks)")
+        if c_del.button("Delete", key=f"kb_del_{source_name}"):
+            kb.delete(source_name)
+            kb.save()
+            st.rerun()
+
 # --- TAB 2: Chat ---
 with tab2:
     st.subheader("Consult the Expert")
     
-    if not os.path.exists(KB_FOLDER):
+    if not kb.exists():
         st.warning("No Knowledge Base found. Please build it in the 'Knowledge Builder' tab first.")
     else:
         # Load DB
         try:
-            db = FAISS.load_local(KB_FOLDER, embeddings, allow_dangerous_deserialization=True)
+            db = kb.db
             
             # Chat Interface
             if "expert_messages" not in st.session_state:
@@ -92,12 +106,7 @@ with tab2:
                 
                 with st.chat_message("assistant"):
                     with st.spinner("Consulting Knowledge Base..."):
-                        llm = ChatOpenAI(
-                            model_name="deepseek-chat",
-                            openai_api_key=deepseek_api_key,
-                            openai_api_base="https://api.deepseek.com",
-                            temperature=0.1
-                        )
+                        llm = get_llm(deepseek_api_key, temperature=0.1)
                         retriever = db.as_retriever(search_kwargs={"k": 4})
                         qa_chain = RetrievalQA.from_chain_type(
                             llm=llm,
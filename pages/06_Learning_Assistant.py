@@ -3,16 +3,18 @@ import tempfile
 import os
 import json
 
-from langchain_community.document_loaders import PyPDFLoader, TextLoader
+from langchain_community.document_loaders import TextLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_community.vectorstores import FAISS
 from langchain_community.embeddings import HuggingFaceEmbeddings
-from langchain_openai import ChatOpenAI
+from llm_client import get_llm
 from langchain_classic.chains import RetrievalQA
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
 from langchain_community.utilities import SerpAPIWrapper
 from utils import configure_api_key, configure_serpapi_key
+from disk_cache import CachedSearch
+from pdf_extract import pdf_documents
 
 st.set_page_config(page_title="Learning Assistant", page_icon="🎓")
 st.header("🎓 Personal Learning Assistant")
@@ -22,7 +24,7 @@ deepseek_api_key = configure_api_key()
 # Optional: SerpAPI for web search
 try:
     serpapi_api_key = configure_serpapi_key()
-    search_tool = SerpAPIWrapper(serpapi_api_key=serpapi_api_key)
+    search_tool = CachedSearch(SerpAPIWrapper(serpapi_api_key=serpapi_api_key), provider="serpapi")
     search_enabled = True
 except:
     search_enabled = False
@@ -39,16 +41,17 @@ with st.sidebar:
     if uploaded_file and not st.session_state.learning_db:
         if st.button("Process Material"):
             with st.spinner("Digesting material..."):
-                with tempfile.NamedTemporaryFile(delete=False, suffix=f".{uploaded_file.name.split('.')[-1]}") as tmp_file:
-                    tmp_file.write(uploaded_file.getvalue())
-                    tmp_file_path = tmp_file.name
-                
                 try:
                     if uploaded_file.name.endswith(".pdf"):
-                        loader = PyPDFLoader(tmp_file_path)
+                        docs = pdf_documents(uploaded_file.getvalue(), uploaded_file.name)
                     else:
-                        loader = TextLoader(tmp_file_path)
-                    docs = loader.load()
+                        # TextLoader reads from a path; PDFs are parsed from the bytes
+                        with tempfile.NamedTemporaryFile(delete=False, suffix=f".{uploaded_file.name.split('.')[-1]}") as tmp_file:
+                            tmp_file.write(uploaded_file.getvalue())
+                        try:
+                            docs = TextLoader(tmp_file.name).load()
+                        finally:
+                            os.remove(tmp_file.name)
                     
                     text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
                     splits = text_splitter.split_documents(docs)
@@ -58,8 +61,6 @@ with st.sidebar:
                     st.success("Material Ready!")
                 except Exception as e:
                     st.error(f"Error: {e}")
-                finally:
-                    os.remove(tmp_file_path)
     
     if st.session_state.learning_db:
          if st.button("Clear Material"):
@@ -74,12 +75,7 @@ with st.sidebar:
 # 4. Main Interface
 tab1, tab2, tab3 = st.tabs(["💬 Tutor Chat", "📝 Quiz Generator", "🗂️ Flashcards"])
 
-llm = ChatOpenAI(
-    model_name="deepseek-chat",
-    openai_api_key=deepseek_api_key,
-    openai_api_base="https://api.deepseek.com",
-    temperature=0.3
-)
+llm = get_llm(deepseek_api_key, temperature=0.3)
 
 # --- TAB 1: Chat ---
 with tab1:
@@ -5,7 +5,7 @@ import os
 import time
 
 from langchain_experimental.agents.agent_toolkits import create_pandas_dataframe_agent
-from langchain_openai import ChatOpenAI
+from llm_client import get_llm
 from langchain_classic.agents import AgentType
 from utils import configure_api_key
 
@@ -31,12 +31,7 @@ if uploaded_file:
         st.dataframe(df.head())
         
         # 4. Agent Setup
-        llm = ChatOpenAI(
-            model_name="deepseek-chat",
-            openai_api_key=deepseek_api_key,
-            openai_api_base="https://api.deepseek.com",
-            temperature=0
-        )
+        llm = get_llm(deepseek_api_key, temperature=0)
         
         # We use a custom prefix to instruct the agent about plotting
         prefix_prompt = """
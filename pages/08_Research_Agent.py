@@ -1,12 +1,14 @@
 import streamlit as st
+import asyncio
 import json
-import time
 
-from langchain_openai import ChatOpenAI
+from llm_client import async_llm, get_llm
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import JsonOutputParser, StrOutputParser
 from langchain_community.utilities import SerpAPIWrapper
 from utils import configure_api_key, configure_serpapi_key
+from rate_limit import AsyncTokenBucket
+from disk_cache import CachedSearch
 
 st.set_page_config(page_title="Research Agent", page_icon="🕵️‍♂️")
 st.header("🕵️‍♂️ Autonomous Research Agent")
@@ -15,19 +17,14 @@ st.header("🕵️‍♂️ Autonomous Research Agent")
 deepseek_api_key = configure_api_key()
 try:
     serpapi_api_key = configure_serpapi_key()
-    search = SerpAPIWrapper(serpapi_api_key=serpapi_api_key)
+    search = CachedSearch(SerpAPIWrapper(serpapi_api_key=serpapi_api_key), provider="serpapi")
     search_enabled = True
 except:
     st.error("SerpAPI Key is required for this agent. Please set it in the sidebar.")
     search_enabled = False
 
 # 2. LLM Setup
-llm = ChatOpenAI(
-    model_name="deepseek-chat",
-    openai_api_key=deepseek_api_key,
-    openai_api_base="https://api.deepseek.com",
-    temperature=0.4
-)
+llm = get_llm(deepseek_api_key, temperature=0.4)
 
 # 3. Chains
 # --- Planner ---
@@ -52,7 +49,8 @@ summarizer_prompt = ChatPromptTemplate.from_template(
     Cite the source index like [1], [2] if possible.
     """
 )
-summarizer_chain = summarizer_prompt | llm | StrOutputParser()
+# Summaries run via ainvoke inside asyncio.run(), so run_research builds the
+# chain on an async_llm opened for that event loop
 
 # --- Writer ---
 writer_prompt = ChatPromptTemplate.from_template(
@@ -73,6 +71,46 @@ writer_prompt = ChatPromptTemplate.from_template(
 )
 writer_chain = writer_prompt | llm | StrOutputParser()
 
+# --- Parallel Research Pipeline ---
+SEARCH_RATE = 2.0  # search calls per second (burst = same)
+LLM_RATE = 3.0     # summarizer calls per second
+
+async def research_question(question, summarizer_chain, search_bucket, llm_bucket):
+    """Search + summarize one sub-question under the shared rate limiters."""
+    await search_bucket.acquire()
+    # SerpAPIWrapper's arun returns a string summary usually
+    results = await search.arun(question)
+    await llm_bucket.acquire()
+    return await summarizer_chain.ainvoke({"question": question, "results": results})
+
+async def run_research(plan, status_container):
+    """
+    Research all sub-questions concurrently. Each finding is written to the
+    status container as soon as it completes; findings are returned in plan order.
+    """
+    search_bucket = AsyncTokenBucket(SEARCH_RATE)
+    llm_bucket = AsyncTokenBucket(LLM_RATE)
+
+    async with async_llm(deepseek_api_key, temperature=0.4) as summarizer_llm:
+        summarizer_chain = summarizer_prompt | summarizer_llm | StrOutputParser()
+
+        async def indexed(i, question):
+            try:
+                return i, await research_question(question, summarizer_chain, search_bucket, llm_bucket), None
+            except Exception as e:
+                return i, None, e
+
+        findings = [None] * len(plan)
+        tasks = [asyncio.create_task(indexed(i, q)) for i, q in enumerate(plan)]
+        for done in asyncio.as_completed(tasks):
+            i, summary, error = await done
+            if error is not None:
+                status_container.error(f"Search failed for '{plan[i]}': {error}")
+            else:
+                findings[i] = summary
+                status_container.write(f"📝 Findings for Q{i+1} recorded: {plan[i]}")
+    return findings
+
 # 4. UI
 with st.sidebar:
     st.info("Input a broad topic, and the Agent will plan, search, and write a report for you.")
@@ -92,27 +130,14 @@ if st.button("Start Research") and search_enabled and topic:
         plan = planner_chain.invoke({"topic": topic})
         status_container.write(f"✅ Generated Plan: {plan}")
         
-        # Step 2: Research Loop
-        aggregated_findings = ""
+        # Step 2: Parallel Research (searches + summaries run concurrently)
+        status_container.write(f"🌐 Researching {len(plan)} questions in parallel...")
+        findings = asyncio.run(run_research(plan, status_container))
         
-        for i, question in enumerate(plan):
-            status_container.write(f"🌐 Researching Step {i+1}/{len(plan)}: {question}")
-            
-            # Execute Search
-            try:
-                # SerpAPIWrapper's run method returns a string summary usually
-                results = search.run(question)
-                
-                # Expand on results if they are too short? Not strictly needed with SerpAPI summary
-                # Let's synthesize it
-                summary = summarizer_chain.invoke({"question": question, "results": results})
-                
+        aggregated_findings = ""
+        for question, summary in zip(plan, findings):
+            if summary is not None:
                 aggregated_findings += f"\n\n### Question: {question}\n{summary}\n"
-                status_container.write(f"📝 Findings for Q{i+1} recorded.")
-                time.sleep(1) # Be nice to API rates
-                
-            except Exception as e:
-                status_container.error(f"Search failed for '{question}': {e}")
         
         # Step 3: Writing
         status_container.write("✍️ Writing final report...")
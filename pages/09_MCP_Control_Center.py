@@ -1,12 +1,9 @@
 import streamlit as st
-import asyncio
 import json
 import os
 import shutil
-from mcp import ClientSession, StdioServerParameters
-from mcp.client.stdio import stdio_client
-# from mcp.client.sse import sse_client # Replaced by custom HTTP client
-from mcp_http_client import StatelessMcpSession
+from mcp_pool import get_mcp_manager
+from mcp_catalog import get_catalog_cache
 
 st.set_page_config(page_title="MCP Control Center", page_icon="🎛️", layout="wide")
 st.header("🎛️ MCP Control Center")
@@ -31,86 +28,10 @@ def load_config():
 
 config = load_config()
 
-# Helper to run async MCP calls
-# Helper to run async MCP calls
-async def connect_and_fetch(server_name, server_config):
-    # Strategy Pattern for Connection
-    if "url" in server_config:
-        # HTTP Stateless Connection
-        try:
-            async with StatelessMcpSession(server_config["url"]) as session:
-                await session.initialize()
-                # StatelessSession implements connect_and_fetch internally via list_xxx
-                
-                # Fetch Resources
-                try:
-                    resources_resp = await session.list_resources()
-                    resources = resources_resp.resources
-                except:
-                    resources = []
-                
-                # Fetch Tools
-                try:
-                    tools_resp = await session.list_tools()
-                    tools = tools_resp.tools
-                except:
-                    tools = []
-
-                return resources, tools
-        except Exception as e:
-            raise Exception(f"HTTP Connection failed: {e}")
-    elif "command" in server_config:
-        # Stdio Connection
-        server_params = StdioServerParameters(
-            command=server_config["command"],
-            args=server_config["args"],
-            env={**os.environ, **server_config.get("env", {})}
-        )
-        async with stdio_client(server_params) as (read, write):
-             async with ClientSession(read, write) as session:
-                await session.initialize()
-                return await _fetch_internal(session)
-    else:
-        raise ValueError("Invalid config: Missing 'command' or 'url'")
-
-
-async def run_tool(server_name, server_config, tool_name, tool_args):
-    if "url" in server_config:
-         async with StatelessMcpSession(server_config["url"]) as session:
-                await session.initialize()
-                return await session.call_tool(tool_name, arguments=tool_args)
-    elif "command" in server_config:
-        server_params = StdioServerParameters(
-            command=server_config["command"],
-            args=server_config["args"],
-            env={**os.environ, **server_config.get("env", {})}
-        )
-        async with stdio_client(server_params) as (read, write):
-            async with ClientSession(read, write) as session:
-                await session.initialize()
-                result = await session.call_tool(tool_name, arguments=tool_args)
-                return result
-    else:
-        raise ValueError("Invalid config: Missing 'command' or 'url'")
-
-async def read_resource(server_name, server_config, resource_uri):
-     if "url" in server_config:
-        async with StatelessMcpSession(server_config["url"]) as session:
-                await session.initialize()
-                return await session.read_resource(resource_uri)
-     elif "command" in server_config:
-         server_params = StdioServerParameters(
-            command=server_config["command"],
-            args=server_config["args"],
-            env={**os.environ, **server_config.get("env", {})}
-        )
-         async with stdio_client(server_params) as (read, write):
-            async with ClientSession(read, write) as session:
-                await session.initialize()
-                result = await session.read_resource(resource_uri)
-                return result
-     else:
-         raise ValueError("Invalid config: Missing 'command' or 'url'")
+# MCP calls go through the process-wide connection manager (warm session pool)
+# and catalogs are served from the process-wide catalog cache
+mcp_manager = get_mcp_manager()
+catalog_cache = get_catalog_cache()
 
 # 2. Tabs
 tab_servers, tab_resources, tab_tools, tab_context = st.tabs([
@@ -127,14 +48,17 @@ with tab_servers:
         server_names = list(config["mcpServers"].keys())
         selected_server = st.selectbox("Select Server", server_names)
         
+        force_refresh = st.checkbox("Bypass catalog cache", value=False, help="Re-discover tools/resources even if a cached catalog is still fresh.")
         if st.button("Connect & Refresh"):
             if selected_server:
                 with st.spinner(f"Connecting to {selected_server}..."):
                     try:
-                        resources, tools = asyncio.run(connect_and_fetch(
+                        catalog = catalog_cache.get(
                             selected_server, 
-                            config["mcpServers"][selected_server]
-                        ))
+                            config["mcpServers"][selected_server],
+                            refresh=force_refresh
+                        )
+                        resources, tools = catalog.resources, catalog.tools
                         st.session_state.mcp_resources = resources
                         st.session_state.mcp_tools = tools
                         st.session_state.last_connected_server = selected_server
@@ -147,6 +71,12 @@ with tab_servers:
                         if "npx" in cmd:
                              if not shutil.which("npx"):
                                  st.warning("`npx` not found. Is Node.js installed?")
+
+        if st.button("♻️ Restart Server Sessions"):
+            if selected_server:
+                mcp_manager.restart(selected_server)
+                catalog_cache.invalidate(selected_server)
+                st.success(f"Pooled sessions for {selected_server} closed. Next call starts fresh.")
     
     with col2:
         if selected_server:
@@ -168,11 +98,11 @@ with tab_resources:
                     # Read content
                     try:
                         with st.spinner("Reading content..."):
-                             content_result = asyncio.run(read_resource(
+                             content_result = mcp_manager.read_resource(
                                  st.session_state.last_connected_server,
                                  config["mcpServers"][st.session_state.last_connected_server],
                                  res.uri
-                             ))
+                             )
                              # Assuming content is text for now
                              text = content_result.contents[0].text
                              st.session_state.context_context.append({
@@ -234,12 +164,12 @@ with tab_tools:
                             else:
                                 cleaned_args[k] = v
 
-                        result = asyncio.run(run_tool(
+                        result = mcp_manager.call_tool(
                             st.session_state.last_connected_server,
                             config["mcpServers"][st.session_state.last_connected_server],
                             selected_tool_name,
                             cleaned_args
-                        ))
+                        )
                         st.session_state.latest_tool_result = {
                             "tool": selected_tool_name,
                             "result": result
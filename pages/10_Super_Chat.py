@@ -3,25 +3,21 @@ import json
 import time
 from datetime import datetime
 
-from langchain_openai import ChatOpenAI
+from llm_client import async_llm, get_llm
 from langchain_classic.agents import AgentExecutor, create_tool_calling_agent
-from langchain_classic.memory import ConversationBufferMemory
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.tools import Tool, tool
-from langchain_community.callbacks.streamlit import StreamlitCallbackHandler
 from langchain_community.utilities import SerpAPIWrapper
 
 from utils import configure_api_key, configure_serpapi_key
-import asyncio
+from async_agent import InlineStreamlitCallbackHandler, invoke_concurrent, with_timeout
+from disk_cache import CachedSearch
+from conversation_memory import AttachmentStore, build_summary_memory
 import os
 import io
 import pandas as pd
-from pypdf import PdfReader
-from mcp import ClientSession, StdioServerParameters
-from mcp.client.stdio import stdio_client
-# from mcp.client.sse import sse_client
-from mcp_http_client import StatelessMcpSession
-from langchain_core.tools import StructuredTool
+from pdf_extract import extract_pdf_text
+from mcp_catalog import get_catalog_cache
 
 st.set_page_config(page_title="Super Chat", page_icon="🦸‍♂️", layout="wide")
 
@@ -43,6 +39,9 @@ st.markdown("""
 st.header("🦸‍♂️ Super Chat")
 st.caption("One Agent. Infinite Possibilities. (Search + MCP + Vision + Memory)")
 
+WEB_SEARCH_TIMEOUT = 30  # seconds per WebSearch call on the async agent path
+HISTORY_TOKEN_BUDGET = 3000  # recent turns kept verbatim; older turns are summarized
+
 # ==============================================================================
 # 1. HELPER FUNCTIONS (Must be defined before usage)
 # ==============================================================================
@@ -51,11 +50,8 @@ def process_uploaded_file(uploaded_file):
     """Extract text content from uploaded file."""
     try:
         if uploaded_file.type == "application/pdf":
-            reader = PdfReader(uploaded_file)
-            text = ""
-            for page in reader.pages:
-                text += page.extract_text() + "\n"
-            return text
+            # Parallel page extraction, cached by file hash
+            return extract_pdf_text(uploaded_file.getvalue())
         elif uploaded_file.type == "text/csv":
             df = pd.read_csv(uploaded_file)
             return df.to_markdown(index=False)
@@ -69,37 +65,16 @@ def process_uploaded_file(uploaded_file):
 def get_serp_tool():
     try:
         serp_key = configure_serpapi_key()
-        search = SerpAPIWrapper(serpapi_api_key=serp_key)
+        search = CachedSearch(SerpAPIWrapper(serpapi_api_key=serp_key), provider="serpapi")
         return Tool(
             name="WebSearch",
             func=search.run,
+            coroutine=with_timeout(search.arun, WEB_SEARCH_TIMEOUT, "WebSearch"),
             description="Useful for searching the internet for current events and facts."
         )
     except:
         return None
 
-async def run_tool_async(server_config, tool_name, tool_args):
-    """Bridge for running MCP tools (HTTP or Stdio)."""
-    if "url" in server_config:
-        # HTTP Stateless Connection
-        async with StatelessMcpSession(server_config["url"]) as session:
-            await session.initialize()
-            return await session.call_tool(tool_name, arguments=tool_args)
-                
-    elif "command" in server_config:
-        # Stdio Connection
-        server_params = StdioServerParameters(
-            command=server_config["command"],
-            args=server_config["args"],
-            env={**os.environ, **server_config.get("env", {})}
-        )
-        async with stdio_client(server_params) as (read, write):
-            async with ClientSession(read, write) as session:
-                await session.initialize()
-                return await session.call_tool(tool_name, arguments=tool_args)
-    else:
-        raise ValueError("Invalid Server Config: Missing 'command' or 'url'")
-
 def get_mcp_tools(enable_mcp):
     if not enable_mcp:
         return []
@@ -117,29 +92,11 @@ def get_mcp_tools(enable_mcp):
         server_name = st.session_state.get("last_connected_server")
         if server_name and server_name in full_config["mcpServers"]:
             server_config = full_config["mcpServers"][server_name]
-            
-            for tool_obj in st.session_state.mcp_tools:
-                def create_wrapper(t_name, s_config):
-                    def wrapper(**kwargs):
-                        try:
-                            res = asyncio.run(run_tool_async(s_config, t_name, kwargs))
-                            results = []
-                            for c in res.content:
-                                if c.type == "text":
-                                    results.append(c.text)
-                                elif c.type == "image":
-                                    img_fmt = c.mimeType or "image/png"
-                                    results.append(f"![Generated Image](data:{img_fmt};base64,{c.data})")
-                            return "\n".join(results)
-                        except Exception as e:
-                            return f"Error executing tool {t_name}: {e}"
-                    return wrapper
-                
-                mcp_langchain_tools.append(StructuredTool.from_function(
-                    func=create_wrapper(tool_obj.name, server_config),
-                    name=tool_obj.name,
-                    description=f"{tool_obj.description} (MCP Tool from {server_name})"
-                ))
+            # Wrappers/schemas are cached process-wide; reruns do no MCP traffic
+            try:
+                mcp_langchain_tools = get_catalog_cache().langchain_tools(server_name, server_config)
+            except Exception as e:
+                st.sidebar.error(f"MCP catalog error: {e}")
     
     return mcp_langchain_tools 
 
@@ -149,6 +106,8 @@ def get_mcp_tools(enable_mcp):
 
 if "super_messages" not in st.session_state:
     st.session_state.super_messages = [{"role": "assistant", "content": "I am connected to all your systems. How can I help? 🦸‍♂️"}]
+if "super_attachments" not in st.session_state:
+    st.session_state.super_attachments = AttachmentStore()
 
 deepseek_api_key = configure_api_key()
 
@@ -164,7 +123,7 @@ with st.sidebar:
 # 3. TOOL LOADING & AGENT SETUP
 # ==============================================================================
 
-tools = []
+tools = [st.session_state.super_attachments.as_tool()]
 serp_tool = get_serp_tool()
 if serp_tool:
     tools.append(serp_tool)
@@ -188,15 +147,6 @@ with st.sidebar:
             mime="application/json"
         )
 
-# Setup LLM
-llm = ChatOpenAI(
-    model_name="deepseek-chat",
-    openai_api_key=deepseek_api_key,
-    openai_api_base="https://api.deepseek.com",
-    temperature=0.7,
-    streaming=True
-)
-
 # Prompt
 prompt = ChatPromptTemplate.from_messages([
     ("system", "You are a Super Assistant. You have access to Web Search, Image Generation, and other tools. "
@@ -207,17 +157,25 @@ prompt = ChatPromptTemplate.from_messages([
 ])
 
 if "super_memory" not in st.session_state:
-    st.session_state.super_memory = ConversationBufferMemory(return_messages=True, memory_key="chat_history")
+    st.session_state.super_memory = build_summary_memory(
+        get_llm(deepseek_api_key, temperature=0.7), max_token_limit=HISTORY_TOKEN_BUDGET,
+        memory_key="chat_history", input_key="input", output_key="output"
+    )
 
 # Construct Agent
-agent = create_tool_calling_agent(llm, tools, prompt)
-agent_executor = AgentExecutor(
-    agent=agent, 
-    tools=tools, 
-    verbose=True,
-    memory=st.session_state.super_memory,
-    handle_parsing_errors=True
-)
+# The agent runs via ainvoke inside a fresh asyncio.run() per turn, so it is
+# built per turn on an async_llm opened for that event loop
+def build_agent(llm):
+    # Summaries run on the turn's event loop too, so hand the memory this instance
+    st.session_state.super_memory.llm = llm
+    agent = create_tool_calling_agent(llm, tools, prompt)
+    return AgentExecutor(
+        agent=agent, 
+        tools=tools, 
+        verbose=True,
+        memory=st.session_state.super_memory,
+        handle_parsing_errors=True
+    )
 
 # ==============================================================================
 # 4. CHAT INTERFACE
@@ -237,7 +195,9 @@ if user_input := st.chat_input("Ask anything..."):
     if uploaded_file:
         with st.spinner("Processing file..."):
             file_content = process_uploaded_file(uploaded_file)
-            user_input += f"\n\n[Attached File: {uploaded_file.name}]\n{file_content}\n"
+            # Store once; the turn only carries a reference + excerpt
+            ref = st.session_state.super_attachments.add(uploaded_file.name, file_content)
+            user_input += f"\n\n{st.session_state.super_attachments.reference(ref)}\n"
             st.success(f"Attached {uploaded_file.name}")
 
     st.session_state.super_messages.append({"role": "user", "content": user_input})
@@ -245,12 +205,15 @@ if user_input := st.chat_input("Ask anything..."):
     
     with st.chat_message("assistant"):
         # UI: Thinking Container
-        st_callback = StreamlitCallbackHandler(st.container(), expand_new_thoughts=True)
+        st_callback = InlineStreamlitCallbackHandler(st.container(), expand_new_thoughts=True)
         
         try:
-            response = agent_executor.invoke(
+            # Async path: independent tool calls in one step run concurrently
+            response = invoke_concurrent(
+                async_llm(deepseek_api_key, temperature=0.7, streaming=True),
+                build_agent,
                 {"input": user_input},
-                {"callbacks": [st_callback]}
+                [st_callback]
             )
             output_text = response["output"]
             st.markdown(output_text, unsafe_allow_html=True)
@@ -3,10 +3,14 @@ import pandas as pd
 import akshare as ak
 import json
 from datetime import datetime
-from langchain_openai import ChatOpenAI
+from llm_client import get_llm
 from langchain_core.prompts import ChatPromptTemplate
 from utils import configure_api_key, configure_serper_api_key
 from langchain_community.utilities import GoogleSerperAPIWrapper
+from disk_cache import CachedSearch
+from fanout import fan_out, get_executor
+from feature_store import OHLCV, completed_bars, compute_features, get_feature_store
+from market_data import get_market_store
 
 st.set_page_config(page_title="Stock Analysis (AKShare)", page_icon="🇨🇳", layout="wide")
 
@@ -14,18 +18,23 @@ st.set_page_config(page_title="Stock Analysis (AKShare)", page_icon="🇨🇳",
 deepseek_api_key = configure_api_key()
 serper_api_key = configure_serper_api_key()
 
+# Per-source deadlines (seconds) for the concurrent deep-data fetch
+SOURCE_TIMEOUTS = {"hist": 15, "flow": 15, "fin": 20, "holders": 15, "news": 15, "serper": 20}
+
 # --- Helper Functions ---
 
-@st.cache_data(ttl=60)
 def get_a_share_spot():
-    """Fetch real-time spot data for ALL A-shares (for PE/PB/Turnover)."""
-    try:
-        # returns huge dataframe
-        df = ak.stock_zh_a_spot_em()
-        return df
-    except Exception as e:
-        st.error(f"AKShare Spot Data Error: {e}")
-        return pd.DataFrame()
+    """
+    Real-time spot data for ALL A-shares (for PE/PB/Turnover), read from the
+    process-wide snapshot kept fresh by the background refresher.
+    """
+    store = get_market_store()
+    snap = store.spot(wait=15)
+    if snap.empty:
+        st.error("AKShare Spot Data Error: 全市场快照暂不可用")
+    elif store.spot_stale():
+        st.warning(f"⚠️ 全市场快照已 {store.spot_age() / 60:.0f} 分钟未更新，估值/换手等数据可能已过时")
+    return snap
 
 @st.cache_data(ttl=60)
 def get_individual_spot(symbol):
@@ -106,14 +115,35 @@ def get_news(symbol):
 @st.cache_data(ttl=3600)
 def get_serper_news(symbol, name):
     try:
-        search = GoogleSerperAPIWrapper(serper_api_key=serper_api_key, type="news")
+        search = CachedSearch(
+            GoogleSerperAPIWrapper(serper_api_key=serper_api_key, type="news"),
+            provider="serper", params={"type": "news"}
+        )
         query = f"{name} {symbol} 股票 财经 新闻"
         results = search.results(query)
         # Serper news results are in 'news' key
         return results.get('news', [])
     except Exception as e:
-        st.sidebar.error(f"Serper Search Error: {e}")
-        return []
+        # Raised so the concurrent fetch reports it in the Sentiment tab
+        raise RuntimeError(f"Serper Search Error: {e}") from e
+
+def get_tech_features(symbol, hist_df, daily):
+    """
+    Indicator columns aligned to hist_df. Daily bars are read from the
+    precomputed feature store (built and tracked on first view); intraday
+    bars, and daily ones while today's bar is still forming, are computed on
+    the fly with the same definitions. Only completed bars are stored.
+    """
+    if not daily:
+        return compute_features(hist_df[OHLCV].astype(float))
+    store = get_feature_store()
+    complete = completed_bars(hist_df)
+    feats = store.read(symbol)
+    if not complete.empty and (feats is None or feats.index[-1] < complete.index[-1]):
+        feats = store.write(symbol, complete)
+    if feats is None or len(complete) < len(hist_df):
+        return compute_features(hist_df[OHLCV].astype(float))
+    return feats.reindex(hist_df.index)
 
 # --- UI Logic ---
 
@@ -137,12 +167,9 @@ if "ak_symbol" in st.session_state:
     # Find our stock
     target_row = None
     if not spot_df.empty:
-        mask = spot_df['代码'] == symbol
-        if mask.any():
-            target_row = spot_df[mask].iloc[0]
-            # Standardize column names if needed
-            # spot_em typical columns: 代码, 名称, 最新价, 涨跌幅, 市盈率-动态, 市净率, 总市值, 换手率, 量比, 振幅
-        else:
+        target_row = spot_df.row(symbol)
+        # Typed snapshot fields: 代码, 名称, 最新价, 涨跌幅, 市盈率-动态, 市净率, 总市值, 换手率, 量比, 振幅
+        if target_row is None:
             st.warning(f"全量行情中未涉及 {symbol}，尝试拉取单股数据...")
     
     if target_row is None:
@@ -205,18 +232,95 @@ if "ak_symbol" in st.session_state:
     timeframe = st.sidebar.radio("K线周期", ["日线 (Daily)", "5分钟 (Intraday)"])
     tech_indicators = st.sidebar.multiselect("叠加指标", ["MA (均线)", "RSI", "MACD", "BOLL"], default=["MA (均线)", "RSI"])
 
-    # --- Fetching Deep Data ---
-    with st.spinner("🔍 正在拉取 资金流向 & 深度财务..."):
-        if timeframe == "日线 (Daily)":
-            hist_df = get_daily_data(symbol)
-        else:
-            hist_df = get_intraday_data(symbol)
+    # --- Render helpers (one per data source) ---
+    def render_chart(hist_df):
+        if not hist_df.empty:
+            feats = get_tech_features(symbol, hist_df, timeframe == "日线 (Daily)")
+            c_data = hist_df[['close']].copy()
+            if "MA (均线)" in tech_indicators:
+                c_data['MA5'] = feats['sma_5']
+                c_data['MA20'] = feats['sma_20']
+            if "BOLL" in tech_indicators:
+                c_data['UP'] = feats['boll_up']
+                c_data['LOW'] = feats['boll_low']
+            st.line_chart(c_data)
             
-        fin_df = get_financials(symbol)
-        holders_df = get_holders(symbol)
-        flow_df = get_capital_flow(symbol)
-        news_df = get_news(symbol)
-        serper_news = get_serper_news(symbol, name)
+            # RSI
+            if "RSI" in tech_indicators:
+                st.caption("RSI (14)")
+                st.line_chart(feats['rsi_14'])
+        else:
+            st.write("暂无行情数据")
+
+    def render_flow(flow_df):
+        st.markdown("#### 💸 主力资金 (近5日)")
+        if not flow_df.empty:
+            # flow_df columns: 日期, 主力净流入-净额...
+            # Rename for chart
+            try:
+                f_chart = flow_df.head(5).copy() # usually sorted desc? check Akshare
+                # AKShare fund flow usually sorted by date asc or desc. assuming date is col '日期'
+                # Standardizing
+                if '日期' in f_chart.columns:
+                    f_chart['date'] = pd.to_datetime(f_chart['日期'])
+                    f_chart.set_index('date', inplace=True)
+                
+                if '主力净流入-净额' in f_chart.columns:
+                    # Convert to 10k or M
+                    # Data might be raw float/str
+                    # Let's clean
+                    def clean_float(x):
+                        try: return float(x)
+                        except: return 0.0
+                    
+                    f_chart['NetFlow'] = f_chart['主力净流入-净额'].apply(clean_float)
+                    st.bar_chart(f_chart['NetFlow'])
+                    
+                    last_flow = f_chart.iloc[-1]['NetFlow']
+                    color_f = "red" if last_flow > 0 else "green"
+                    st.metric("最新主力净流入", f"{last_flow/10000:.2f}万", delta_color="inverse")
+            except Exception as e:
+                st.error(f"资金数据解析错误: {e}")
+        else:
+            st.info("暂无主力资金数据")
+
+    def render_financials(fin_df):
+        st.markdown("#### 💰 财务摘要 (Abstract)")
+        if not fin_df.empty:
+           st.dataframe(fin_df.head(5))
+        else:
+           st.write("无数据")
+
+    def render_holders(holders_df):
+        st.markdown("#### 👥 机构/大股东持仓")
+        if not holders_df.empty:
+            st.dataframe(holders_df.head(10))
+        else:
+            st.write("无数据")
+
+    def render_ak_news(news_df):
+        st.markdown(f"#### 🏛️ 东方财富 (AKShare)")
+        if not news_df.empty:
+            for idx, row in news_df.head(10).iterrows():
+                title = row.get('新闻标题', '无标题')
+                date = row.get('发布时间', '-')
+                url = row.get('文章链接', '#')
+                st.markdown(f"- [{title}]({url}) ` {date} `")
+        else:
+            st.info("暂无 AKShare 舆情")
+
+    def render_serper_news(serper_news):
+        st.markdown(f"#### 🌎 全网搜索 (Serper.dev)")
+        if serper_news:
+            for item in serper_news[:10]:
+                title = item.get('title', '无标题')
+                date = item.get('date', '-')
+                url = item.get('link', '#')
+                source = item.get('source', 'Unknown')
+                st.markdown(f"- [{title}]({url})")
+                st.caption(f"来源: {source} | 时间: {date}")
+        else:
+            st.info("暂无 Serper 搜索结果")
 
     # --- 5-Dim Tabs ---
     tab_tc, tab_vf, tab_se, tab_ai = st.tabs(["📈 技术 & 资金 (Tech/Cap)", "🏢 基本面 & 估值 (Fund/Val)", "📰 情绪 & 概念 (Sent)", "🤖 AI 五维评分 (Report)"])
@@ -224,65 +328,9 @@ if "ak_symbol" in st.session_state:
     # 1. Tech & Capital
     with tab_tc:
         st.subheader(f"📈 走势与主力资金 ({timeframe})")
-        
         col_chart, col_flow = st.columns([3, 1])
-        
-        with col_chart:
-            if not hist_df.empty:
-                c_data = hist_df[['close']].copy()
-                if "MA (均线)" in tech_indicators:
-                    c_data['MA5'] = c_data['close'].rolling(5).mean()
-                    c_data['MA20'] = c_data['close'].rolling(20).mean()
-                if "BOLL" in tech_indicators:
-                    r = c_data['close'].rolling(20)
-                    c_data['UP'] = r.mean() + 2*r.std()
-                    c_data['LOW'] = r.mean() - 2*r.std()
-                st.line_chart(c_data)
-                
-                # RSI
-                if "RSI" in tech_indicators:
-                    st.caption("RSI (14)")
-                    delta = hist_df['close'].diff()
-                    up, down = delta.copy(), delta.copy()
-                    up[up < 0] = 0
-                    down[down > 0] = 0
-                    rs = up.rolling(14).mean() / down.abs().rolling(14).mean()
-                    rsi = 100 - 100 / (1 + rs)
-                    st.line_chart(rsi)
-            else:
-                st.write("暂无行情数据")
-        
-        with col_flow:
-            st.markdown("#### 💸 主力资金 (近5日)")
-            if not flow_df.empty:
-                # flow_df columns: 日期, 主力净流入-净额...
-                # Rename for chart
-                try:
-                    f_chart = flow_df.head(5).copy() # usually sorted desc? check Akshare
-                    # AKShare fund flow usually sorted by date asc or desc. assuming date is col '日期'
-                    # Standardizing
-                    if '日期' in f_chart.columns:
-                        f_chart['date'] = pd.to_datetime(f_chart['日期'])
-                        f_chart.set_index('date', inplace=True)
-                    
-                    if '主力净流入-净额' in f_chart.columns:
-                        # Convert to 10k or M
-                        # Data might be raw float/str
-                        # Let's clean
-                        def clean_float(x):
-                            try: return float(x)
-                            except: return 0.0
-                        
-                        f_chart['NetFlow'] = f_chart['主力净流入-净额'].apply(clean_float)
-                        st.bar_chart(f_chart['NetFlow'])
-                        
-                        last_flow = f_chart.iloc[-1]['NetFlow']
-                        color_f = "red" if last_flow > 0 else "green"
-                        st.metric("最新主力净流入", f"{last_flow/10000:.2f}万", delta_color="inverse")
-                except Exception as e:
-                    st.error(f"资金数据解析错误: {e}")
-            else:
-                st.info("暂无主力资金数据")
+        slot_hist = col_chart.empty()
+        slot_flow = col_flow.empty()
 
     # 2. Fund & Valuation
     with tab_vf:
@@ -296,50 +344,47 @@ if "ak_symbol" in st.session_state:
         st.divider()
         
         kf1, kf2 = st.columns(2)
-        with kf1:
-            st.markdown("#### 💰 财务摘要 (Abstract)")
-            if not fin_df.empty:
-               st.dataframe(fin_df.head(5))
-            else:
-               st.write("无数据")
-        
-        with kf2:
-            st.markdown("#### 👥 机构/大股东持仓")
-            if not holders_df.empty:
-                st.dataframe(holders_df.head(10))
-            else:
-                st.write("无数据")
+        slot_fin = kf1.empty()
+        slot_holders = kf2.empty()
 
     # 3. Sentiment
     with tab_se:
         st.subheader("📰 市场情绪 & 概念")
-        
         # Two columns for news sources
         col_ak, col_serp = st.columns(2)
-        
-        with col_ak:
-            st.markdown(f"#### 🏛️ 东方财富 (AKShare)")
-            if not news_df.empty:
-                for idx, row in news_df.head(10).iterrows():
-                    title = row.get('新闻标题', '无标题')
-                    date = row.get('发布时间', '-')
-                    url = row.get('文章链接', '#')
-                    st.markdown(f"- [{title}]({url}) ` {date} `")
-            else:
-                st.info("暂无 AKShare 舆情")
-
-        with col_serp:
-            st.markdown(f"#### 🌎 全网搜索 (Serper.dev)")
-            if serper_news:
-                for item in serper_news[:10]:
-                    title = item.get('title', '无标题')
-                    date = item.get('date', '-')
-                    url = item.get('link', '#')
-                    source = item.get('source', 'Unknown')
-                    st.markdown(f"- [{title}]({url})")
-                    st.caption(f"来源: {source} | 时间: {date}")
-            else:
-                st.info("暂无 Serper 搜索结果")
+        slot_news = col_ak.empty()
+        slot_serper = col_serp.empty()
+
+    # --- Fetching Deep Data (concurrent, per-source timeouts) ---
+    # Each section renders as soon as its source returns; a slow or failing
+    # source only degrades its own section.
+    sources = {
+        "hist": (get_daily_data if timeframe == "日线 (Daily)" else get_intraday_data, (symbol,), slot_hist, render_chart, pd.DataFrame()),
+        "flow": (get_capital_flow, (symbol,), slot_flow, render_flow, pd.DataFrame()),
+        "fin": (get_financials, (symbol,), slot_fin, render_financials, pd.DataFrame()),
+        "holders": (get_holders, (symbol,), slot_holders, render_holders, pd.DataFrame()),
+        "news": (get_news, (symbol,), slot_news, render_ak_news, pd.DataFrame()),
+        "serper": (get_serper_news, (symbol, name), slot_serper, render_serper_news, []),
+    }
+    for key, (_, _, slot, _, _) in sources.items():
+        slot.info("⏳ 加载中...")
+
+    data = {key: spec[4] for key, spec in sources.items()}
+    tasks = {key: (lambda fn=spec[0], args=spec[1]: fn(*args)) for key, spec in sources.items()}
+    # Own pool: AKShare sources that hang here cannot starve other pages' fetches
+    for key, status, value in fan_out(tasks, timeouts=SOURCE_TIMEOUTS, executor=get_executor("stock-analysis", 8)):
+        _, _, slot, render, _ = sources[key]
+        if status == 'ok':
+            data[key] = value
+            with slot.container():
+                render(value)
+        elif status == 'timeout':
+            slot.warning(f"⏱️ 数据源超时 (>{SOURCE_TIMEOUTS.get(key, 15)}s)，已跳过")
+        else:
+            slot.error(f"数据源错误: {value}")
+
+    hist_df, flow_df, fin_df = data["hist"], data["flow"], data["fin"]
+    holders_df, news_df, serper_news = data["holders"], data["news"], data["serper"]
 
     # 4. AI 5-Dim Report
     with tab_ai:
@@ -382,12 +427,7 @@ if "ak_symbol" in st.session_state:
                 风格: 犀利、客观、机构视角。
                 """)
                 
-                llm = ChatOpenAI(
-                    model_name="deepseek-chat",
-                    openai_api_key=deepseek_api_key,
-                    openai_api_base="https://api.deepseek.com",
-                    temperature=0.7
-                )
+                llm = get_llm(deepseek_api_key, temperature=0.7)
                 
                 chain = prompt | llm
                 resp = chain.invoke({
@@ -4,7 +4,10 @@ from datetime import datetime, timedelta
 import os
 
 from data_loader import DataLoader
+import robustness
 from backtest_engine import BacktestEngine
+from execution_model import AShareRules
+from llm_client import StreamStats, get_llm, stream_text
 from strategies.ma_strategy import AdvancedMaStrategy
 from strategies.macd_strategy import MacdStrategy
 from strategies.bollinger_strategy import BollingerStrategy
@@ -13,9 +16,9 @@ from strategies.turtle_strategy import TurtleStrategy
 from strategies.kdj_strategy import KdjStrategy
 from strategies.dual_thrust_strategy import DualThrustStrategy
 from strategies.composite_strategy import CompositeStrategy
-from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
 from utils import configure_api_key
+from downsample import lttb_series
 
 st.set_page_config(page_title="Backtest Lab Pro", page_icon="🧪", layout="wide")
 
@@ -171,6 +174,8 @@ with st.sidebar:
     initial_cash = st.number_input("初始资金", 10000, 1000000, 100000)
     pos_size_pct = st.slider("仓位控制 (Position Size %)", 10, 100, 95, help="每次交易使用的资金比例")
     commission = st.number_input("佣金率 (%)", 0.0, 1.0, 0.1) / 100
+    use_ashare = st.checkbox("A股交易规则", value=False, help="T+1、100股整手、卖出印花税、最低佣金5元、涨跌停无法成交、滑点")
+    slippage = st.number_input("滑点 (%)", 0.0, 1.0, 0.1, disabled=not use_ashare) / 100
 
 # --- Main Execution ---
 
@@ -185,7 +190,9 @@ if st.button("🚀 启动任务", use_container_width=True):
     
     st.success(f"成功加载 {len(df)} 条历史蜡烛图数据")
     
-    engine = BacktestEngine(initial_cash=initial_cash, commission=commission)
+    rules = AShareRules.for_symbol(symbol, loader.get_stock_name(symbol), commission=commission,
+                                    slippage=slippage) if use_ashare else None
+    engine = BacktestEngine(initial_cash=initial_cash, commission=commission, rules=rules)
     
     if mode == "批量策略分析 (Batch)":
         # 2. Run Batch Analysis
@@ -200,6 +207,7 @@ if st.button("🚀 启动任务", use_container_width=True):
         ]
         
         results = []
+        robustness_lines = []
         with st.spinner("🕵️ 正在进行全策略扫描..."):
             for name, cls, params in strategies_to_test:
                 try:
@@ -208,70 +216,29 @@ if st.button("🚀 启动任务", use_container_width=True):
                     sharpe = strat_obj.analyzers.sharpe.get_analysis().get('sharperatio', 0) or 0
                     max_dd = strat_obj.analyzers.drawdown.get_analysis().max.drawdown
                     ret_pct = ((res['final_value'] - initial_cash) / initial_cash) * 100
+                    rob = robustness.analyze(res['equity_curve'].values, strat_obj.trade_pnls, initial_cash)
+                    robustness_lines.append(robustness.format_report(name, rob))
                     
                     results.append({
                         "策略": name,
                         "累计收益 %": f"{ret_pct:.2f}%",
                         "夏普比率": f"{sharpe:.2f}",
                         "最大回撤 %": f"{max_dd:.2f}%",
+                        "收益 90% 区间": f"{rob['total_return'][0]*100:.1f}% ~ {rob['total_return'][2]*100:.1f}%" if rob else "-",
+                        "回撤 90% 区间": f"{rob['max_drawdown'][0]*100:.1f}% ~ {rob['max_drawdown'][2]*100:.1f}%" if rob else "-",
                         "期末价值": f"¥{res['final_value']:,.2f}",
                         "_ret": ret_pct # for AI
                     })
                 except Exception as e:
                     st.warning(f"策略 {name} 运行失败: {e}")
         
-        # Display Results
-        res_df = pd.DataFrame(results)
-        st.subheader("📋 全策略表现对比")
-        st.table(res_df.drop(columns=['_ret']))
-        
-        # Manual AI Analysis Button
-        st.divider()
-        deepseek_api_key = configure_api_key()
-        if deepseek_api_key:
-            if st.button("🤖 生成 AI 策略诊断报告", use_container_width=True):
-                with st.spinner("🤖 AI 正在深度剖析结果..."):
-                    try:
-                        llm = ChatOpenAI(
-                            model='deepseek-chat',
-                            openai_api_key=deepseek_api_key,
-                            openai_api_base='https://api.deepseek.com/v1',
-                            max_tokens=1000
-                        )
-                        
-                        prompt = ChatPromptTemplate.from_template("""
-                        你是一位资深的量化策略分析师。请分析以下针对股票代码 {symbol} 的多种量化策略回测结果。
-                        
-                        回测数据如下：
-                        {results_table}
-                        
-                        请提供以下分析：
-                        1. 表现最好的策略是什么？它的优势在于捕捉了什么样的行情特征？
-                        2. 考虑到收益率、回撤和风险比（夏普），你最推荐哪一个策略？
-                        3. 基于数据，你对该股票目前的投资建议是什么（仅供参考）？
-                        4. 建议用户如何针对目前的行情微调参数？
-                        
-                        请使用 Markdown 格式输出，语言简洁专业。
-                        """)
-                        
-                        chain = prompt | llm
-                        ai_response = chain.invoke({
-                            "symbol": symbol,
-                            "results_table": res_df.to_markdown()
-                        })
-                        
-                        st.divider()
-                        st.header("🤖 AI 策略诊断报告")
-                        st.markdown(ai_response.content)
-                        
-                        # Report Download
-                        st.divider()
-                        full_report = f"# {symbol} 批量回测分析报告\n\n## 策略对比\n\n{res_df.to_markdown()}\n\n## AI 诊断\n\n{ai_response.content}"
-                        st.download_button("📥 下载完整 AI 分析报告", data=full_report, file_name=f"AI_Analysis_{symbol}.md")
-                    except Exception as ex:
-                        st.error(f"AI 分析生成失败: {ex}")
-        else:
-            st.warning("未配置 DeepSeek API Key，无法生成 AI 诊断报告。请在侧边栏配置。")
+        # Persist so the report button survives its own rerun
+        st.session_state.batch_results = {
+            "symbol": symbol,
+            "res_df": pd.DataFrame(results),
+            "robustness": "\n".join(robustness_lines)
+        }
+        st.session_state.batch_report = None
 
 
     elif mode == "标准回测 (Single)":
@@ -308,7 +275,8 @@ if st.button("🚀 启动任务", use_container_width=True):
         st.subheader("📈 资金权益曲线")
         equity_curve = res.get('equity_curve')
         if equity_curve is not None and not equity_curve.empty:
-            st.line_chart(equity_curve)
+            # LTTB keeps the curve's shape while bounding the points sent to the browser
+            st.line_chart(lttb_series(equity_curve))
         else:
             st.info("No equity data available.")
 
@@ -377,7 +345,7 @@ if st.button("🚀 启动任务", use_container_width=True):
             best = display_df.iloc[0]
             st.success(f"最优组合回报: ¥{best['final_value']:,.2f} | Sharpe: {best['sharpe']:.2f}")
 
-else:
+elif not (mode == "批量策略分析 (Batch)" and st.session_state.get("batch_results")):
     # Empty State
     st.info("👆 请在侧边栏选择参数并点击 '启动任务'")
     st.image("https://backtrader.com/images/logo.png", width=100)
@@ -388,3 +356,65 @@ else:
     - **参数优化**: 支持多维网格搜索，自动寻找最优周期。
     - **持久化**: 自动缓存拉取过的数据，减少二次加载时间。
     """)
+
+# --- Batch Results & AI Report (outside the run button so it survives reruns) ---
+batch = st.session_state.get("batch_results")
+if mode == "批量策略分析 (Batch)" and batch:
+    symbol, res_df = batch["symbol"], batch["res_df"]
+
+    # Display Results
+    st.subheader("📋 全策略表现对比")
+    st.table(res_df.drop(columns=['_ret']))
+    
+    # Manual AI Analysis Button
+    st.divider()
+    deepseek_api_key = configure_api_key()
+    if deepseek_api_key:
+        if st.button("🤖 生成 AI 策略诊断报告", use_container_width=True):
+            st.divider()
+            st.header("🤖 AI 策略诊断报告")
+            st.button("⏹️ 停止生成", help="中断当前生成")
+            try:
+                llm = get_llm(deepseek_api_key, max_tokens=1000)
+                
+                prompt = ChatPromptTemplate.from_template("""
+                你是一位资深的量化策略分析师。请分析以下针对股票代码 {symbol} 的多种量化策略回测结果。
+                
+                回测数据如下：
+                {results_table}
+                
+                稳健性分析（日收益块自助法 + 交易顺序重排，90% 置信区间）：
+                {robustness}
+                
+                请提供以下分析（结合置信区间判断结果是否稳健）：
+                1. 表现最好的策略是什么？它的优势在于捕捉了什么样的行情特征？
+                2. 考虑到收益率、回撤和风险比（夏普），你最推荐哪一个策略？
+                3. 基于数据，你对该股票目前的投资建议是什么（仅供参考）？
+                4. 建议用户如何针对目前的行情微调参数？
+                
+                请使用 Markdown 格式输出，语言简洁专业。
+                """)
+                
+                chain = prompt | llm
+                stats = StreamStats()
+                report = st.write_stream(stream_text(chain, {
+                    "symbol": symbol,
+                    "results_table": res_df.to_markdown(),
+                    "robustness": batch["robustness"]
+                }, stats))
+                st.caption(stats.caption())
+                st.session_state.batch_report = report
+            except Exception as ex:
+                st.error(f"AI 分析生成失败: {ex}")
+        elif st.session_state.get("batch_report"):
+            st.divider()
+            st.header("🤖 AI 策略诊断报告")
+            st.markdown(st.session_state.batch_report)
+
+        if st.session_state.get("batch_report"):
+            # Report Download
+            st.divider()
+            full_report = f"# {symbol} 批量回测分析报告\n\n## 策略对比\n\n{res_df.to_markdown()}\n\n## AI 诊断\n\n{st.session_state.batch_report}"
+            st.download_button("📥 下载完整 AI 分析报告", data=full_report, file_name=f"AI_Analysis_{symbol}.md")
+    else:
+        st.warning("未配置 DeepSeek API Key，无法生成 AI 诊断报告。请在侧边栏配置。")
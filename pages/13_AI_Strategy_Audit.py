@@ -1,11 +1,13 @@
 import streamlit as st
 import pandas as pd
 from datetime import datetime, timedelta
-from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
 
 from data_loader import DataLoader
+import robustness
 from backtest_engine import BacktestEngine
+from execution_model import AShareRules
+from llm_client import StreamStats, get_llm, stream_text
 from utils import configure_api_key
 
 # Import all strategies
@@ -40,6 +42,7 @@ with st.sidebar:
     initial_cash = st.number_input("初始资金", 10000, 1000000, 100000)
     pos_size_pct = st.slider("仓位控制 (%)", 10, 100, 95)
     commission = st.number_input("佣金率 (%)", 0.0, 1.0, 0.1) / 100
+    use_ashare = st.checkbox("A股交易规则", value=False, help="T+1、100股整手、卖出印花税、最低佣金5元、涨跌停无法成交、滑点")
 
 # --- Main App ---
 st.info("""
@@ -58,7 +61,8 @@ if st.button("🚀 开启全维度诊断", use_container_width=True):
         st.error("数据加载失败。")
         st.stop()
     
-    engine = BacktestEngine(initial_cash=initial_cash, commission=commission)
+    rules = AShareRules.for_symbol(symbol, loader.get_stock_name(symbol), commission=commission) if use_ashare else None
+    engine = BacktestEngine(initial_cash=initial_cash, commission=commission, rules=rules)
     
     # 2. Define Strategies
     strategies_to_test = [
@@ -73,6 +77,7 @@ if st.button("🚀 开启全维度诊断", use_container_width=True):
     
     # 3. Batch Backtest
     results = []
+    robustness_lines = []
     progress_bar = st.progress(0)
     for i, (name, cls, params) in enumerate(strategies_to_test):
         with st.status(f"正在运行策略: {name}...", expanded=False):
@@ -82,12 +87,16 @@ if st.button("🚀 开启全维度诊断", use_container_width=True):
                 sharpe = strat_obj.analyzers.sharpe.get_analysis().get('sharperatio', 0) or 0
                 max_dd = strat_obj.analyzers.drawdown.get_analysis().max.drawdown
                 ret_pct = ((res['final_value'] - initial_cash) / initial_cash) * 100
+                rob = robustness.analyze(res['equity_curve'].values, strat_obj.trade_pnls, initial_cash)
+                robustness_lines.append(robustness.format_report(name, rob))
                 
                 results.append({
                     "策略名称": name,
                     "累计收益 %": f"{ret_pct:.2f}%",
                     "夏普比率": f"{sharpe:.2f}",
                     "最大回撤 %": f"{max_dd:.2f}%",
+                    "收益 90% 区间": f"{rob['total_return'][0]*100:.1f}% ~ {rob['total_return'][2]*100:.1f}%" if rob else "-",
+                    "回撤 90% 区间": f"{rob['max_drawdown'][0]*100:.1f}% ~ {rob['max_drawdown'][2]*100:.1f}%" if rob else "-",
                     "期末价值": f"¥{res['final_value']:,.2f}",
                     "_raw_ret": ret_pct
                 })
@@ -95,8 +104,19 @@ if st.button("🚀 开启全维度诊断", use_container_width=True):
                 st.warning(f"{name} 运行中遇到小插曲: {e}")
         progress_bar.progress((i + 1) / len(strategies_to_test))
 
+    # Persist so the report button below survives its own rerun
+    st.session_state.audit_results = {
+        "symbol": symbol,
+        "res_df": pd.DataFrame(results),
+        "robustness": "\n".join(robustness_lines)
+    }
+    st.session_state.audit_report = None
+
+audit = st.session_state.get("audit_results")
+if audit:
+    symbol, res_df = audit["symbol"], audit["res_df"]
+
     # 4. Display Summary Table
-    res_df = pd.DataFrame(results)
     st.divider()
     st.subheader("📊 扫描结果汇总")
     st.dataframe(res_df.drop(columns=['_raw_ret']), use_container_width=True)
@@ -106,47 +126,52 @@ if st.button("🚀 开启全维度诊断", use_container_width=True):
     api_key = configure_api_key()
     if api_key:
         if st.button("🤖 生成 AI 策略诊断报告", use_container_width=True):
-            with st.spinner("🤖 AI 正在对上述数据进行深度建模与逻辑推理..."):
-                try:
-                    llm = ChatOpenAI(
-                        model='deepseek-chat',
-                        openai_api_key=api_key,
-                        openai_api_base='https://api.deepseek.com/v1',
-                        max_tokens=1500
-                    )
-                    
-                    prompt = ChatPromptTemplate.from_template("""
-                    你是一位资深的量化策略分析师。请分析以下针对股票代码 {symbol} 的多种量化策略回测结果。
-                    
-                    回测数据汇总：
-                    {results_table}
-                    
-                    请提供深入的专业诊断方案：
-                    1. **冠军解读**：识别表现最好的策略，从指标原理和该时间段的股价形态（趋势/震荡）解释其胜出的原因。
-                    2. **风险评估**：重点分析最大回撤，识别哪些策略在这种行情下表现得过于脆弱。
-                    3. **资产配置建议**：如果你是投资经理，你会如何通过整合这些信号来操作这只股票？
-                    4. **参数优化建议**：针对当前发现的缺陷，建议调优哪些具体参数？
-                    5. **总结性评分**：给这只股票基于目前各策略的响应情况打分（1-10分）。
-                    
-                    请严格使用 Markdown 格式，语言风格要求极简、犀利且极具专业性。
-                    """)
-                    
-                    chain = prompt | llm
-                    ai_response = chain.invoke({
-                        "symbol": symbol,
-                        "results_table": res_df.to_markdown()
-                    })
-                    
-                    st.divider()
-                    st.header("🧠 AI 策略诊断报告 (诊断书)")
-                    st.markdown(ai_response.content)
-                    
-                    # Downloadable MD
-                    full_md = f"# {symbol} 策略诊断报告\n\n## 1. 回测数据概览\n\n{res_df.to_markdown()}\n\n## 2. AI 深度诊断结论\n\n{ai_response.content}"
-                    st.download_button("📥 下载完整诊断报告 (.md)", data=full_md, file_name=f"AI_Audit_{symbol}.md")
-                    
-                except Exception as ex:
-                    st.error(f"AI 生成过程中发生异常: {ex}")
+            st.divider()
+            st.header("🧠 AI 策略诊断报告 (诊断书)")
+            st.button("⏹️ 停止生成", help="中断当前生成")
+            try:
+                llm = get_llm(api_key, max_tokens=1500)
+                
+                prompt = ChatPromptTemplate.from_template("""
+                你是一位资深的量化策略分析师。请分析以下针对股票代码 {symbol} 的多种量化策略回测结果。
+                
+                回测数据汇总：
+                {results_table}
+                
+                稳健性分析（日收益块自助法 + 交易顺序重排，各 5000 次模拟，90% 置信区间）：
+                {robustness}
+                
+                请提供深入的专业诊断方案（结论需考虑置信区间的宽度：区间越宽、亏损概率越高，单次回测结果越不可靠）：
+                1. **冠军解读**：识别表现最好的策略，从指标原理和该时间段的股价形态（趋势/震荡）解释其胜出的原因。
+                2. **风险评估**：重点分析最大回撤，识别哪些策略在这种行情下表现得过于脆弱。
+                3. **资产配置建议**：如果你是投资经理，你会如何通过整合这些信号来操作这只股票？
+                4. **参数优化建议**：针对当前发现的缺陷，建议调优哪些具体参数？
+                5. **总结性评分**：给这只股票基于目前各策略的响应情况打分（1-10分）。
+                
+                请严格使用 Markdown 格式，语言风格要求极简、犀利且极具专业性。
+                """)
+                
+                chain = prompt | llm
+                stats = StreamStats()
+                report = st.write_stream(stream_text(chain, {
+                    "symbol": symbol,
+                    "results_table": res_df.to_markdown(),
+                    "robustness": audit["robustness"]
+                }, stats))
+                st.caption(stats.caption())
+                st.session_state.audit_report = report
+                
+            except Exception as ex:
+                st.error(f"AI 生成过程中发生异常: {ex}")
+        elif st.session_state.get("audit_report"):
+            st.divider()
+            st.header("🧠 AI 策略诊断报告 (诊断书)")
+            st.markdown(st.session_state.audit_report)
+
+        if st.session_state.get("audit_report"):
+            # Downloadable MD
+            full_md = f"# {symbol} 策略诊断报告\n\n## 1. 回测数据概览\n\n{res_df.to_markdown()}\n\n## 2. AI 深度诊断结论\n\n{st.session_state.audit_report}"
+            st.download_button("📥 下载完整诊断报告 (.md)", data=full_md, file_name=f"AI_Audit_{symbol}.md")
     else:
         st.warning("⚠️ 检测到未配置 DeepSeek API Key，无法激活 AI 诊断模块。请在侧边栏配置。")
 
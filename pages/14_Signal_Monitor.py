@@ -1,11 +1,14 @@
+import os
 import streamlit as st
 import pandas as pd
 from datetime import datetime, timedelta
-from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
 
 from data_loader import DataLoader
 from backtest_engine import BacktestEngine
+from llm_client import StreamStats, get_llm, stream_text
+from market_data import get_market_store
+from news_sentiment import NewsSentiment
 from utils import configure_api_key
 
 # Import strategies
@@ -28,7 +31,21 @@ loader = DataLoader()
 # --- Sidebar ---
 with st.sidebar:
     st.header("🎯 监控配置")
-    symbols_raw = st.text_area("股票池 (代码逗号分隔)", "000973,600522,600105,000547,300045,000938,600487,600498", help="输入A股代码，用逗号或换行分隔")
+    screener_pool = st.session_state.get("screener_pool") or []
+    pool_source = st.radio(
+        "股票池来源", ["手动输入", "选股器结果"],
+        index=1 if screener_pool else 0,
+        horizontal=True,
+        help="选股器结果来自「全市场选股器」页面的「设为信号监控股票池」"
+    )
+    if pool_source == "选股器结果":
+        symbols_raw = ",".join(screener_pool)
+        if screener_pool:
+            st.caption(f"动态股票池: {len(screener_pool)} 只 — {symbols_raw[:80]}{'...' if len(symbols_raw) > 80 else ''}")
+        else:
+            st.warning("尚无选股器结果，请先在「全市场选股器」页面扫描。")
+    else:
+        symbols_raw = st.text_area("股票池 (代码逗号分隔)", "000973,600522,600105,000547,300045,000938,600487,600498", help="输入A股代码，用逗号或换行分隔")
     
     st.divider()
     
@@ -58,6 +75,11 @@ with st.sidebar:
     lookback_days = st.slider("历史回顾天数 (用于计算指标)", 30, 200, 100)
     pos_size = st.slider("模拟仓位 (%)", 10, 100, 95) / 100
 
+    st.divider()
+    st.header("📰 新闻情绪")
+    use_news = st.checkbox("扫描新闻情绪", value=False, help="并发抓取股票池新闻，按内容去重后由 DeepSeek 批量打分；已打分的标题走本地缓存，重复扫描只对新标题打分")
+    news_in_score = st.checkbox("情绪计入综合评分", value=True, disabled=not use_news, help="综合评分加上新闻平均情绪分 (-1 ~ 1)")
+
 def get_signal_info(res, df):
     """Analyze backtest result to find the latest signal and a numeric score."""
     strat = res['strat']
@@ -96,6 +118,10 @@ def get_signal_info(res, df):
 
 target_symbols = [s.strip() for s in symbols_raw.replace('\n', ',').split(',') if s.strip()]
 
+# The background refresher keeps the pool's daily bars warm between scans
+market_store = get_market_store()
+market_store.watch(target_symbols)
+
 # Initialize session state for persistent results
 if "scan_results" not in st.session_state:
     st.session_state.scan_results = None
@@ -109,6 +135,7 @@ if st.button("🔍 开始多策略实时扫描", use_container_width=True):
     if not selected_strategies:
         st.warning("请至少选择一个策略。")
         st.stop()
+    news_api_key = configure_api_key() if use_news else None
         
     engine = BacktestEngine(initial_cash=100000)
     
@@ -130,8 +157,10 @@ if st.button("🔍 开始多策略实时扫描", use_container_width=True):
         
         try:
             # 1. Fetch recent data (once per symbol)
-            # Signal monitor should ideally fetch fresh data, so use_cache=False or short cache
-            df = loader.get_stock_data(symbol, start_date.strftime("%Y-%m-%d"), end_date.strftime("%Y-%m-%d"), use_cache=False)
+            # Served from the shared store; only symbols not refreshed yet hit AKShare here
+            df = market_store.bars(symbol, start_date)
+            if df is None:
+                df = loader.get_stock_data(symbol, start_date.strftime("%Y-%m-%d"), end_date.strftime("%Y-%m-%d"), use_cache=False)
             
             if df.empty:
                 for s_name in selected_strategies:
@@ -171,6 +200,22 @@ if st.button("🔍 开始多策略实时扫描", use_container_width=True):
             
         results.append(row_data)
 
+    # 3. News sentiment for the whole pool (incremental: only unseen headlines are scored)
+    if use_news:
+        status_text.text(f"📰 正在抓取并评估 {len(target_symbols)} 只股票的新闻情绪...")
+        try:
+            news = NewsSentiment(get_llm(news_api_key, temperature=0), serper_api_key=os.getenv("SERPER_API_KEY"))
+            sentiment = news.scan(target_symbols, {r["代码"]: r["名称"] for r in results})
+            for row_data in results:
+                info = sentiment.get(row_data["代码"])
+                if not info:
+                    continue
+                row_data["新闻情绪"] = info["label"]
+                if news_in_score and info["count"] and "综合评分" in row_data:
+                    row_data["综合评分"] = round(row_data["综合评分"] + info["score"], 2)
+        except Exception as e:
+            st.warning(f"新闻情绪分析失败: {e}")
+
     status_text.text("✅ 扫描完成!")
     # Save to session state
     st.session_state.scan_results = results
@@ -193,7 +238,7 @@ if st.session_state.scan_results is not None:
         res_df = res_df.sort_values(by="综合评分", ascending=False)
     
     # Display columns: Code, Name, Price, [Strategies], Score, Return
-    display_cols = ["代码", "名称", "当前价格"] + active_strategies + ["综合评分", "平均收益率 (%)"]
+    display_cols = ["代码", "名称", "当前价格"] + active_strategies + ["综合评分", "新闻情绪", "平均收益率 (%)"]
     # Filter to only existing columns
     display_cols = [c for c in display_cols if c in res_df.columns]
 
@@ -245,43 +290,39 @@ if st.session_state.scan_results is not None:
     api_key = configure_api_key()
     if api_key:
         if st.button("🤖 生成 AI 策略共振分析报告"):
-            with st.spinner("AI 正在深度分析中..."):
-                try:
-                    llm = ChatOpenAI(
-                        model='deepseek-chat',
-                        openai_api_key=api_key,
-                        openai_api_base='https://api.deepseek.com/v1'
-                    )
-                    
-                    prompt = ChatPromptTemplate.from_template("""
-                    你是一位专业的量化交易员。你刚才对关注股票池进行了多策略实时监控，以下是综合结果：
-                    
-                    策略组合：{strategies}
-                    监控矩阵：
-                    {results_table}
-                    
-                    请基于多策略共振情况给出行动建议：
-                    1. **强共振挖掘**：哪些股票在多个策略下同时发出了 BUY 信号？这种共振意味着什么？
-                    2. **策略分歧处理**：如果某只股票在策略 A 是 BUY，但在策略 B 是 SELL，你建议如何操作？
-                    3. **综合评分最高者分析**：针对“综合评分”最高的几只股票，分析其潜在的趋势强度。
-                    4. **风险预警**：基于多策略结果，当前市场是否存在普遍的回撤风险或虚假信号？
-                    5. **实战指导**：如何根据这些信号进行仓位分配？
-                    
-                    请使用专业、简洁且利于实战的语言。
-                    """)
-                    
-                    chain = prompt | llm
-                    ai_resp = chain.invoke({
-                        "strategies": ", ".join(active_strategies),
-                        "results_table": res_df.to_markdown()
-                    })
-                    
-                    st.divider()
-                    st.header("🤖 AI 策略共振分析报告")
-                    st.markdown(ai_resp.content)
-                except Exception as e:
-                    st.info(f"AI 建议模块暂不可用: {e}")
+            st.divider()
+            st.header("🤖 AI 策略共振分析报告")
+            st.button("⏹️ 停止生成", help="中断当前生成")
+            try:
+                llm = get_llm(api_key)
+                
+                prompt = ChatPromptTemplate.from_template("""
+                你是一位专业的量化交易员。你刚才对关注股票池进行了多策略实时监控，以下是综合结果：
+                
+                策略组合：{strategies}
+                监控矩阵：
+                {results_table}
+                
+                请基于多策略共振情况给出行动建议：
+                1. **强共振挖掘**：哪些股票在多个策略下同时发出了 BUY 信号？这种共振意味着什么？
+                2. **策略分歧处理**：如果某只股票在策略 A 是 BUY，但在策略 B 是 SELL，你建议如何操作？
+                3. **综合评分最高者分析**：针对“综合评分”最高的几只股票，分析其潜在的趋势强度。
+                4. **风险预警**：基于多策略结果，当前市场是否存在普遍的回撤风险或虚假信号？
+                5. **实战指导**：如何根据这些信号进行仓位分配？
+                
+                请使用专业、简洁且利于实战的语言。
+                """)
+                
+                chain = prompt | llm
+                stats = StreamStats()
+                st.write_stream(stream_text(chain, {
+                    "strategies": ", ".join(active_strategies),
+                    "results_table": res_df.to_markdown()
+                }, stats))
+                st.caption(stats.caption())
+            except Exception as e:
+                st.info(f"AI 建议模块暂不可用: {e}")
 else:
     st.info("👈 请在左侧选择监控策略并输入股票代码，点击按钮开始多维度实时分析。")
-    st.warning("注：综合评分基于策略共识（BUY=+1, SELL=-1）。评分越高，代表多策略一致看多。")
+    st.warning("注：综合评分基于策略共识（BUY=+1, SELL=-1），开启「情绪计入综合评分」时再加上新闻平均情绪分 (-1 ~ 1)。评分越高，代表多策略一致看多。")
 
@@ -2,6 +2,7 @@ import streamlit as st
 import pandas as pd
 from datetime import datetime, timedelta
 from data_loader import DataLoader
+from live_feed import IntradayFeed
 from visualizer import plot_interactive_chart
 
 st.set_page_config(page_title="Visual Chart Pro", page_icon="📈", layout="wide")
@@ -75,7 +76,19 @@ if selected_symbol and mode == "历史日线":
         col4.metric("平均成交量", f"{int(df['volume'].mean()):,}")
 
         st.divider()
-        fig = plot_interactive_chart(df, symbol=f"{stock_name} ({selected_symbol})")
+        # Zooming re-renders the selected window from full-resolution data;
+        # only windows wider than the chart's point budget get downsampled
+        if len(df) > 1:
+            view_start, view_end = st.select_slider(
+                "🔎 缩放区间",
+                options=list(df.index),
+                value=(df.index[0], df.index[-1]),
+                format_func=lambda d: d.strftime("%Y-%m-%d")
+            )
+            view_df = df.loc[view_start:view_end]
+        else:
+            view_df = df
+        fig = plot_interactive_chart(view_df, symbol=f"{stock_name} ({selected_symbol})")
         st.plotly_chart(fig, use_container_width=True)
         
         with st.expander("🔍 查看原始数据预览"):
@@ -85,9 +98,16 @@ if selected_symbol and mode == "历史日线":
 
 elif selected_symbol and mode == "实时分时":
     # Real-time Mode - With Auto-refresh (Silent background updates)
+    # The intraday frame and figure live in session state; each refresh only
+    # patches the changed tail into the chart (see live_feed.IntradayFeed)
+    feed = st.session_state.get("intraday_feed")
+    if feed is None or feed.symbol != selected_symbol:
+        feed = IntradayFeed(loader, selected_symbol)
+        st.session_state.intraday_feed = feed
+
     @st.fragment(run_every=refresh_rate)
     def realtime_display():
-        quotes = loader.get_realtime_quotes(selected_symbol)
+        quotes = loader.get_quote(selected_symbol)
         
         if quotes:
             col1, col2, col3, col4 = st.columns(4)
@@ -97,10 +117,11 @@ elif selected_symbol and mode == "实时分时":
             col4.metric("今日成交量", f"{int(quotes['volume']):,}")
             
             # Silent data loading - no spinner for seamless UX
-            df_min = loader.get_intraday_data(selected_symbol)
+            feed.poll()
+            df_min = feed.frame
             if not df_min.empty:
                 st.divider()
-                fig = plot_interactive_chart(df_min, symbol=f"{quotes['name']} ({selected_symbol}) [分时]")
+                fig = feed.figure(f"{quotes['name']} ({selected_symbol}) [分时]")
                 st.plotly_chart(fig, use_container_width=True)
                 
                 with st.expander("🔍 查看分时数据"):
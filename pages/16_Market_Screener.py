@@ -0,0 +1,69 @@
+import streamlit as st
+import time
+from datetime import datetime
+
+from market_data import STALE_AFTER
+from screener import SPOT_FILTER_FIELDS, Screener
+
+st.set_page_config(page_title="Market Screener", page_icon="🧭", layout="wide")
+
+st.title("🧭 全市场选股器 (Market Screener)")
+st.caption("全A股快照向量化过滤 + 技术条件列式计算 | 结果可作为信号监控的动态股票池")
+
+# --- Sidebar: Conditions ---
+with st.sidebar:
+    st.header("⚖️ 快照条件")
+    ranges = {}
+    if st.checkbox("PE (动态) 区间", value=True):
+        ranges['市盈率-动态'] = st.slider("PE (动态)", 0.0, 200.0, (0.0, 30.0))
+    if st.checkbox("PB 区间", value=False):
+        ranges['市净率'] = st.slider("PB", 0.0, 20.0, (0.0, 3.0))
+    if st.checkbox("量比下限", value=True):
+        ranges['量比'] = (st.number_input("量比 >", 0.0, 50.0, 2.0, step=0.5), None)
+    if st.checkbox("换手率区间", value=False):
+        ranges['换手率'] = st.slider("换手率 (%)", 0.0, 50.0, (1.0, 20.0))
+
+    st.divider()
+    st.header("📈 技术条件")
+    rsi_below = st.number_input("RSI(14) 低于", 5, 100, 30) if st.checkbox("RSI 超卖", value=False) else None
+    donchian_period = st.number_input("唐奇安通道周期 (日)", 5, 120, 20) if st.checkbox("创 N 日新高", value=False) else None
+
+    st.divider()
+    sort_options = ['量比', '涨跌幅', '换手率', '市盈率-动态'] + (['RSI14'] if rsi_below is not None else [])
+    sort_by = st.selectbox("排序字段", sort_options, format_func=lambda f: SPOT_FILTER_FIELDS.get(f, f))
+    limit = st.slider("返回数量", 10, 200, 50)
+    max_candidates = st.slider("技术条件候选上限", 50, 1000, 300, help="快照过滤后最多对多少只股票拉取日线计算技术条件")
+
+if st.button("🚀 开始全市场扫描", use_container_width=True):
+    screener = Screener(max_candidates=max_candidates)
+    t0 = time.perf_counter()
+    with st.spinner("正在扫描全市场..."):
+        results = screener.run(
+            ranges=ranges,
+            rsi_below=rsi_below,
+            donchian_period=donchian_period,
+            sort_by=sort_by,
+            limit=limit
+        )
+    st.session_state.screener_results = results
+    st.session_state.screener_elapsed = time.perf_counter() - t0
+    st.session_state.screener_spot_at = screener.store.spot().fetched_at
+
+results = st.session_state.get("screener_results")
+if results is not None:
+    st.divider()
+    if results.empty:
+        st.warning("没有股票满足全部条件。")
+    else:
+        st.subheader(f"📋 选股结果 ({len(results)} 只, 耗时 {st.session_state.screener_elapsed:.1f}s)")
+        spot_at = st.session_state.get("screener_spot_at")
+        if spot_at:
+            st.caption(f"行情快照时间: {datetime.fromtimestamp(spot_at):%H:%M:%S}")
+            if time.time() - spot_at > STALE_AFTER:
+                st.warning("⚠️ 扫描所用的全市场快照已过时，行情字段可能不是最新值。")
+        st.dataframe(results, use_container_width=True)
+        if st.button("📡 设为信号监控股票池"):
+            st.session_state.screener_pool = list(results['代码'])
+            st.success(f"已将 {len(results)} 只股票设为「信号监控」的动态股票池。")
+else:
+    st.info("👈 在左侧设置条件后开始扫描。")
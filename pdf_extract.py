@@ -0,0 +1,81 @@
+import hashlib
+import io
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+from langchain_core.documents import Document
+from pypdf import PdfReader
+
+from process_pool import PROCESS_WORKERS, get_process_pool
+
+# PDFs with fewer pages than this are extracted inline (pool overhead dominates)
+PARALLEL_MIN_PAGES = 16
+CACHE_MAX_FILES = 32
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _extract_pages(reader, start, stop):
+    return [reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+
+def _extract_range(path, start, stop):
+    """Worker: extract pages [start, stop) of the PDF at `path`."""
+    return _extract_pages(PdfReader(path), start, stop)
+
+
+def file_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def extract_pdf_pages(data):
+    """
+    Return the text of every page of a PDF (bytes), in page order.
+    Large PDFs are split into page ranges across a process pool; results are
+    cached by content hash so re-extracting the same file is free.
+    """
+    key = file_hash(data)
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+
+    reader = PdfReader(io.BytesIO(data))
+    n_pages = len(reader.pages)
+    if n_pages < PARALLEL_MIN_PAGES:
+        pages = _extract_pages(reader, 0, n_pages)
+    else:
+        # Workers read the file from disk instead of each unpickling the whole PDF
+        fd, path = tempfile.mkstemp(suffix=".pdf")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            pool = get_process_pool()
+            n_chunks = min(PROCESS_WORKERS * 2, n_pages)
+            step = -(-n_pages // n_chunks)
+            futures = [pool.submit(_extract_range, path, i, min(i + step, n_pages)) for i in range(0, n_pages, step)]
+            pages = [text for f in futures for text in f.result()]
+        finally:
+            os.remove(path)
+
+    with _cache_lock:
+        _cache[key] = pages
+        while len(_cache) > CACHE_MAX_FILES:
+            _cache.popitem(last=False)
+    return pages
+
+
+def extract_pdf_text(data):
+    """Whole-document text, joined once."""
+    return "\n".join(extract_pdf_pages(data))
+
+
+def pdf_documents(data, source):
+    """One Document per page (same shape as PyPDFLoader.load())."""
+    return [
+        Document(page_content=text, metadata={"source": source, "page": i})
+        for i, text in enumerate(extract_pdf_pages(data))
+    ]
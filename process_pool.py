@@ -0,0 +1,26 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+# Leave one core for the Streamlit server itself
+PROCESS_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_process_pool():
+    """
+    Return the process-wide CPU pool (created on first use). Workers are
+    started by a forkserver (spawn where unavailable), never forked from the
+    multithreaded server, so they cannot inherit locks held by other threads.
+    Submitted functions must be importable module-level callables.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            _pool = ProcessPoolExecutor(max_workers=PROCESS_WORKERS,
+                                        mp_context=multiprocessing.get_context(method))
+        return _pool
@@ -0,0 +1,98 @@
+import numpy as np
+
+from process_pool import PROCESS_WORKERS, get_process_pool
+
+TRADING_DAYS = 252
+# Below this many simulated points (sims x length) everything runs inline
+PARALLEL_MIN_POINTS = 2_000_000
+CONFIDENCE = 0.90
+
+
+def max_drawdown(equity):
+    """Max drawdown (fraction, positive) of each row of an equity matrix."""
+    peak = np.maximum.accumulate(equity, axis=1)
+    return np.max(1 - equity / peak, axis=1)
+
+
+def _bootstrap_chunk(returns, block, n_sims, seed):
+    """Moving-block bootstrap of daily returns -> (total return, sharpe, max dd) per path."""
+    rng = np.random.default_rng(seed)
+    n = len(returns)
+    n_blocks = -(-n // block)
+    starts = rng.integers(0, n - block + 1, size=(n_sims, n_blocks))
+    idx = (starts[:, :, None] + np.arange(block)).reshape(n_sims, -1)[:, :n]
+    paths = returns[idx]
+    equity = np.cumprod(1 + paths, axis=1)
+    std = paths.std(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpe = np.where(std > 0, paths.mean(axis=1) / std * np.sqrt(TRADING_DAYS), 0.0)
+    return np.column_stack([equity[:, -1] - 1, sharpe, max_drawdown(np.hstack([np.ones((n_sims, 1)), equity]))])
+
+
+def _shuffle_chunk(pnls, initial_cash, n_sims, seed):
+    """Trade-order permutations -> max drawdown per path (final P&L is order-independent)."""
+    rng = np.random.default_rng(seed)
+    order = np.argsort(rng.random((n_sims, len(pnls))), axis=1)
+    equity = initial_cash + np.cumsum(pnls[order], axis=1)
+    return max_drawdown(np.hstack([np.full((n_sims, 1), float(initial_cash)), equity]))
+
+
+def _run(fn, args, n_sims, points, seed):
+    """Split n_sims across processes (independent seeds) when the job is large."""
+    seeds = np.random.SeedSequence(seed)
+    if n_sims * points < PARALLEL_MIN_POINTS:
+        return fn(*args, n_sims, seeds)
+    pool = get_process_pool()
+    n_chunks = min(PROCESS_WORKERS, n_sims)
+    sizes = [n_sims // n_chunks + (i < n_sims % n_chunks) for i in range(n_chunks)]
+    futures = [pool.submit(fn, *args, size, child) for size, child in zip(sizes, seeds.spawn(n_chunks))]
+    return np.concatenate([f.result() for f in futures])
+
+
+def _interval(values, confidence=CONFIDENCE):
+    tail = (1 - confidence) / 2 * 100
+    low, mid, high = np.nanpercentile(values, [tail, 50, 100 - tail])
+    return float(low), float(mid), float(high)
+
+
+def analyze(equity_curve, trade_pnls=None, initial_cash=None, n_sims=5000, block=5, seed=0):
+    """
+    Robustness of one backtest. Daily returns of `equity_curve` are block-
+    bootstrapped (keeps short-range autocorrelation); closed-trade P&Ls are
+    reshuffled to see how much of the drawdown was luck of ordering.
+    Returns {metric: (low, median, high)} at CONFIDENCE, plus 'prob_loss'.
+    """
+    values = np.asarray(equity_curve, dtype=float)
+    returns = np.diff(values) / values[:-1]
+    returns = returns[np.isfinite(returns)]
+    if len(returns) < 2 * block:
+        return {}
+    block = min(block, len(returns))
+    sims = _run(_bootstrap_chunk, (returns, block), n_sims, len(returns), seed)
+    report = {
+        'total_return': _interval(sims[:, 0]),
+        'sharpe': _interval(sims[:, 1]),
+        'max_drawdown': _interval(sims[:, 2]),
+        'prob_loss': float(np.mean(sims[:, 0] < 0)),
+    }
+    if trade_pnls is not None and len(trade_pnls) >= 2:
+        pnls = np.asarray(trade_pnls, dtype=float)
+        cash = initial_cash if initial_cash is not None else values[0]
+        dd = _run(_shuffle_chunk, (pnls, cash), n_sims, len(pnls), seed + 1)
+        report['shuffled_max_drawdown'] = _interval(dd)
+    return report
+
+
+def format_report(name, report):
+    """One markdown line per strategy for tables and the AI prompt."""
+    if not report:
+        return f"- {name}: 样本不足，无法评估稳健性"
+    pct = lambda t: f"{t[0] * 100:.1f}% ~ {t[2] * 100:.1f}%"
+    line = (
+        f"- {name}: 收益 {int(CONFIDENCE * 100)}% 区间 {pct(report['total_return'])}, "
+        f"夏普 {report['sharpe'][0]:.2f} ~ {report['sharpe'][2]:.2f}, "
+        f"最大回撤 {pct(report['max_drawdown'])}, 亏损概率 {report['prob_loss'] * 100:.0f}%"
+    )
+    if 'shuffled_max_drawdown' in report:
+        line += f", 交易顺序重排回撤 {pct(report['shuffled_max_drawdown'])}"
+    return line
@@ -0,0 +1,132 @@
+import numpy as np
+import pandas as pd
+
+from market_data import get_market_store
+
+# Spot fields that can be range-filtered, with their display names
+SPOT_FILTER_FIELDS = {
+    '市盈率-动态': 'PE (动态)',
+    '市净率': 'PB',
+    '量比': '量比',
+    '换手率': '换手率 (%)',
+    '涨跌幅': '涨跌幅 (%)',
+    '总市值': '总市值',
+}
+# Bars of history stacked per symbol for the technical conditions
+HISTORY_BARS = 60
+
+
+def stack_columns(histories, column, n_bars=HISTORY_BARS):
+    """
+    Right-aligned (symbols x n_bars) matrix of one OHLCV column, NaN-padded
+    for symbols with shorter history, so conditions run on all symbols at once.
+    """
+    out = np.full((len(histories), n_bars), np.nan)
+    for i, df in enumerate(histories):
+        values = df[column].values[-n_bars:]
+        if len(values):
+            out[i, n_bars - len(values):] = values
+    return out
+
+
+def wilder_rsi_last(close, period=14):
+    """
+    Latest Wilder RSI of every row of a (symbols x bars) close matrix. Each
+    row is seeded from its own first `period` valid deltas, so the NaN
+    padding of short histories is skipped; rows with fewer than period + 1
+    bars get NaN.
+    """
+    delta = np.diff(close, axis=1)
+    n = len(close)
+    count = np.zeros(n, dtype=np.int64)
+    avg_gain = np.zeros(n)
+    avg_loss = np.zeros(n)
+    for t in range(delta.shape[1]):
+        d = delta[:, t]
+        valid = ~np.isnan(d)
+        gain = np.where(valid & (d > 0), d, 0.0)
+        loss = np.where(valid & (d < 0), -d, 0.0)
+        count += valid
+        # SMA of the first `period` moves, then Wilder smoothing
+        seeding = valid & (count <= period)
+        avg_gain = np.where(seeding, avg_gain + gain / period, avg_gain)
+        avg_loss = np.where(seeding, avg_loss + loss / period, avg_loss)
+        smoothing = valid & (count > period)
+        avg_gain = np.where(smoothing, (avg_gain * (period - 1) + gain) / period, avg_gain)
+        avg_loss = np.where(smoothing, (avg_loss * (period - 1) + loss) / period, avg_loss)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsi = 100 - 100 / (1 + avg_gain / avg_loss)
+    rsi = np.where(avg_loss == 0, 100.0, rsi)
+    return np.where(count >= period, rsi, np.nan)
+
+
+class Screener:
+    """
+    Market-wide screener. Stage 1 filters the whole typed spot snapshot with
+    vectorized range masks; stage 2 evaluates technical conditions on the
+    surviving candidates' cached daily bars, stacked into matrices so every
+    condition is one NumPy pass over all symbols.
+    """
+    def __init__(self, store=None, max_candidates=300):
+        self.store = store or get_market_store()
+        self.max_candidates = max_candidates
+
+    def filter_spot(self, ranges):
+        """
+        Codes passing every spot range ({field: (low, high)}, None = open end),
+        most active (by 量比) first. Fields missing from the snapshot are ignored.
+        """
+        snap = self.store.spot(wait=15)
+        if snap.empty:
+            return []
+        mask = np.ones(len(snap), dtype=bool)
+        for field, (low, high) in ranges.items():
+            if field not in snap.fields:
+                continue  # not in this snapshot (e.g. upstream renamed a column)
+            values = snap.column(field)
+            if low is not None:
+                mask &= values >= low
+            if high is not None:
+                mask &= values <= high
+        codes = np.asarray(snap.codes)[mask]
+        if '量比' in snap.fields:
+            order = np.argsort(-np.nan_to_num(snap.column('量比')[mask], nan=-np.inf))
+            codes = codes[order]
+        return list(codes)
+
+    def run(self, ranges=None, rsi_below=None, donchian_period=None, sort_by='量比', limit=50):
+        """
+        Ranked DataFrame of symbols passing all conditions:
+        spot `ranges`, latest RSI(14) < `rsi_below`, and a new
+        `donchian_period`-day high (close above the prior N-day high).
+        """
+        candidates = self.filter_spot(ranges or {})
+        technical = rsi_below is not None or donchian_period is not None
+        if technical:
+            candidates = candidates[:self.max_candidates]
+        if not candidates:
+            return pd.DataFrame()
+
+        snap = self.store.spot()
+        rows = pd.DataFrame([snap.row(c) for c in candidates])
+
+        if technical:
+            bars = self.store.ensure_bars(candidates)
+            rows = rows[rows['代码'].isin(bars.keys())].reset_index(drop=True)
+            histories = [bars[c] for c in rows['代码']]
+            n_bars = max(HISTORY_BARS, (donchian_period or 0) + 1)
+            close = stack_columns(histories, 'close', n_bars)
+            mask = np.ones(len(rows), dtype=bool)
+            if rsi_below is not None:
+                rows['RSI14'] = wilder_rsi_last(close).round(2)
+                mask &= rows['RSI14'].values < rsi_below
+            if donchian_period is not None:
+                high = stack_columns(histories, 'high', n_bars)
+                prior_high = np.nanmax(high[:, -donchian_period - 1:-1], axis=1)
+                rows[f'{donchian_period}日高点'] = prior_high
+                mask &= close[:, -1] > prior_high
+            rows = rows[mask]
+
+        if sort_by in rows.columns:
+            rows = rows.sort_values(sort_by, ascending=sort_by == 'RSI14', na_position='last')
+        return rows.head(limit).reset_index(drop=True)
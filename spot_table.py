@@ -0,0 +1,141 @@
+import numpy as np
+import pandas as pd
+
+# Fields of stock_zh_a_spot_em the app actually reads, with compact dtypes.
+# The Chinese headers are kept as field names: they are what the pages use.
+SPOT_FIELDS = {
+    '名称': 'category',
+    '最新价': np.float32,
+    '涨跌幅': np.float32,
+    '最高': np.float32,
+    '最低': np.float32,
+    '成交量': np.int64,
+    '换手率': np.float32,
+    '量比': np.float32,
+    '振幅': np.float32,
+    '市盈率-动态': np.float32,
+    '市净率': np.float32,
+    '总市值': np.float64,  # ~1e12 yuan: float32 would lose too much precision
+}
+
+
+def _scalar(v):
+    """NumPy scalar -> Python value (float32 rounded back to its quoted precision)."""
+    if isinstance(v, np.float32):
+        return round(float(v), 4)
+    return v.item() if isinstance(v, np.generic) else v
+
+
+class SpotSnapshot:
+    """
+    Immutable, typed whole-market snapshot: one read-only NumPy array per
+    field and a code -> row position map for O(1) lookups. Built once per
+    refresh and shared by reference, so reads never copy or unpickle.
+    `fetched_at` is the epoch time of the download (None if unknown).
+    """
+    def __init__(self, codes, columns, fetched_at=None):
+        self.fetched_at = fetched_at
+        self.codes = pd.CategoricalIndex(codes, name='代码')
+        self._pos = {code: i for i, code in enumerate(codes)}
+        self._columns = columns
+        for values in columns.values():
+            if isinstance(values, np.ndarray):
+                values.flags.writeable = False
+
+    @classmethod
+    def from_spot_em(cls, df):
+        """Normalize a raw ak.stock_zh_a_spot_em() frame."""
+        if df is None or df.empty:
+            return cls([], {})
+        columns = {}
+        for field, dtype in SPOT_FIELDS.items():
+            if field not in df.columns:
+                continue
+            if dtype == 'category':
+                columns[field] = pd.Categorical(df[field].astype(str))
+            else:
+                values = pd.to_numeric(df[field], errors='coerce')
+                if np.issubdtype(dtype, np.integer):
+                    values = values.fillna(0)
+                columns[field] = values.to_numpy(dtype=dtype)
+        return cls(df['代码'].astype(str).tolist(), columns)
+
+    def __len__(self):
+        return len(self._pos)
+
+    def __contains__(self, code):
+        return code in self._pos
+
+    @property
+    def empty(self):
+        return not self._pos
+
+    @property
+    def fields(self):
+        return list(self._columns)
+
+    def column(self, field):
+        """Read-only array of one field, aligned with `codes` (no copy)."""
+        return self._columns[field]
+
+    def value(self, code, field, default=None):
+        i = self._pos.get(code)
+        if i is None or field not in self._columns:
+            return default
+        return _scalar(self._columns[field][i])
+
+    def row(self, code):
+        """All fields of one symbol as a dict (keys as in spot_em), or None."""
+        i = self._pos.get(code)
+        if i is None:
+            return None
+        row = {'代码': code}
+        for field, values in self._columns.items():
+            row[field] = _scalar(values[i])
+        return row
+
+    def to_frame(self):
+        """DataFrame view indexed by code (for display/screening)."""
+        return pd.DataFrame(self._columns, index=self.codes, copy=False)
+
+    @property
+    def nbytes(self):
+        total = self.codes.memory_usage(deep=True)
+        for values in self._columns.values():
+            total += values.nbytes
+        return int(total)
+
+
+if __name__ == "__main__":
+    # Benchmark: raw spot frame (mask lookup + cache pickle round trip, as
+    # st.cache_data does on every hit) vs. the typed snapshot
+    import pickle
+    import time
+
+    n = 5500
+    rng = np.random.default_rng(0)
+    codes = [f"{i:06d}" for i in range(n)]
+    raw = pd.DataFrame({
+        '序号': range(1, n + 1), '代码': codes, '名称': [f"股票{i}" for i in range(n)],
+        **{c: rng.random(n).round(2).astype(str).astype(object) for c in
+           ['最新价', '涨跌幅', '涨跌额', '最高', '最低', '今开', '昨收', '换手率', '量比', '振幅',
+            '市盈率-动态', '市净率', '涨速', '5分钟涨跌', '60日涨跌幅', '年初至今涨跌幅']},
+        '成交量': rng.integers(0, 10**7, n).astype(object),
+        '成交额': (rng.random(n) * 1e9).astype(object),
+        '总市值': (rng.random(n) * 1e12).astype(object),
+        '流通市值': (rng.random(n) * 1e12).astype(object),
+    })
+    snap = SpotSnapshot.from_spot_em(raw)
+    print(f"memory: raw {raw.memory_usage(deep=True).sum() / 1e6:.2f} MB, snapshot {snap.nbytes / 1e6:.2f} MB")
+
+    lookups = [codes[i] for i in rng.integers(0, n, 200)]
+    t0 = time.perf_counter()
+    for code in lookups:
+        df = pickle.loads(pickle.dumps(raw))
+        df[df['代码'] == code].iloc[0]
+    t_raw = (time.perf_counter() - t0) / len(lookups)
+    t0 = time.perf_counter()
+    for code in lookups:
+        snap.row(code)
+    t_snap = (time.perf_counter() - t0) / len(lookups)
+    print(f"lookup: raw {t_raw * 1e3:.3f} ms, snapshot {t_snap * 1e6:.1f} us ({t_raw / t_snap:.0f}x)")
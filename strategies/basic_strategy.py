@@ -13,6 +13,23 @@ class BaseStrategy(bt.Strategy):
         self.order = None
         self.log_data = []
         self.trade_history = [] # For plotting markers: (datetime, price, type)
+        self.plot_lines = {} # label -> (line, panel); filled via register_plot()
+        self.trade_pnls = [] # Net P&L of each closed trade (for robustness analysis)
+
+    def register_plot(self, label, obj, panel='price'):
+        """
+        Declare an indicator (all of its lines) or a single line as plot-worthy.
+        panel='price' overlays it on the price axis, panel='indicator' puts it
+        on the secondary oscillator axis.
+        """
+        lines = getattr(obj, 'lines', None)
+        if lines is not None and len(lines) > 1:
+            for i, alias in enumerate(lines.getlinealiases()):
+                self.plot_lines[f"{label}.{alias}"] = (lines[i], panel)
+        elif lines is not None:
+            self.plot_lines[label] = (lines[0], panel)
+        else:
+            self.plot_lines[label] = (obj, panel)
 
     def log(self, txt, dt=None):
         """ Logging function for this strategy """
@@ -55,5 +72,6 @@ class BaseStrategy(bt.Strategy):
         if not trade.isclosed:
             return
 
+        self.trade_pnls.append(trade.pnlcomm)
         self.log('OPERATION PROFIT, GROSS %.2f, NET %.2f' %
                  (trade.pnl, trade.pnlcomm))
@@ -20,6 +20,7 @@ class BollingerStrategy(BaseStrategy):
             period=self.p.period,
             devfactor=self.p.devfactor
         )
+        self.register_plot('boll', self.boll)
 
     def next(self):
         if not self.position:
@@ -88,6 +88,26 @@ class CompositeStrategy(BaseStrategy):
         self.dt_hc = bt.ind.Highest(self.data.close(-1), period=self.p.dt_period)
         self.dt_ll = bt.ind.Lowest(self.data.low(-1), period=self.p.dt_period)
 
+        # --- Plot registry: only the enabled signals/filters ---
+        if self.p.use_trend_filter:
+            self.register_plot('trend_sma', self.trend_sma)
+        if self.p.use_ma:
+            self.register_plot('sma_fast', self.sma_fast)
+            self.register_plot('sma_slow', self.sma_slow)
+        if self.p.use_bollinger:
+            self.register_plot('boll', self.boll)
+        if self.p.use_turtle:
+            self.register_plot('donchian_high', self.donchian_high)
+            self.register_plot('donchian_low', self.donchian_low)
+        if self.p.use_macd:
+            self.register_plot('macd', self.macd, panel='indicator')
+        if self.p.use_rsi:
+            self.register_plot('rsi', self.rsi, panel='indicator')
+        if self.p.use_kdj:
+            self.register_plot('K', self.k, panel='indicator')
+            self.register_plot('D', self.d, panel='indicator')
+            self.register_plot('J', self.j, panel='indicator')
+
 
     def next(self):
         # ---------------------------
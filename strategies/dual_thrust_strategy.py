@@ -25,6 +25,9 @@ class DualThrustStrategy(BaseStrategy):
         self.lowest_close = bt.ind.Lowest(self.data.close(-1), period=self.p.period)
         self.highest_close = bt.ind.Highest(self.data.close(-1), period=self.p.period)
         self.lowest_low = bt.ind.Lowest(self.data.low(-1), period=self.p.period)
+
+        self.register_plot('highest_high', self.highest_high)
+        self.register_plot('lowest_low', self.lowest_low)
     
     def next(self):
         # Calculate Range
@@ -32,6 +32,10 @@ class KdjStrategy(BaseStrategy):
         self.d = self.stoch.percD
         self.j = 3.0 * self.k - 2.0 * self.d
 
+        self.register_plot('K', self.k, panel='indicator')
+        self.register_plot('D', self.d, panel='indicator')
+        self.register_plot('J', self.j, panel='indicator')
+
     def next(self):
         # Entry Logic
         if not self.position:
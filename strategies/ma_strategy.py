@@ -34,6 +34,10 @@ class AdvancedMaStrategy(BaseStrategy):
         # RSI Indicator
         if self.p.use_rsi:
             self.rsi = bt.ind.RSI(period=self.p.rsi_period)
+            self.register_plot('rsi', self.rsi, panel='indicator')
+
+        self.register_plot('sma_fast', self.sma_fast)
+        self.register_plot('sma_slow', self.sma_slow)
 
     def next(self):
         # We are not in the market
@@ -26,6 +26,8 @@ class MacdStrategy(BaseStrategy):
         # CrossOver: macd.macd (DIF) vs macd.signal (DEA)
         self.crossover = bt.ind.CrossOver(self.macd.macd, self.macd.signal)
 
+        self.register_plot('macd', self.macd, panel='indicator')
+
     def next(self):
         if not self.position:
             # Entry: Golden Cross
@@ -20,6 +20,7 @@ class RsiStrategy(BaseStrategy):
             self.data.close,
             period=self.p.period
         )
+        self.register_plot('rsi', self.rsi, panel='indicator')
 
     def next(self):
         if not self.position:
@@ -24,6 +24,9 @@ class TurtleStrategy(BaseStrategy):
         # Lower channel for Exit (Lowest Low of last N2 days)
         self.donchian_low = bt.ind.Lowest(self.data.low(-1), period=self.p.exit_period)
         
+        self.register_plot('donchian_high', self.donchian_high)
+        self.register_plot('donchian_low', self.donchian_low)
+
         # Trailing stop state
         self.highest_since_entry = 0.0
 
@@ -0,0 +1,107 @@
+import types
+
+import pytest
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, Generation
+
+import disk_cache
+from disk_cache import CachedSearch, DiskCache, DiskLLMCache
+
+
+class _Clock:
+    def __init__(self, start=1_000_000.0):
+        self.now = start
+
+    def time(self):
+        return self.now
+
+
+class _StubSearch:
+    """Search provider stand-in that counts upstream calls."""
+    def __init__(self):
+        self.calls = 0
+
+    def run(self, query):
+        self.calls += 1
+        return f"result for {query}"
+
+    def results(self, query):
+        self.calls += 1
+        return {"news": [{"title": query}]}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(disk_cache, "time", types.SimpleNamespace(time=clock.time))
+    return clock
+
+
+@pytest.fixture
+def cache(tmp_path, clock):
+    return DiskCache(path=str(tmp_path / "cache.sqlite"))
+
+
+def test_cached_search_hit(cache):
+    stub = _StubSearch()
+    search = CachedSearch(stub, provider="stub", cache=cache)
+    assert search.run("茅台 股票") == "result for 茅台 股票"
+    assert search.run("茅台 股票") == "result for 茅台 股票"
+    assert search.results("茅台 股票") == {"news": [{"title": "茅台 股票"}]}
+    # run and results are cached separately
+    assert stub.calls == 2
+
+
+def test_cached_search_ttl_expiry(cache, clock):
+    stub = _StubSearch()
+    search = CachedSearch(stub, provider="stub", ttl=60, cache=cache)
+    search.run("query")
+    clock.now += 59
+    search.run("query")
+    assert stub.calls == 1
+    clock.now += 2
+    search.run("query")
+    assert stub.calls == 2
+
+
+def test_normalized_queries_share_a_key(cache):
+    stub = _StubSearch()
+    search = CachedSearch(stub, provider="stub", cache=cache)
+    search.run("Kweichow Moutai  news")
+    search.run("  kweichow moutai NEWS ")
+    assert stub.calls == 1
+    assert DiskCache.make_key("stub", "A  b") == DiskCache.make_key("stub", "a b")
+    assert DiskCache.make_key("stub", "a b") != DiskCache.make_key("other", "a b")
+
+
+def test_lru_eviction_under_max_bytes(cache, clock):
+    entry = "x" * 100
+    cache.max_bytes = 250  # room for two ~100-byte entries
+    cache.set("a", entry)
+    clock.now += 1
+    cache.set("b", entry)
+    clock.now += 1
+    assert cache.get("a") == entry  # a is now more recent than b
+    clock.now += 1
+    cache.set("c", entry)
+    assert cache.get("b") is None
+    assert cache.get("a") == entry
+    assert cache.get("c") == entry
+
+
+def test_disk_llm_cache_round_trip(cache):
+    llm_cache = DiskLLMCache(cache=cache)
+    prompt, llm_string = "prompt text", "model=deepseek-chat,temperature=0"
+    assert llm_cache.lookup(prompt, llm_string) is None
+
+    generations = [ChatGeneration(message=AIMessage(content="cached answer")), Generation(text="plain")]
+    llm_cache.update(prompt, llm_string, generations)
+    restored = llm_cache.lookup(prompt, llm_string)
+    assert [g.text for g in restored] == ["cached answer", "plain"]
+    assert isinstance(restored[0], ChatGeneration)
+    assert restored[0].message.content == "cached answer"
+    # Different model settings miss
+    assert llm_cache.lookup(prompt, "model=deepseek-chat,temperature=0.7") is None
+
+    llm_cache.clear()
+    assert llm_cache.lookup(prompt, llm_string) is None
@@ -0,0 +1,89 @@
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+pytest.importorskip("langchain_openai")
+
+import llm_client
+
+
+@pytest.fixture
+def server():
+    """Slow local endpoint that records the peak number of concurrent requests."""
+    state = {"active": 0, "peak": 0}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            with lock:
+                state["active"] += 1
+                state["peak"] = max(state["peak"], state["active"])
+            time.sleep(0.2)
+            with lock:
+                state["active"] -= 1
+            self.send_response(200)
+            self.send_header("Content-Length", "2")
+            self.end_headers()
+            self.wfile.write(b"ok")
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_port}/", state
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def two_slots(monkeypatch):
+    monkeypatch.setattr(llm_client, "_slots", threading.BoundedSemaphore(2))
+
+
+def test_sync_and_async_share_one_limit(server, two_slots):
+    url, state = server
+    sync_client = httpx.Client(transport=llm_client._CappedTransport())
+
+    async def async_calls():
+        async with httpx.AsyncClient(transport=llm_client._AsyncCappedTransport()) as client:
+            await asyncio.gather(*(client.get(url) for _ in range(3)))
+
+    threads = [threading.Thread(target=sync_client.get, args=(url,)) for _ in range(3)]
+    for t in threads:
+        t.start()
+    asyncio.run(async_calls())
+    for t in threads:
+        t.join()
+    sync_client.close()
+
+    assert state["peak"] == 2
+    # Every slot was handed back once the responses were read
+    assert all(llm_client._slots.acquire(blocking=False) for _ in range(2))
+
+
+def test_streamed_response_holds_slot_until_closed(server, two_slots):
+    url, _ = server
+    with httpx.Client(transport=llm_client._CappedTransport()) as client:
+        with client.stream("GET", url) as response:
+            assert llm_client._slots.acquire(blocking=False)
+            assert not llm_client._slots.acquire(blocking=False)
+            llm_client._slots.release()
+            response.read()
+    assert all(llm_client._slots.acquire(blocking=False) for _ in range(2))
+
+
+def test_async_llm_closes_its_client():
+    async def run():
+        async with llm_client.async_llm("sk-test") as llm:
+            client = llm.http_async_client
+            assert not client.is_closed
+        return client
+
+    assert asyncio.run(run()).is_closed
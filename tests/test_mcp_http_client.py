@@ -0,0 +1,114 @@
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from mcp_http_client import StatelessMcpSession
+
+
+class _Counter:
+    def __init__(self):
+        self.connections = 0
+        self.requests = 0
+        self.reject_batches = False
+
+
+def _answer(msg):
+    method = msg["method"]
+    if method == "tools/list":
+        result = {"tools": [{"name": "echo", "description": "Echo", "inputSchema": {}}]}
+    elif method == "resources/list":
+        result = {"resources": [{"uri": "mem://a", "name": "a"}]}
+    elif method == "tools/call":
+        result = {"content": [{"type": "text", "text": json.dumps(msg["params"]["arguments"])}]}
+    else:
+        result = {}
+    return {"jsonrpc": "2.0", "id": msg["id"], "result": result}
+
+
+@pytest.fixture
+def server():
+    """Local JSON-RPC stand-in that counts TCP connections and HTTP requests."""
+    counter = _Counter()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def setup(self):
+            counter.connections += 1
+            super().setup()
+
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            counter.requests += 1
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            if isinstance(body, list) and counter.reject_batches:
+                self.send_response(400)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            reply = [_answer(m) for m in body] if isinstance(body, list) else _answer(body)
+            payload = json.dumps(reply).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_port}/mcp", counter
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_session_reuses_one_connection(server):
+    url, counter = server
+
+    async def run():
+        async with StatelessMcpSession(url) as session:
+            await session.initialize()
+            await session.ping()
+            tools = await session.list_tools()
+            for i in range(3):
+                res = await session.call_tool("echo", {"i": i})
+                assert json.loads(res.content[0].text) == {"i": i}
+            return tools
+
+    tools = asyncio.run(run())
+    assert [t.name for t in tools.tools] == ["echo"]
+    assert counter.requests == 6
+    assert counter.connections == 1
+
+
+def test_list_catalog_is_one_round_trip(server):
+    url, counter = server
+
+    async def run():
+        async with StatelessMcpSession(url) as session:
+            return await session.list_catalog()
+
+    resources, tools = asyncio.run(run())
+    assert [r.uri for r in resources] == ["mem://a"]
+    assert [t.name for t in tools] == ["echo"]
+    assert counter.requests == 1
+    assert counter.connections == 1
+
+
+def test_batch_falls_back_to_sequential_posts(server):
+    url, counter = server
+    counter.reject_batches = True
+
+    async def run():
+        async with StatelessMcpSession(url) as session:
+            return await session.list_catalog()
+
+    resources, tools = asyncio.run(run())
+    assert [r.uri for r in resources] == ["mem://a"]
+    assert [t.name for t in tools] == ["echo"]
+    assert counter.requests == 3
+    assert counter.connections == 1
@@ -0,0 +1,63 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+import pytest
+
+import mcp_pool
+from mcp_pool import McpConnectionManager
+
+SERVER = {"url": "http://stub.invalid/mcp"}
+
+
+class _StubSession:
+    async def call_tool(self, name, arguments=None):
+        if name == "hang":
+            await asyncio.sleep(3600)
+        return name
+
+    async def send_ping(self):
+        pass
+
+
+@asynccontextmanager
+async def _stub_open_session(server_config):
+    yield _StubSession()
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    monkeypatch.setattr(mcp_pool, "open_session", _stub_open_session)
+    manager = McpConnectionManager(pool_size=2, health_interval=3600)
+    yield manager
+    manager.restart("stub")
+
+
+def _pool_sizes(manager):
+    async def _sizes():
+        pool = next(iter(manager._pools.values()))
+        return len(pool._idle), len(pool._all)
+    return manager.run(_sizes())
+
+
+def test_blocking_timeout_returns_session_slot(manager):
+    # More timeouts than pool slots: a leaked session would make the last call hang
+    for _ in range(3):
+        with pytest.raises(TimeoutError):
+            manager.call_tool("stub", SERVER, "hang", {}, timeout=0.2)
+    assert manager.call_tool("stub", SERVER, "ok", {}, timeout=5) == "ok"
+    idle, total = _pool_sizes(manager)
+    assert idle == total
+
+
+def test_cancelled_wrapped_call_returns_session_slot(manager):
+    # Same path as the agent tools: wrap_future + asyncio.wait_for (with_timeout)
+    async def call(name):
+        future = manager.submit(manager.call_tool_async("stub", SERVER, name, {}))
+        return await asyncio.wait_for(asyncio.wrap_future(future), 0.2)
+
+    for _ in range(3):
+        with pytest.raises(asyncio.TimeoutError):
+            asyncio.run(call("hang"))
+    assert asyncio.run(call("ok")) == "ok"
+    idle, total = _pool_sizes(manager)
+    assert idle == total
@@ -1,14 +1,43 @@
+import hashlib
+import threading
+
 import matplotlib.pyplot as plt
+import numpy as np
 import pandas as pd
 import streamlit as st
+from collections import OrderedDict
+from downsample import DEFAULT_MAX_POINTS, bucket_last, lttb_indices, ohlc_downsample, x_values
+
+def _line_array(line):
+    """Zero-copy float view of a backtrader line buffer."""
+    try:
+        return np.frombuffer(line.array, dtype=np.float64)
+    except (TypeError, ValueError, AttributeError):
+        return np.asarray(line.get(size=len(line)), dtype=float)
 
-def plot_trading_chart(df, trade_history, strategy=None):
+
+def strategy_plot_arrays(strategy, n):
+    """
+    (label, values, panel) for every line the strategy registered, aligned to
+    the last `n` bars (left-padded with NaN if the buffer is shorter).
+    """
+    arrays = []
+    for label, (line, panel) in getattr(strategy, 'plot_lines', {}).items():
+        values = _line_array(line)
+        if len(values) >= n:
+            values = values[len(values) - n:]
+        else:
+            values = np.concatenate([np.full(n - len(values), np.nan), values])
+        arrays.append((label, values, panel))
+    return arrays
+
+
+def plot_trading_chart(df, trade_history, strategy=None, max_points=DEFAULT_MAX_POINTS):
     """
     Create a technical analysis chart using Matplotlib.
+    Lines are reduced to `max_points` with LTTB and volume is bucket-summed
+    (pass max_points=None to draw every bar).
     """
-    import matplotlib.pyplot as plt
-    import numpy as np
-    
     # Use a safe style
     try:
         plt.style.use('ggplot')
@@ -17,55 +46,31 @@ def plot_trading_chart(df, trade_history, strategy=None):
         
     fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(12, 8), gridspec_kw={'height_ratios': [3, 1]}, sharex=True)
     
+    def reduce_line(values):
+        """(x, y) of a line after LTTB downsampling."""
+        values = np.asarray(values, dtype=float)
+        if not max_points or len(values) <= max_points:
+            return df.index, values
+        idx = lttb_indices(x_values(df.index), values, max_points)
+        return df.index[idx], values[idx]
+
     # 1. Plot Price
     if not df.empty and 'close' in df.columns:
-        ax1.plot(df.index, df['close'], label='Close Price', color='#1f77b4', linewidth=1.5, alpha=0.8)
-    
-    # 2. Plot Indicators (Optional)
-    if strategy is not None:
-        import backtrader as bt
-        # Use a more robust way to iterate over attributes
-        for attr_name in dir(strategy):
-            if attr_name.startswith('_') or attr_name in ['data', 'datas', 'broker', 'stats', 'env', 'cerebro', 'p', 'params', 'setsizer', 'order', 'trade_history', 'log_data']:
-                continue
-            
-            try:
-                attr = getattr(strategy, attr_name)
-                # Check if it's a Backtrader indicator or has lines
-                if hasattr(attr, 'lines') and not attr_name.startswith('data'):
-                    # Plot all lines in the indicator/object
-                    for i in range(len(attr.lines)):
-                        try:
-                            line_name = ""
-                            try:
-                                line_name = attr.lines._getname(i)
-                            except:
-                                line_name = f"line{i}"
-                                
-                            label = f"{attr_name}" if (not line_name or line_name == 'line') else f"{attr_name}.{line_name}"
-                            
-                            # Safely extract line data
-                            series = attr.lines[i]
-                            # backtrader lines can be accessed as arrays
-                            # Attempt to get the full array converted to a list of floats
-                            try:
-                                # get(size=...) is generally safer for finished runs
-                                line_data = series.get(size=len(series))
-                            except:
-                                line_data = list(series.array)
-                                
-                            if len(line_data) > 0:
-                                # Align with df.index (take the last N points where N = len(df))
-                                n = len(df)
-                                if len(line_data) >= n:
-                                    plot_values = line_data[-n:]
-                                    # Convert to numpy and handle NaNs for cleaner plotting
-                                    plot_values = np.array(plot_values, dtype=float)
-                                    ax1.plot(df.index, plot_values, label=label, alpha=0.6, linestyle='--')
-                        except Exception:
-                            continue
-            except Exception:
-                continue
+        ax1.plot(*reduce_line(df['close'].values), label='Close Price', color='#1f77b4', linewidth=1.5, alpha=0.8)
+    
+    # 2. Plot Indicators registered by the strategy (BaseStrategy.register_plot)
+    ax_ind = None
+    n = len(df)
+    for label, values, panel in strategy_plot_arrays(strategy, n):
+        if panel == 'indicator':
+            if ax_ind is None:
+                ax_ind = ax1.twinx()
+                ax_ind.grid(False)
+            ax_ind.plot(*reduce_line(values), label=label, alpha=0.5, linewidth=1)
+        else:
+            ax1.plot(*reduce_line(values), label=label, alpha=0.6, linestyle='--')
+    if ax_ind is not None:
+        ax_ind.legend(loc='upper left', fontsize='small')
 
     # 3. Plot Trade Markers
     try:
@@ -87,7 +92,10 @@ def plot_trading_chart(df, trade_history, strategy=None):
     
     # 4. Plot Volume
     if not df.empty and 'volume' in df.columns:
-        ax2.bar(df.index, df['volume'], color='gray', alpha=0.3, label='Volume')
+        vol_df = df
+        if max_points and len(df) > max_points:
+            vol_df, _ = ohlc_downsample(df, max_points)
+        ax2.bar(vol_df.index, vol_df['volume'], color='gray', alpha=0.3, label='Volume')
         ax2.set_ylabel('Volume')
     ax2.grid(True, alpha=0.3)
     
@@ -99,14 +107,64 @@ def plot_trading_chart(df, trade_history, strategy=None):
     
     return fig
 
-def plot_interactive_chart(df, symbol="Stock"):
+# Above this many bars, lines are drawn with WebGL (Scattergl) and the price
+# is drawn as a close line: candles are not distinguishable at that density.
+WEBGL_THRESHOLD = 20000
+MA_PERIODS = (5, 20, 60)
+_overlay_cache = OrderedDict()
+_overlay_cache_lock = threading.Lock()
+_OVERLAY_CACHE_SIZE = 16
+
+
+def _fingerprint(df):
+    """Digest of the close series: any change (qfq re-adjustment, data fix) is a new key."""
+    close = np.ascontiguousarray(df['close'].values, dtype=np.float64)
+    return hashlib.blake2b(close.tobytes(), digest_size=16).digest()
+
+
+def get_ma_overlays(df, periods=MA_PERIODS):
+    """
+    Rolling means for the chart overlays, cached by data fingerprint so the
+    real-time fragment does not recompute them on every refresh. The cache
+    is shared by all sessions.
+    """
+    key = (_fingerprint(df), tuple(periods))
+    with _overlay_cache_lock:
+        cached = _overlay_cache.get(key)
+        if cached is not None:
+            _overlay_cache.move_to_end(key)
+            return cached
+    close = df['close']
+    overlays = {p: close.rolling(window=p).mean().values for p in periods}
+    with _overlay_cache_lock:
+        _overlay_cache[key] = overlays
+        while len(_overlay_cache) > _OVERLAY_CACHE_SIZE:
+            _overlay_cache.popitem(last=False)
+    return overlays
+
+
+def plot_interactive_chart(df, symbol="Stock", max_points=DEFAULT_MAX_POINTS):
     """
     Create a professional interactive candlestick chart using Plotly.
     Includes Volume, MA indicators, and range selectors.
+    Series longer than `max_points` are aggregated into min/max/first/last
+    bars before being sent to the browser (max_points=None disables this).
     """
     import plotly.graph_objects as go
     from plotly.subplots import make_subplots
     
+    # Overlays are computed on full-resolution data, then aligned to the buckets
+    overlays = get_ma_overlays(df)
+    if max_points and len(df) > max_points:
+        full_len = len(df)
+        df, starts = ohlc_downsample(df, max_points)
+        overlays = {p: bucket_last(v, starts) for p, v in overlays.items()}
+        symbol = f"{symbol} [{len(df):,}/{full_len:,} 点]"
+    
+    large = len(df) > WEBGL_THRESHOLD
+    Line = go.Scattergl if large else go.Scatter
+    x = df.index
+    
     # 1. Create Subplots: Price (row 1), Volume (row 2)
     fig = make_subplots(
         rows=2, cols=1, 
@@ -115,33 +173,39 @@ def plot_interactive_chart(df, symbol="Stock"):
         row_heights=[0.7, 0.3]
     )
     
-    # 2. Add Candlestick
-    fig.add_trace(go.Candlestick(
-        x=df.index,
-        open=df['open'],
-        high=df['high'],
-        low=df['low'],
-        close=df['close'],
-        name='Candlestick',
-        increasing_line_color='#ef5350', # Red for up in A-share
-        decreasing_line_color='#26a69a'  # Green for down in A-share
-    ), row=1, col=1)
-    
-    # 3. Add Moving Averages
+    # 2. Add Candlestick (or a WebGL close line for very long series)
+    if large:
+        fig.add_trace(Line(
+            x=x, y=df['close'].values,
+            name='Close',
+            line=dict(width=1, color='#ef5350')
+        ), row=1, col=1)
+    else:
+        fig.add_trace(go.Candlestick(
+            x=x,
+            open=df['open'].values,
+            high=df['high'].values,
+            low=df['low'].values,
+            close=df['close'].values,
+            name='Candlestick',
+            increasing_line_color='#ef5350', # Red for up in A-share
+            decreasing_line_color='#26a69a'  # Green for down in A-share
+        ), row=1, col=1)
+    
+    # 3. Add Moving Averages (cached by data fingerprint)
     ma_colors = ['#1f77b4', '#ff7f0e', '#2ca02c']
-    for i, period in enumerate([5, 20, 60]):
-        ma = df['close'].rolling(window=period).mean()
-        fig.add_trace(go.Scatter(
-            x=df.index, y=ma, 
+    for i, (period, ma) in enumerate(overlays.items()):
+        fig.add_trace(Line(
+            x=x, y=ma, 
             name=f'MA{period}',
             line=dict(width=1.5, color=ma_colors[i]),
             opacity=0.7
         ), row=1, col=1)
         
-    # 4. Add Volume
-    colors = ['#ef5350' if row['close'] >= row['open'] else '#26a69a' for _, row in df.iterrows()]
+    # 4. Add Volume (vectorized up/down colors)
+    colors = np.where(df['close'].values >= df['open'].values, '#ef5350', '#26a69a')
     fig.add_trace(go.Bar(
-        x=df.index, y=df['volume'],
+        x=x, y=df['volume'].values,
         name='Volume',
         marker_color=colors,
         opacity=0.5
@@ -183,3 +247,61 @@ def plot_interactive_chart(df, symbol="Stock"):
     )
     
     return fig
+
+
+def append_chart_bars(fig, df, n_tail):
+    """
+    Patch a figure built by plot_interactive_chart (not downsampled) in place:
+    the last `n_tail` rows of `df` replace/extend the trace data, and the MA
+    overlays are only recomputed for that tail.
+    """
+    keep = len(df) - n_tail
+    tail = df.iloc[keep:]
+    x_new = tail.index.values
+
+    def extend(trace, attr, values):
+        old = np.asarray(getattr(trace, attr))[:keep]
+        setattr(trace, attr, np.concatenate([old, values]))
+
+    for trace in fig.data:
+        name = trace.name or ''
+        if name == 'Candlestick':
+            for col in ('open', 'high', 'low', 'close'):
+                extend(trace, col, tail[col].values)
+        elif name == 'Close':
+            extend(trace, 'y', tail['close'].values)
+        elif name.startswith('MA'):
+            period = int(name[2:])
+            window = df['close'].values[max(0, keep - period + 1):]
+            ma = pd.Series(window).rolling(window=period).mean().values[-n_tail:]
+            extend(trace, 'y', ma)
+        elif name == 'Volume':
+            extend(trace, 'y', tail['volume'].values)
+            colors = np.where(tail['close'].values >= tail['open'].values, '#ef5350', '#26a69a')
+            extend(trace.marker, 'color', colors)
+        else:
+            continue
+        extend(trace, 'x', x_new)
+    return fig
+
+
+if __name__ == "__main__":
+    # Benchmark: build the interactive chart for a 1M-bar minute history
+    import time
+
+    n = 1_000_000
+    rng = np.random.default_rng(0)
+    close = 10 + np.cumsum(rng.normal(0, 0.01, n))
+    bench_df = pd.DataFrame({
+        'open': close + rng.normal(0, 0.005, n),
+        'high': close + 0.02,
+        'low': close - 0.02,
+        'close': close,
+        'volume': rng.integers(100, 10000, n),
+    }, index=pd.date_range("2020-01-01", periods=n, freq="min"))
+
+    for label, max_points in (("cold, full res", None), ("cached overlays, full res", None),
+                              ("cached overlays, downsampled", DEFAULT_MAX_POINTS)):
+        t0 = time.perf_counter()
+        plot_interactive_chart(bench_df, symbol="BENCH", max_points=max_points)
+        print(f"plot_interactive_chart {n:,} bars [{label}]: {time.perf_counter() - t0:.2f}s")